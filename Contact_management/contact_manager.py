@@ -50,48 +50,10 @@ class Ui_MainWindow(object):
         self.btn_8 = QtWidgets.QPushButton(parent=self.widget)
         self.btn_8.setObjectName("btn_8")
         self.verticalLayout.addWidget(self.btn_8)
-        self.tableWidget = QtWidgets.QTableWidget(parent=self.centralwidget)
-        self.tableWidget.setGeometry(QtCore.QRect(260, 50, 771, 511))
-        self.tableWidget.setObjectName("tableWidget")
-        self.tableWidget.setColumnCount(5)
-        self.tableWidget.setRowCount(0)
-        self.tableWidget.horizontalHeader().setStretchLastSection(True)
-        self.tableWidget.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setPointSize(14)
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        self.tableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setPointSize(14)
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        self.tableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setPointSize(14)
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        self.tableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setPointSize(14)
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        self.tableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        font = QtGui.QFont()
-        font.setPointSize(14)
-        font.setBold(True)
-        font.setWeight(75)
-        item.setFont(font)
-        self.tableWidget.setHorizontalHeaderItem(4, item)
+        self.tableView = QtWidgets.QTableView(parent=self.centralwidget)
+        self.tableView.setGeometry(QtCore.QRect(260, 50, 771, 511))
+        self.tableView.setObjectName("tableView")
+        self.tableView.horizontalHeader().setStretchLastSection(True)
         self.label_1 = QtWidgets.QLabel(parent=self.centralwidget)
         self.label_1.setGeometry(QtCore.QRect(30, 8, 81, 31))
         font = QtGui.QFont()
@@ -143,16 +105,6 @@ class Ui_MainWindow(object):
         self.btn_6.setText(_translate("MainWindow", "view_notes"))
         self.btn_7.setText(_translate("MainWindow", "delete_note"))
         self.btn_8.setText(_translate("MainWindow", "exit_app"))
-        item = self.tableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "first_name"))
-        item = self.tableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "last_name"))
-        item = self.tableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "phone"))
-        item = self.tableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "email"))
-        item = self.tableWidget.horizontalHeaderItem(4)
-        item.setText(_translate("MainWindow", "massage"))
         self.label_1.setText(_translate("MainWindow", "option"))
         self.label_2.setText(_translate("MainWindow", "        Notification :"))
         self.menutools.setTitle(_translate("MainWindow", "file"))
@@ -1,11 +1,14 @@
 import sys
 import os
+import time
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import MainWindow
-from resources.themes.theme_loader import load_theme
+from resources.themes.theme_loader import SHOW_TIMINGS, load_theme
 
 
 if __name__ == "__main__":
+    started = time.perf_counter()
     app = QApplication(sys.argv)
     
     # بارگذاری تم پیش‌فرض (می‌توانید هر تم دیگری را انتخاب کنید)
@@ -18,4 +21,8 @@ if __name__ == "__main__":
     
     window = MainWindow()
     window.show()
+    if SHOW_TIMINGS:
+        # زمان راه‌اندازی تا اولین دور حلقه رویداد (پس از نمایش پنجره)
+        QTimer.singleShot(0, lambda: print(
+            f"برنامه در {(time.perf_counter() - started) * 1000:.0f} میلی‌ثانیه آماده شد."))
     sys.exit(app.exec()) 
\ No newline at end of file
@@ -1,9 +1,63 @@
-from typing import List, Dict, Any, Optional
+import sys
+import time
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def parse_timestamp(value: Union[int, str, None]) -> Optional[int]:
+    """
+    تبدیل زمان یادداشت به ثانیه‌های epoch
+    
+    Args:
+        value: عدد epoch، رشته عددی یا رشته با قالب TIMESTAMP_FORMAT (نسخه‌های قبلی)
+    
+    Returns:
+        زمان به ثانیه یا None برای مقدار خالی یا نامعتبر
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        return int(datetime.strptime(value, TIMESTAMP_FORMAT).timestamp())
+    except ValueError:
+        return None
+
+
+def format_timestamp(value: Union[int, str, None]) -> str:
+    """
+    نمایش زمان یادداشت با قالب TIMESTAMP_FORMAT به وقت محلی
+    
+    Args:
+        value: زمان یادداشت
+    
+    Returns:
+        رشته زمان (برای زمان نامعلوم، رشته خالی)
+    """
+    timestamp = parse_timestamp(value)
+    if timestamp is None:
+        return ''
+    return datetime.fromtimestamp(timestamp).strftime(TIMESTAMP_FORMAT)
+
 
 class Contact:
-    """کلاس مدل برای نگهداری اطلاعات یک مخاطب"""
+    """
+    کلاس مدل برای نگهداری اطلاعات یک مخاطب
+    
+    برای کم کردن حافظه دفترچه‌های بزرگ، فیلدها در __slots__ نگه داشته و
+    نام‌ها intern می‌شوند (نام‌های تکراری یک رشته مشترک دارند). از
+    یادداشت‌ها فقط تعداد و متن آخرین یادداشت همیشه در حافظه است؛ لیست
+    کامل (notes) وقتی محل ذخیره‌سازی آن را جداگانه نگه می‌دارد None است و
+    با ContactManager.get_notes خوانده می‌شود.
+    """
+    
+    __slots__ = ('first_name', 'last_name', 'phone', 'email', 'id',
+                 'notes', 'note_count', 'last_note')
     
     def __init__(self, first_name: str, last_name: str, phone: str, email: str = None):
         """
@@ -15,42 +69,74 @@ class Contact:
             phone: شماره تلفن
             email: ایمیل (اختیاری)
         """
-        self.first_name = first_name
-        self.last_name = last_name
+        self.first_name = sys.intern(first_name)
+        self.last_name = sys.intern(last_name)
         self.phone = phone
         self.email = email
-        self.notes: List[Dict[str, str]] = []
+        # شناسه پایدار مخاطب در محل ذخیره‌سازی و دفتر عملیات (تا پیش از ثبت None)
+        self.id: Optional[int] = None
+        # یادداشت‌ها با زمان epoch؛ None یعنی در حافظه بارگذاری نشده‌اند
+        self.notes: Optional[List[Dict[str, Any]]] = []
+        self.note_count = 0
+        self.last_note: Optional[str] = None
     
-    def add_note(self, text: str) -> Dict[str, str]:
+    def add_note(self, text: str, timestamp: int = None) -> Dict[str, Any]:
         """
         افزودن یادداشت به مخاطب
         
         Args:
             text: متن یادداشت
-            
+            timestamp: زمان یادداشت به ثانیه (پیش‌فرض: اکنون)
+        
         Returns:
             یادداشت اضافه شده
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         note = {
             'text': text,
-            'timestamp': timestamp
+            'timestamp': int(time.time()) if timestamp is None else timestamp
         }
-        self.notes.append(note)
+        if self.notes is not None:
+            self.notes.append(note)
+        self.note_count += 1
+        self.last_note = text
         return note
     
+    def set_notes(self, notes: List[Dict[str, Any]]):
+        """
+        جایگزینی یادداشت‌های بارگذاری‌شده (و به‌روزرسانی تعداد و آخرین یادداشت)
+        
+        Args:
+            notes: یادداشت‌ها
+        """
+        self.notes = notes
+        self.note_count = len(notes)
+        self.last_note = notes[-1]['text'] if notes else None
+    
+    def set_note_summary(self, count: int, last_note: Optional[str]):
+        """
+        ثبت تعداد و آخرین یادداشت بدون بارگذاری لیست یادداشت‌ها
+        
+        Args:
+            count: تعداد یادداشت‌ها
+            last_note: متن آخرین یادداشت
+        """
+        self.notes = None
+        self.note_count = count
+        self.last_note = last_note
+    
     def delete_note(self, index: int) -> bool:
         """
-        حذف یادداشت با شماره مشخص
+        حذف یادداشت با شماره مشخص (یادداشت‌ها باید بارگذاری شده باشند)
         
         Args:
             index: شماره یادداشت (از 0)
-            
+        
         Returns:
             نتیجه عملیات
         """
-        if 0 <= index < len(self.notes):
+        if self.notes is not None and 0 <= index < len(self.notes):
             self.notes.pop(index)
+            self.set_notes(self.notes)
             return True
         return False
     
@@ -69,12 +155,17 @@ class Contact:
         
         if self.email:
             result['email'] = self.email
-            
+        
+        if self.id is not None:
+            result['id'] = self.id
+        
         if self.notes:
-            result['notes'] = self.notes
+            # زمان‌ها برای سازگاری با نسخه قبلی به صورت رشته ذخیره می‌شوند
+            result['notes'] = [{'text': note['text'], 'timestamp': format_timestamp(note.get('timestamp'))}
+                               for note in self.notes]
             # برای سازگاری با نسخه قبلی، یادداشت آخر را در فیلد note هم ذخیره می‌کنیم
             result['note'] = self.notes[-1]['text']
-            
+        
         return result
     
     @classmethod
@@ -84,7 +175,7 @@ class Contact:
         
         Args:
             data: دیکشنری حاوی اطلاعات مخاطب
-            
+        
         Returns:
             شیء مخاطب ساخته شده
         """
@@ -94,18 +185,20 @@ class Contact:
             data['number'],
             data.get('email')
         )
+        contact.id = data.get('id')
         
         # بازیابی یادداشت‌ها
         if 'notes' in data:
-            contact.notes = data['notes']
+            contact.set_notes([{'text': note.get('text', ''), 'timestamp': parse_timestamp(note.get('timestamp'))}
+                               for note in data['notes']])
         elif 'note' in data:
             # تبدیل یادداشت تکی به فرمت آرایه
             contact.add_note(data['note'])
-            
+        
         return contact
     
     def __str__(self) -> str:
         """نمایش رشته‌ای مخاطب"""
         email_str = f", Email: {self.email}" if self.email else ""
-        notes_count = f", {len(self.notes)} notes" if self.notes else ""
-        return f"{self.first_name} {self.last_name} (Phone: {self.phone}{email_str}{notes_count})" 
\ No newline at end of file
+        notes_count = f", {self.note_count} notes" if self.note_count else ""
+        return f"{self.first_name} {self.last_name} (Phone: {self.phone}{email_str}{notes_count})"
@@ -0,0 +1,392 @@
+import csv
+import os
+import quopri
+import re
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from models.contact import Contact, format_timestamp, parse_timestamp
+from utils.validators import Validators
+
+CSV_HEADER = ['First Name', 'Last Name', 'Phone', 'Email', 'Note']
+VCARD_EXTENSIONS = ('.vcf', '.vcard')
+CHUNK_SIZE = 1000  # تعداد مخاطبین هر مرحله خواندن، اعتبارسنجی و گزارش پیشرفت
+VCARD_LINE_LENGTH = 75  # حداکثر طول هر خط vCard به بایت (RFC 6350)
+_VCARD_SPECIAL = re.compile(r'[\\,;\r\n]')
+
+ProgressCallback = Callable[[int, int], None]
+CancelCheck = Callable[[], bool]
+NotesLoader = Callable[[List[Contact]], List[List[dict]]]
+
+
+def is_vcard(file_path: str) -> bool:
+    """آیا فایل با پسوندش vCard است (در غیر این صورت CSV)"""
+    return os.path.splitext(file_path)[1].lower() in VCARD_EXTENSIONS
+
+
+def chunks(items: Iterable, size: int = CHUNK_SIZE) -> Iterator[list]:
+    """تقسیم یک جریان به لیست‌هایی با حداکثر size عضو"""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validate_contacts(contacts: List[Contact]) -> Tuple[List[Contact], List[str], int]:
+    """
+    اعتبارسنجی گروهی مخاطبین خوانده‌شده از فایل با Validators.validate_batch
+
+    نام، نام خانوادگی و شماره تلفن ضروری و باید معتبر باشند؛ ایمیل اختیاری
+    است ولی اگر باشد باید معتبر باشد.
+
+    Args:
+        contacts: مخاطبین یک مرحله
+
+    Returns:
+        مخاطبین معتبر، کلید تلفن هر یک (Validators.phone_match_key) و تعداد
+        مخاطبین نامعتبر
+    """
+    errors, phones = Validators.validate_batch(
+        (contact.first_name, contact.last_name, contact.phone, contact.email)
+        for contact in contacts
+    )
+    valid = []
+    valid_phones = []
+    for contact, error, phone in zip(contacts, errors, phones):
+        if not error:
+            valid.append(contact)
+            valid_phones.append(phone)
+    return valid, valid_phones, len(contacts) - len(valid)
+
+
+class ImportResult:
+    """نتیجه خواندن فایل واردات، پیش از ذخیره‌سازی"""
+
+    def __init__(self):
+        self.contacts: List[Contact] = []  # مخاطبین جدید و معتبر
+        self.rows = 0  # مخاطبین خوانده‌شده از فایل
+        self.invalid = 0  # ردیف‌های ناقص یا نامعتبر
+        self.duplicates = 0  # تکراری در فایل یا موجود در دفترچه
+        self.cancelled = False
+
+
+class ContactReader(ABC):
+    """
+    خواندن جریانی مخاطبین از فایل
+
+    پیمایش، مخاطبین را یکی‌یکی از فایل می‌خواند، پس حافظه مصرفی به حجم
+    فایل بستگی ندارد. ردیف‌هایی که حتی ساختار یک مخاطب را ندارند در
+    invalid شمرده می‌شوند.
+    """
+
+    def __init__(self, file_path: str, encoding: str = 'utf-8-sig'):
+        """
+        Args:
+            file_path: مسیر فایل
+            encoding: کدگذاری فایل (پیش‌فرض BOM را هم حذف می‌کند)
+        """
+        self.file_path = file_path
+        self.encoding = encoding
+        self.size = os.path.getsize(file_path)
+        self.invalid = 0
+        self._file = None
+
+    @property
+    def position(self) -> int:
+        """تعداد بایت‌های خوانده‌شده از فایل (برای نمایش پیشرفت)"""
+        if self._file is None or self._file.closed:
+            return self.size
+        return self._file.buffer.tell()
+
+    def _open(self):
+        self._file = open(self.file_path, newline='', encoding=self.encoding)
+        return self._file
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Contact]:
+        """خواندن مخاطبین معتبر فایل یکی‌یکی"""
+
+
+class CsvContactReader(ContactReader):
+    """خواندن فایل CSV با ستون‌های First Name, Last Name, Phone, Email, Note"""
+
+    def __iter__(self) -> Iterator[Contact]:
+        self.invalid = 0
+        timestamp = int(time.time())  # زمان واردات برای همه یادداشت‌ها
+        with self._open() as file:
+            reader = csv.reader(file)
+            next(reader, None)  # سرصفحه
+            for row in reader:
+                if not ''.join(row).strip():
+                    continue
+                if len(row) < 3:
+                    self.invalid += 1
+                    continue
+                email = row[3].strip() if len(row) > 3 else ''
+                note = row[4].strip() if len(row) > 4 else ''
+                contact = Contact(row[0].strip(), row[1].strip(), row[2].strip(), email or None)
+                if note:
+                    contact.add_note(note, timestamp)
+                yield contact
+
+
+def _unescape(value: str) -> str:
+    """برگرداندن \\n و \\, و \\; و \\\\ در مقدار vCard"""
+    if '\\' not in value:
+        return value
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            result.append('\n' if char in 'nN' else char)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def _split_components(value: str) -> List[str]:
+    """جدا کردن اجزای مقدار ساختاریافته (مثل N) با ';' بدون اسکیپ"""
+    components = ['']
+    escaped = False
+    for char in value:
+        if escaped:
+            components[-1] += '\\' + char
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == ';':
+            components.append('')
+        else:
+            components[-1] += char
+    return [_unescape(component).strip() for component in components]
+
+
+class VCardContactReader(ContactReader):
+    """
+    خواندن فایل vCard (نسخه‌های 2.1، 3.0 و 4.0)
+
+    از هر کارت، N (یا FN)، اولین TEL و EMAIL و همه NOTEها خوانده می‌شوند.
+    خطوط شکسته‌شده و مقادیر QUOTED-PRINTABLE (خروجی گوشی‌های قدیمی)
+    پشتیبانی می‌شوند.
+    """
+
+    def __iter__(self) -> Iterator[Contact]:
+        self.invalid = 0
+        self._timestamp = int(time.time())
+        card = None
+        with self._open() as file:
+            for line in self._lines(file):
+                name, params, value = self._parse_line(line)
+                if name == 'BEGIN' and value.upper() == 'VCARD':
+                    card = []
+                elif name == 'END' and value.upper() == 'VCARD':
+                    if card is not None:
+                        contact = self._contact(card)
+                        if contact is None:
+                            self.invalid += 1
+                        else:
+                            yield contact
+                    card = None
+                elif card is not None and name:
+                    card.append((name, params, value))
+
+    @staticmethod
+    def _lines(file) -> Iterator[str]:
+        """خطوط منطقی فایل با اتصال خطوط شکسته‌شده"""
+        current = None
+        for raw in file:
+            line = raw.rstrip('\r\n')
+            if current is not None and line[:1] in (' ', '\t'):
+                current += line[1:]
+                continue
+            if current is not None and current.endswith('=') and 'QUOTED-PRINTABLE' in current.upper().split(':', 1)[0]:
+                # شکستن نرم خط در QUOTED-PRINTABLE نسخه 2.1
+                current = current[:-1] + line
+                continue
+            if current:
+                yield current
+            current = line
+        if current:
+            yield current
+
+    @staticmethod
+    def _parse_line(line: str) -> Tuple[str, dict, str]:
+        """جدا کردن نام، پارامترها و مقدار (رمزگشایی‌شده) یک خط"""
+        # ':' و ';' داخل مقدار پارامترهای داخل گیومه جداکننده نیستند
+        parts, current, quoted = [], '', False
+        for position, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char in ';:' and not quoted:
+                parts.append(current)
+                current = ''
+                if char == ':':
+                    break
+                continue
+            current += char
+        else:
+            return '', {}, ''
+        value = line[position + 1:]
+        name = parts[0].rsplit('.', 1)[-1].strip().upper()  # حذف پیشوند گروه (item1.TEL)
+        params = {}
+        for part in parts[1:]:
+            key, _, param_value = part.partition('=')
+            if param_value:
+                params[key.strip().upper()] = param_value.strip().strip('"')
+            else:
+                params.setdefault('TYPE', key.strip())  # نسخه 2.1: TEL;CELL
+        if params.get('ENCODING', '').upper() == 'QUOTED-PRINTABLE':
+            charset = params.get('CHARSET', 'utf-8')
+            try:
+                value = quopri.decodestring(value.encode('latin-1', 'replace')).decode(charset, 'replace')
+            except LookupError:
+                value = quopri.decodestring(value.encode('latin-1', 'replace')).decode('utf-8', 'replace')
+        return name, params, value
+
+    def _contact(self, card: list) -> Optional[Contact]:
+        """ساخت مخاطب از خصوصیات یک کارت"""
+        first_name = last_name = phone = email = ''
+        full_name = ''
+        notes = []
+        for name, params, value in card:
+            if name == 'N' and not (first_name or last_name):
+                components = _split_components(value) + ['', '']
+                last_name, first_name = components[0], components[1]
+            elif name == 'FN':
+                full_name = _unescape(value).strip()
+            elif name == 'TEL' and not phone:
+                phone = value[4:] if value.lower().startswith('tel:') else value
+                phone = phone.strip()
+            elif name == 'EMAIL' and not email:
+                email = _unescape(value).strip()
+            elif name == 'NOTE':
+                text = _unescape(value).strip()
+                if text:
+                    notes.append((text, parse_timestamp(params.get('X-TIMESTAMP'))))
+        if not (first_name or last_name) and full_name:
+            first_name, _, last_name = full_name.rpartition(' ')
+            if not first_name:
+                first_name, last_name = last_name, ''
+        if not (first_name or last_name or phone):
+            return None
+        contact = Contact(first_name, last_name, phone, email or None)
+        for text, timestamp in notes:
+            contact.add_note(text, timestamp or self._timestamp)
+        return contact
+
+
+def open_reader(file_path: str) -> ContactReader:
+    """خواننده مناسب فایل بر اساس پسوند آن"""
+    if is_vcard(file_path):
+        return VCardContactReader(file_path)
+    return CsvContactReader(file_path)
+
+
+def _escape(value: str) -> str:
+    if not _VCARD_SPECIAL.search(value):
+        return value
+    return (value.replace('\\', '\\\\').replace(',', '\\,')
+            .replace(';', '\\;').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line: str) -> str:
+    """شکستن خط vCard به خطوط حداکثر 75 بایتی (بدون شکستن حروف چندبایتی)"""
+    if len(line.encode('utf-8')) <= VCARD_LINE_LENGTH:
+        return line + '\r\n'
+    parts = []
+    current, size, limit = [], 0, VCARD_LINE_LENGTH
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(''.join(current))
+            current, size, limit = [], 0, VCARD_LINE_LENGTH - 1  # فاصله ابتدای خط ادامه
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def vcard_lines(contact: Contact, notes: List[dict]) -> str:
+    """کارت vCard 3.0 یک مخاطب با یادداشت‌هایش"""
+    first_name, last_name = _escape(contact.first_name), _escape(contact.last_name)
+    lines = [
+        'BEGIN:VCARD',
+        'VERSION:3.0',
+        f'N:{last_name};{first_name};;;',
+        f'FN:{_escape(f"{contact.first_name} {contact.last_name}".strip())}',
+        f'TEL;TYPE=CELL:{_escape(contact.phone)}',
+    ]
+    if contact.email:
+        lines.append(f'EMAIL:{_escape(contact.email)}')
+    for note in notes:
+        timestamp = format_timestamp(note.get('timestamp'))
+        timestamp = f';X-TIMESTAMP="{timestamp}"' if timestamp else ''
+        lines.append(f'NOTE{timestamp}:{_escape(note.get("text", ""))}')
+    lines.append('END:VCARD')
+    return ''.join(_fold(line) for line in lines)
+
+
+def csv_row(contact: Contact) -> list:
+    """ردیف CSV یک مخاطب (فقط آخرین یادداشت، مانند جدول)"""
+    return [contact.first_name, contact.last_name, contact.phone, contact.email or '',
+            contact.last_note or '']
+
+
+def write_contacts(file_path: str, contacts: List[Contact], on_progress: ProgressCallback = None,
+                   is_cancelled: CancelCheck = None, notes_for: NotesLoader = None) -> bool:
+    """
+    نوشتن مخاطبین در فایل CSV یا vCard (بر اساس پسوند)
+
+    خروجی ابتدا در فایل موقت کنار مقصد نوشته می‌شود و فقط در پایان جایگزین
+    فایل مقصد می‌شود؛ با لغو عملیات فایل مقصد دست نمی‌خورد.
+
+    Args:
+        file_path: مسیر فایل خروجی
+        contacts: مخاطبین
+        on_progress: فراخوانی با (تعداد نوشته‌شده، کل) پس از هر مرحله
+        is_cancelled: در صورت برگرداندن True، نوشتن متوقف می‌شود
+        notes_for: خواندن یادداشت‌های یک مرحله از مخاطبین برای vCard
+            (پیش‌فرض: یادداشت‌های در حافظه)
+
+    Returns:
+        True اگر فایل کامل نوشته شد، False اگر لغو شد
+    """
+    temp_path = file_path + '.part'
+    total = len(contacts)
+    written = 0
+    cancelled = False
+    try:
+        with open(temp_path, 'w', newline='', encoding='utf-8') as file:
+            if is_vcard(file_path):
+                def write(chunk):
+                    notes = notes_for(chunk) if notes_for else [contact.notes or [] for contact in chunk]
+                    file.write(''.join(map(vcard_lines, chunk, notes)))
+            else:
+                writer = csv.writer(file)
+                writer.writerow(CSV_HEADER)
+
+                def write(chunk):
+                    writer.writerows(csv_row(contact) for contact in chunk)
+
+            for chunk in chunks(contacts):
+                if is_cancelled and is_cancelled():
+                    cancelled = True
+                    break
+                write(chunk)
+                written += len(chunk)
+                if on_progress:
+                    on_progress(written, total)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if cancelled:
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, file_path)
+    return True
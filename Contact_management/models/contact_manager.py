@@ -1,61 +1,389 @@
-import json
 import os
+import sys
+import time
 from typing import List, Dict, Any, Optional, Tuple, Union
 from models.contact import Contact
+from models.contact_io import (
+    CancelCheck, ImportResult, ProgressCallback, chunks, open_reader, validate_contacts,
+    write_contacts
+)
+from models.dedup import DuplicateGroup, find_duplicates
+from models.journal import OperationJournal, contact_from_record, contact_record, inverse, operation_size
+from models.search_index import ContactSearchIndex
+from models.storage import ContactStore, SQLiteContactStore, migrate_json_to_sqlite
+from utils.normalizers import name_key, email_key
+from utils.validators import Validators
+
+# تغییر بیش از این تعداد مخاطب در یک عملیات با یک اعلان contacts_reset گزارش می‌شود
+MAX_ROW_NOTIFICATIONS = 100
+# تعداد تغییرات ثبت‌شده در دفتر عملیات که پس از آن در محل ذخیره‌سازی ذخیره می‌شوند
+CHECKPOINT_SIZE = 100
+
+_OPERATION_LABELS = {
+    'add': 'افزودن مخاطب',
+    'delete': 'حذف مخاطب',
+    'update': 'ویرایش مخاطب',
+    'add_note': 'افزودن یادداشت',
+    'delete_note': 'حذف یادداشت',
+    'batch': 'ادغام مخاطبین',
+}
+
+
+class ContactListener:
+    """
+    گیرنده اعلان تغییرات مخاطبین (مثلاً مدل جدول رابط کاربری)
+    
+    متدها پس از تغییر لیست مخاطبین در حافظه صدا زده می‌شوند.
+    """
+    
+    def contacts_added(self, contacts: List[Contact]):
+        """مخاطبین جدید به انتهای لیست اضافه شدند"""
+    
+    def contact_changed(self, contact: Contact):
+        """فیلدها یا یادداشت‌های مخاطب تغییر کردند"""
+    
+    def contact_removed(self, contact: Contact):
+        """مخاطب حذف شد"""
+    
+    def contacts_reset(self, contacts: List[Contact]):
+        """کل لیست مخاطبین دوباره بارگذاری شد"""
+    
+    def history_changed(self):
+        """پشته‌های برگشت (undo) و انجام دوباره (redo) تغییر کردند"""
 
 
 class ContactManager:
     """کلاس مدیریت مخاطبین"""
     
-    def __init__(self, file_path: str = './Contact.json'):
+    def __init__(self, file_path: str = './Contact.json', store: ContactStore = None):
         """
         سازنده کلاس مدیریت مخاطبین
         
+        به طور پیش‌فرض مخاطبین در پایگاه داده SQLite کنار file_path (با پسوند
+        .db) ذخیره می‌شوند و در اولین اجرا مخاطبین فایل JSON قدیمی به آن
+        منتقل می‌شوند.
+        
+        هر تغییر ابتدا در حافظه اعمال و در دفتر عملیات (با پسوند .journal)
+        ثبت می‌شود و هر CHECKPOINT_SIZE تغییر (یا با checkpoint و close) یک‌جا
+        در محل ذخیره‌سازی ذخیره می‌شود؛ عملیات‌های دفتری که پیش از بسته
+        شدن برنامه ذخیره نشده‌اند در اجرای بعد دوباره اعمال می‌شوند.
+        
         Args:
-            file_path: مسیر فایل ذخیره‌سازی مخاطبین
+            file_path: مسیر فایل JSON مخاطبین (نسخه‌های قبلی)
+            store: محل ذخیره‌سازی (اختیاری، مثلاً JsonContactStore)
         """
         self.contacts: List[Contact] = []
+        # ایندکس‌ها: کلید نرمال‌شده -> مخاطبین به ترتیب افزودن
+        # (با هر تغییر به‌روز می‌شوند تا جستجو و بررسی تکراری بودن O(1) باشد)
+        self._by_name: Dict[Tuple[str, str], List[Contact]] = {}
+        self._by_phone: Dict[str, List[Contact]] = {}
+        self._by_email: Dict[str, List[Contact]] = {}
+        self._by_id: Dict[int, Contact] = {}
+        self._next_id = 1
+        self.search_index = ContactSearchIndex()
+        self.listeners: List[ContactListener] = []
         self.file_path = file_path
+        if store is None:
+            store = SQLiteContactStore(os.path.splitext(file_path)[0] + '.db')
+            try:
+                migrate_json_to_sqlite(file_path, store)
+            except Exception as e:
+                print(f"Error migrating contacts: {str(e)}")
+        self.store = store
+        self.journal = OperationJournal(os.path.splitext(file_path)[0] + '.journal',
+                                        store.applied_seq())
+        # عملیات‌های ثبت‌شده در دفتر که هنوز در محل ذخیره‌سازی نیستند
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_size = 0
         self.load_contacts()
+        self._replay_journal()
+    
+    def add_listener(self, listener: ContactListener):
+        """
+        ثبت گیرنده اعلان تغییرات مخاطبین
+        
+        Args:
+            listener: گیرنده اعلان‌ها
+        """
+        self.listeners.append(listener)
+    
+    def _notify(self, event: str, *args):
+        """فراخوانی متد event همه گیرنده‌ها"""
+        for listener in self.listeners:
+            getattr(listener, event)(*args)
+    
+    def _index_entries(self, contact: Contact):
+        """ایندکس‌ها و کلیدهای یک مخاطب"""
+        return ((self._by_name, name_key(contact.first_name, contact.last_name)),
+                (self._by_phone, Validators.phone_match_key(contact.phone)),
+                (self._by_email, email_key(contact.email)))
+    
+    def _index_contact(self, contact: Contact):
+        """افزودن مخاطب به ایندکس‌ها (یا به‌روزرسانی ایندکس جستجو پس از ویرایش)"""
+        for index, key in self._index_entries(contact):
+            if key:
+                index.setdefault(key, []).append(contact)
+        self._by_id[contact.id] = contact
+        self.search_index.add(contact)
+    
+    def _unindex_contact(self, contact: Contact):
+        """
+        حذف مخاطب از ایندکس‌های نام، تلفن و ایمیل (باید پیش از تغییر فیلدهای مخاطب صدا زده شود)
+        
+        ایندکس جستجو کلیدهای قبلی را خودش نگه می‌دارد و در حذف مخاطب جداگانه به‌روز می‌شود.
+        """
+        for index, key in self._index_entries(contact):
+            bucket = index.get(key)
+            if bucket and _remove_identical(bucket, contact) and not bucket:
+                del index[key]
+    
+    def rebuild_indexes(self):
+        """ساخت دوباره همه ایندکس‌ها از روی لیست مخاطبین"""
+        self._by_name.clear()
+        self._by_phone.clear()
+        self._by_email.clear()
+        self._by_id.clear()
+        self.search_index.clear()
+        for contact in self.contacts:
+            for index, key in self._index_entries(contact):
+                if key:
+                    index.setdefault(key, []).append(contact)
+            self._by_id[contact.id] = contact
+        self.search_index.add_many(self.contacts)
+    
+    def _assign_ids(self, contacts: List[Contact]):
+        """دادن شناسه‌های جدید به مخاطبین بدون شناسه (شناسه‌ها هرگز دوباره استفاده نمی‌شوند)"""
+        self._next_id = max([self._next_id] + [contact.id + 1 for contact in contacts
+                                               if contact.id is not None])
+        for contact in contacts:
+            if contact.id is None:
+                contact.id = self._next_id
+                self._next_id += 1
     
     def load_contacts(self) -> bool:
         """
-        بارگذاری مخاطبین از فایل
+        بارگذاری مخاطبین از محل ذخیره‌سازی
+        
+        تغییرات ذخیره‌نشده پیش از بارگذاری ذخیره می‌شوند.
         
         Returns:
             نتیجه عملیات
         """
         try:
-            if os.path.exists(self.file_path):
-                with open(self.file_path, 'r') as file:
-                    data = file.read()
-                    if data:
-                        contacts_data = json.loads(data)
-                        self.contacts = [Contact.from_dict(contact_data) for contact_data in contacts_data]
-            else:
-                with open(self.file_path, 'w') as file:
-                    file.write(json.dumps([]))
+            self.checkpoint()
+            self.contacts = self.store.load()
+            self._assign_ids(self.contacts)
+            self.rebuild_indexes()
+            self._notify('contacts_reset', self.contacts)
             return True
         except Exception as e:
             print(f"Error loading contacts: {str(e)}")
             self.contacts = []
+            self.rebuild_indexes()
+            self._notify('contacts_reset', self.contacts)
             return False
     
     def save_contacts(self) -> bool:
         """
-        ذخیره‌سازی مخاطبین در فایل
+        ذخیره‌سازی دوباره همه مخاطبین
+        
+        عملیات عادی در دفتر عملیات ثبت و با checkpoint ذخیره می‌شوند؛ این
+        متد کل داده‌ها را با لیست فعلی جایگزین می‌کند.
         
         Returns:
             نتیجه عملیات
         """
-        try:
-            contacts_data = [contact.to_dict() for contact in self.contacts]
-            with open(self.file_path, 'w') as file:
-                file.write(json.dumps(contacts_data, indent=4))
+        return self.checkpoint() and self.store.save_all(self.contacts)
+    
+    def checkpoint(self) -> bool:
+        """
+        ذخیره عملیات‌های ثبت‌شده در دفتر در محل ذخیره‌سازی (در یک تراکنش) و
+        خالی کردن فایل دفتر
+        
+        Returns:
+            نتیجه عملیات (در صورت خطا عملیات‌ها در دفتر می‌مانند)
+        """
+        if not self._pending:
             return True
-        except Exception as e:
-            print(f"Error saving contacts: {str(e)}")
+        if not self.store.apply(self._pending, self._by_id):
             return False
+        self._pending = []
+        self._pending_size = 0
+        try:
+            self.journal.truncate()
+        except OSError as e:
+            print(f"Error truncating journal: {str(e)}")
+        return True
+    
+    def close(self):
+        """ذخیره تغییرات ذخیره‌نشده و بستن دفتر عملیات و محل ذخیره‌سازی"""
+        self.checkpoint()
+        self.journal.close()
+        self.store.close()
+    
+    def _replay_journal(self):
+        """اعمال دوباره عملیات‌های دفتر که پیش از بسته شدن برنامه ذخیره نشده بودند"""
+        try:
+            operations = self.journal.pending()
+        except OSError as e:
+            print(f"Error reading journal: {str(e)}")
+            return
+        applied = []
+        for operation in operations:
+            try:
+                self._apply(operation, notify=False)
+            except (KeyError, IndexError, ValueError) as e:
+                print(f"Error replaying journal: {str(e)}")
+                break
+            applied.append(operation)
+        if applied:
+            self._notify('contacts_reset', self.contacts)
+        self._pending = applied
+        self._pending_size = sum(operation_size(operation) for operation in applied)
+        if operations:
+            self.checkpoint()
+    
+    def _contact_with_notes(self, contact_id: int) -> Contact:
+        """مخاطب با یادداشت‌های بارگذاری‌شده در حافظه (برای عملیات یادداشت)"""
+        contact = self._by_id[contact_id]
+        if contact.notes is None:
+            contact.set_notes(self.store.notes_for([contact])[0])
+        return contact
+    
+    def _apply(self, operation: Dict[str, Any], notify: bool = True):
+        """
+        اعمال یک عملیات دفتر بر مخاطبین در حافظه و ایندکس‌ها
+        
+        Args:
+            operation: عملیات (models.journal)
+            notify: ارسال اعلان به گیرنده‌ها
+        """
+        kind = operation['op']
+        if kind == 'add':
+            contacts = [contact_from_record(record) for record in operation['contacts']]
+            self.contacts.extend(contacts)
+            for contact in contacts:
+                self._index_contact(contact)
+            self._next_id = max([self._next_id] + [contact.id + 1 for contact in contacts])
+            if notify:
+                self._notify('contacts_added', contacts)
+        elif kind == 'delete':
+            removed = [self._by_id.pop(record['id']) for record in operation['contacts']]
+            for contact in removed:
+                self._unindex_contact(contact)
+                self.search_index.remove(contact)
+            if len(removed) == 1:
+                _remove_identical(self.contacts, removed[0])
+            else:
+                # لیست در جا تغییر می‌کند چون محل ذخیره‌سازی JSON همین لیست را نگه می‌دارد
+                removed_ids = {id(contact) for contact in removed}
+                self.contacts[:] = [contact for contact in self.contacts if id(contact) not in removed_ids]
+            if notify:
+                if len(removed) > MAX_ROW_NOTIFICATIONS:
+                    self._notify('contacts_reset', self.contacts)
+                else:
+                    for contact in removed:
+                        self._notify('contact_removed', contact)
+        elif kind == 'update':
+            contact = self._by_id[operation['id']]
+            self._unindex_contact(contact)
+            for field, value in operation['after'].items():
+                if field == 'notes':
+                    contact.set_notes([dict(note) for note in value])
+                elif field in ('first_name', 'last_name'):
+                    setattr(contact, field, sys.intern(value))
+                else:
+                    setattr(contact, field, value)
+            self._index_contact(contact)
+            if notify:
+                self._notify('contact_changed', contact)
+        elif kind in ('add_note', 'delete_note'):
+            contact = self._contact_with_notes(operation['id'])
+            if kind == 'add_note':
+                contact.notes.insert(operation['index'], dict(operation['note']))
+                contact.set_notes(contact.notes)
+            elif not contact.delete_note(operation['index']):
+                raise IndexError(f"Note {operation['index']} not found")
+            if notify:
+                self._notify('contact_changed', contact)
+        elif kind == 'batch':
+            quiet = operation_size(operation) > MAX_ROW_NOTIFICATIONS
+            for child in operation['operations']:
+                self._apply(child, notify and not quiet)
+            if notify and quiet:
+                self._notify('contacts_reset', self.contacts)
+        else:
+            raise ValueError(f"Unknown operation: {kind}")
+    
+    def _log(self, operation: Dict[str, Any]) -> bool:
+        """ثبت عملیات اعمال‌شده در دفتر و ذخیره در صورت رسیدن به CHECKPOINT_SIZE"""
+        try:
+            self.journal.append(operation)
+        except OSError as e:
+            # بدون دفتر، تغییر همین حالا ذخیره می‌شود
+            print(f"Error writing journal: {str(e)}")
+            self._pending_size = CHECKPOINT_SIZE
+        self._pending.append(operation)
+        self._pending_size += operation_size(operation)
+        if self._pending_size >= CHECKPOINT_SIZE:
+            return self.checkpoint()
+        return True
+    
+    def _execute(self, operation: Dict[str, Any]) -> bool:
+        """اعمال، ثبت و افزودن یک عملیات جدید کاربر به پشته برگشت"""
+        self._apply(operation)
+        saved = self._log(operation)
+        self.journal.record(operation)
+        self._notify('history_changed')
+        return saved
+    
+    def undo_label(self) -> Optional[str]:
+        """عنوان عملیاتی که undo برمی‌گرداند (None اگر عملیاتی نیست)"""
+        if not self.journal.undo_stack:
+            return None
+        return _OPERATION_LABELS[self.journal.undo_stack[-1]['op']]
+    
+    def redo_label(self) -> Optional[str]:
+        """عنوان عملیاتی که redo دوباره انجام می‌دهد (None اگر عملیاتی نیست)"""
+        if not self.journal.redo_stack:
+            return None
+        return _OPERATION_LABELS[self.journal.redo_stack[-1]['op']]
+    
+    def undo(self) -> Tuple[bool, str]:
+        """
+        برگرداندن آخرین عملیات (برگرداندن هم در دفتر عملیات ثبت می‌شود)
+        
+        Returns:
+            نتیجه عملیات و پیام
+        """
+        if not self.journal.undo_stack:
+            return False, "عملیاتی برای برگشت وجود ندارد"
+        operation = self.journal.undo_stack.pop()
+        self._apply(inverse(operation))
+        self.journal.redo_stack.append(operation)
+        saved = self._log(inverse(operation))
+        self._notify('history_changed')
+        if saved:
+            return True, f"{_OPERATION_LABELS[operation['op']]} برگردانده شد"
+        return False, "خطا در ذخیره‌سازی تغییرات"
+    
+    def redo(self) -> Tuple[bool, str]:
+        """
+        انجام دوباره آخرین عملیات برگردانده‌شده
+        
+        Returns:
+            نتیجه عملیات و پیام
+        """
+        if not self.journal.redo_stack:
+            return False, "عملیاتی برای انجام دوباره وجود ندارد"
+        operation = self.journal.redo_stack.pop()
+        self._apply(operation)
+        self.journal.undo_stack.append(operation)
+        saved = self._log(dict(operation))
+        self._notify('history_changed')
+        if saved:
+            return True, f"{_OPERATION_LABELS[operation['op']]} دوباره انجام شد"
+        return False, "خطا در ذخیره‌سازی تغییرات"
     
     def add_contact(self, first_name: str, last_name: str, phone: str, email: str = None) -> Tuple[bool, str]:
         """
@@ -80,10 +408,10 @@ class ContactManager:
         
         # ایجاد مخاطب جدید
         new_contact = Contact(first_name, last_name, phone, email)
+        self._assign_ids([new_contact])
         
-        # افزودن به لیست و ذخیره‌سازی
-        self.contacts.append(new_contact)
-        if self.save_contacts():
+        # افزودن به لیست و ثبت در دفتر عملیات
+        if self._execute({'op': 'add', 'contacts': [contact_record(new_contact, [])]}):
             return True, f"مخاطب {first_name} {last_name} با موفقیت اضافه شد"
         return False, "خطا در ذخیره‌سازی مخاطب"
     
@@ -108,18 +436,21 @@ class ContactManager:
         if not contact:
             return False, f"مخاطب {first_name} {last_name} یافت نشد"
         
-        # به‌روزرسانی فیلدها در صورت وجود
-        if new_first_name:
-            contact.first_name = new_first_name
-        if new_last_name:
-            contact.last_name = new_last_name
-        if new_phone:
-            contact.phone = new_phone
+        # فیلدهای تغییرکرده با مقدار قبلی (برای برگشت)
+        changes = {'first_name': new_first_name or None, 'last_name': new_last_name or None,
+                   'phone': new_phone or None}
+        changes = {field: value for field, value in changes.items() if value}
         if new_email is not None:  # چون ممکن است رشته خالی باشد
-            contact.email = new_email if new_email else None
+            changes['email'] = new_email if new_email else None
+        before = {field: getattr(contact, field) for field in changes}
+        after = {field: value for field, value in changes.items() if value != before[field]}
+        if not after:
+            return True, f"اطلاعات مخاطب با موفقیت به‌روز شد"
         
         # ذخیره‌سازی تغییرات
-        if self.save_contacts():
+        operation = {'op': 'update', 'id': contact.id,
+                     'before': {field: before[field] for field in after}, 'after': after}
+        if self._execute(operation):
             return True, f"اطلاعات مخاطب با موفقیت به‌روز شد"
         return False, "خطا در ذخیره‌سازی تغییرات"
     
@@ -134,37 +465,69 @@ class ContactManager:
         Returns:
             نتیجه عملیات و پیام
         """
-        for i, contact in enumerate(self.contacts):
-            if (contact.first_name.lower() == first_name.lower() and
-                    contact.last_name.lower() == last_name.lower()):
-                del self.contacts[i]
-                if self.save_contacts():
-                    return True, f"مخاطب {first_name} {last_name} با موفقیت حذف شد"
-                return False, "خطا در ذخیره‌سازی تغییرات"
-        return False, f"مخاطب {first_name} {last_name} یافت نشد"
+        contact = self.find_contact(first_name, last_name)
+        if not contact:
+            return False, f"مخاطب {first_name} {last_name} یافت نشد"
+        
+        # رکورد کامل با یادداشت‌ها تا حذف قابل برگشت باشد
+        notes = self.store.notes_for([contact])[0] if contact.note_count else []
+        if self._execute({'op': 'delete', 'contacts': [contact_record(contact, notes)]}):
+            return True, f"مخاطب {first_name} {last_name} با موفقیت حذف شد"
+        return False, "خطا در ذخیره‌سازی تغییرات"
     
     def find_contact(self, first_name: str, last_name: str, phone: str = None) -> Optional[Contact]:
         """
-        یافتن مخاطب بر اساس نام و نام خانوادگی
+        یافتن مخاطب بر اساس نام و نام خانوادگی (از طریق ایندکس نام)
         
         Args:
             first_name: نام
             last_name: نام خانوادگی
-            phone: شماره تلفن (اختیاری)
+            phone: شماره تلفن (اختیاری، با مقایسه قالب E.164 یا ارقام شماره)
             
         Returns:
             مخاطب یافت شده یا None
         """
-        for contact in self.contacts:
-            if (contact.first_name.lower() == first_name.lower() and
-                    contact.last_name.lower() == last_name.lower()):
-                if phone is None or contact.phone == phone:
-                    return contact
+        phone = Validators.phone_match_key(phone) if phone is not None else None
+        return self._find_by_keys(name_key(first_name, last_name), phone)
+    
+    def _find_by_keys(self, name: Tuple[str, str], phone: Optional[str]) -> Optional[Contact]:
+        """یافتن مخاطب با کلید نام و (اختیاری) کلید تلفن Validators.phone_match_key"""
+        for contact in self._by_name.get(name, ()):
+            if phone is None or Validators.phone_match_key(contact.phone) == phone:
+                return contact
         return None
     
+    def find_by_phone(self, phone: str) -> List[Contact]:
+        """
+        یافتن مخاطبین با شماره تلفن (بدون توجه به فاصله، خط تیره، نوع ارقام و
+        قالب ملی یا بین‌المللی شماره)
+        
+        Args:
+            phone: شماره تلفن
+            
+        Returns:
+            لیست مخاطبین یافت شده
+        """
+        return list(self._by_phone.get(Validators.phone_match_key(phone), ()))
+    
+    def find_by_email(self, email: str) -> List[Contact]:
+        """
+        یافتن مخاطبین با ایمیل (بدون حساسیت به بزرگی حروف)
+        
+        Args:
+            email: ایمیل
+            
+        Returns:
+            لیست مخاطبین یافت شده
+        """
+        return list(self._by_email.get(email_key(email), ()))
+    
     def search_contacts(self, search_term: str) -> List[Contact]:
         """
-        جستجوی مخاطبین بر اساس عبارت جستجو
+        جستجوی مخاطبین در نام، نام خانوادگی، ایمیل و ارقام شماره تلفن
+        
+        از ایندکس سه‌حرفی استفاده می‌کند؛ املای عربی و فارسی، نیم‌فاصله و
+        ارقام فارسی یکسان در نظر گرفته می‌شوند (جزئیات در ContactSearchIndex).
         
         Args:
             search_term: عبارت جستجو
@@ -174,20 +537,7 @@ class ContactManager:
         """
         if not search_term:
             return []
-            
-        search_term = search_term.lower()
-        results = []
-        
-        for contact in self.contacts:
-            # جستجو در تمام فیلدها
-            if (search_term in contact.first_name.lower() or
-                    search_term in contact.last_name.lower() or
-                    search_term in contact.phone):
-                results.append(contact)
-            elif contact.email and search_term in contact.email.lower():
-                results.append(contact)
-        
-        return results
+        return self.search_index.search(search_term)
     
     def add_note(self, first_name: str, last_name: str, note_text: str) -> Tuple[bool, str]:
         """
@@ -206,17 +556,21 @@ class ContactManager:
             return False, f"مخاطب {first_name} {last_name} یافت نشد"
         
         # افزودن یادداشت
-        contact.add_note(note_text)
+        note = {'text': note_text, 'timestamp': int(time.time())}
+        operation = {'op': 'add_note', 'id': contact.id, 'index': contact.note_count, 'note': note}
         
         # ذخیره‌سازی تغییرات
-        if self.save_contacts():
+        if self._execute(operation):
             return True, f"یادداشت با موفقیت به مخاطب {first_name} {last_name} اضافه شد"
         return False, "خطا در ذخیره‌سازی یادداشت"
     
-    def get_notes(self, first_name: str, last_name: str) -> Tuple[bool, str, List[Dict[str, str]]]:
+    def get_notes(self, first_name: str, last_name: str) -> Tuple[bool, str, List[Dict[str, Any]]]:
         """
         دریافت یادداشت‌های مخاطب
         
+        یادداشت‌ها در حافظه نگه داشته نمی‌شوند و هر بار از محل ذخیره‌سازی
+        خوانده می‌شوند؛ زمان هر یادداشت عدد epoch است (format_timestamp).
+        
         Args:
             first_name: نام
             last_name: نام خانوادگی
@@ -228,8 +582,9 @@ class ContactManager:
         if not contact:
             return False, f"مخاطب {first_name} {last_name} یافت نشد", []
         
-        if contact.notes:
-            return True, f"{len(contact.notes)} یادداشت یافت شد", contact.notes
+        notes = self.store.notes_for([contact])[0] if contact.note_count else []
+        if notes:
+            return True, f"{len(notes)} یادداشت یافت شد", notes
         return True, "یادداشتی یافت نشد", []
     
     def delete_note(self, first_name: str, last_name: str, note_index: int) -> Tuple[bool, str]:
@@ -251,19 +606,42 @@ class ContactManager:
         # تبدیل از شماره‌گذاری 1 به 0
         index = note_index - 1
         
-        if not contact.notes:
+        if not contact.note_count:
             return False, "مخاطب یادداشتی ندارد"
             
-        if 0 <= index < len(contact.notes):
-            # حذف یادداشت
-            contact.delete_note(index)
+        if 0 <= index < contact.note_count:
+            # حذف یادداشت (متن یادداشت برای برگشت نگه داشته می‌شود)
+            note = self._contact_with_notes(contact.id).notes[index]
+            operation = {'op': 'delete_note', 'id': contact.id, 'index': index, 'note': dict(note)}
             
             # ذخیره‌سازی تغییرات
-            if self.save_contacts():
+            if self._execute(operation):
                 return True, "یادداشت با موفقیت حذف شد"
             return False, "خطا در ذخیره‌سازی تغییرات"
         return False, f"شماره یادداشت {note_index} نامعتبر است"
     
+    def export_contacts(self, file_path: str, on_progress: ProgressCallback = None,
+                        is_cancelled: CancelCheck = None) -> Tuple[bool, str]:
+        """
+        صادرات مخاطبین به فایل CSV یا vCard (بر اساس پسوند .vcf)
+        
+        Args:
+            file_path: مسیر فایل خروجی
+            on_progress: فراخوانی با (تعداد نوشته‌شده، کل) (اختیاری)
+            is_cancelled: تابع بررسی لغو عملیات (اختیاری)
+            
+        Returns:
+            نتیجه عملیات و پیام
+        """
+        try:
+            contacts = list(self.contacts)
+            if not write_contacts(file_path, contacts, on_progress, is_cancelled,
+                                  self.store.notes_for):
+                return False, "صادرات لغو شد"
+            return True, f"{len(contacts)} مخاطب با موفقیت به {file_path} صادر شد"
+        except Exception as e:
+            return False, f"خطا در صادرات: {str(e)}"
+    
     def export_to_csv(self, file_path: str) -> Tuple[bool, str]:
         """
         صادرات مخاطبین به فایل CSV
@@ -274,31 +652,180 @@ class ContactManager:
         Returns:
             نتیجه عملیات و پیام
         """
+        return self.export_contacts(file_path)
+    
+    def prepare_import(self, file_path: str, on_progress: ProgressCallback = None,
+                       is_cancelled: CancelCheck = None) -> ImportResult:
+        """
+        خواندن، اعتبارسنجی و حذف تکراری‌های فایل CSV یا vCard بدون تغییر مخاطبین
+        
+        فایل به صورت جریانی و در مراحل CHUNK_SIZE تایی خوانده می‌شود. مخاطبی
+        که همان نام و شماره را در دفترچه یا زودتر در همین فایل دارد تکراری
+        است. می‌تواند در یک رشته پس‌زمینه اجرا شود؛ نتیجه با commit_import
+        ذخیره می‌شود.
+        
+        Args:
+            file_path: مسیر فایل ورودی
+            on_progress: فراخوانی با (بایت‌های خوانده‌شده، حجم فایل) (اختیاری)
+            is_cancelled: تابع بررسی لغو عملیات (اختیاری)
+            
+        Returns:
+            نتیجه خواندن فایل
+        """
+        result = ImportResult()
+        reader = open_reader(file_path)
+        seen = set()
+        for chunk in chunks(reader):
+            if is_cancelled and is_cancelled():
+                result.cancelled = True
+                break
+            result.rows += len(chunk)
+            valid, phones, invalid = validate_contacts(chunk)
+            result.invalid += invalid
+            for contact, phone in zip(valid, phones):
+                key = (name_key(contact.first_name, contact.last_name), phone)
+                if key in seen or self._find_by_keys(*key):
+                    result.duplicates += 1
+                    continue
+                seen.add(key)
+                result.contacts.append(contact)
+            if on_progress:
+                on_progress(reader.position, reader.size)
+        result.rows += reader.invalid
+        result.invalid += reader.invalid
+        return result
+    
+    def commit_import(self, contacts: List[Contact]) -> bool:
+        """
+        افزودن مخاطبین آماده‌شده با prepare_import در یک عملیات (قابل برگشت)
+        
+        Args:
+            contacts: مخاطبین جدید
+            
+        Returns:
+            نتیجه ذخیره‌سازی
+        """
+        if not contacts:
+            return True
+        self._assign_ids(contacts)
+        return self._execute({'op': 'add',
+                              'contacts': [contact_record(contact, contact.notes) for contact in contacts]})
+    
+    def import_contacts(self, file_path: str) -> Tuple[bool, str, int]:
+        """
+        واردات مخاطبین از فایل CSV یا vCard (بر اساس پسوند .vcf)
+        
+        Args:
+            file_path: مسیر فایل ورودی
+            
+        Returns:
+            نتیجه عملیات، پیام و تعداد مخاطبین وارد شده
+        """
         try:
-            with open(file_path, 'w') as file:
-                # نوشتن سرصفحه
-                file.write("First Name,Last Name,Phone,Email,Note\n")
-                
-                # نوشتن مخاطبین
-                for contact in self.contacts:
-                    first_name = contact.first_name
-                    last_name = contact.last_name
-                    phone = contact.phone
-                    email = contact.email or ''
-                    note = contact.notes[-1]['text'] if contact.notes else ''
-                    
-                    # اسکیپ کردن کاما در فیلدها
-                    first_name = f'"{first_name}"' if ',' in first_name else first_name
-                    last_name = f'"{last_name}"' if ',' in last_name else last_name
-                    phone = f'"{phone}"' if ',' in phone else phone
-                    email = f'"{email}"' if ',' in email else email
-                    note = f'"{note}"' if ',' in note else note
-                    
-                    file.write(f"{first_name},{last_name},{phone},{email},{note}\n")
-                    
-            return True, f"{len(self.contacts)} مخاطب با موفقیت به {file_path} صادر شد"
+            result = self.prepare_import(file_path)
         except Exception as e:
-            return False, f"خطا در صادرات: {str(e)}"
+            return False, f"خطا در واردات: {str(e)}", 0
+        return self.finish_import(result)
+    
+    def finish_import(self, result: ImportResult) -> Tuple[bool, str, int]:
+        """
+        ذخیره نتیجه prepare_import و ساخت پیام نتیجه
+        
+        Args:
+            result: نتیجه خواندن فایل
+            
+        Returns:
+            نتیجه عملیات، پیام و تعداد مخاطبین وارد شده
+        """
+        if result.cancelled:
+            return False, "واردات لغو شد", 0
+        skipped = []
+        if result.duplicates:
+            skipped.append(f"{result.duplicates} تکراری")
+        if result.invalid:
+            skipped.append(f"{result.invalid} نامعتبر")
+        skipped = f" ({'، '.join(skipped)} رد شد)" if skipped else ""
+        
+        imported_count = len(result.contacts)
+        if not imported_count:
+            return False, f"مخاطب جدیدی وارد نشد{skipped}", 0
+        if self.commit_import(result.contacts):
+            return True, f"{imported_count} مخاطب با موفقیت وارد شد{skipped}", imported_count
+        return False, "خطا در ذخیره‌سازی مخاطبین", 0
+    
+    def find_duplicates(self, on_progress: ProgressCallback = None,
+                        is_cancelled: CancelCheck = None) -> Optional[List[DuplicateGroup]]:
+        """
+        یافتن گروه‌های مخاطبین احتمالاً تکراری (تلفن، ایمیل یا نام مشابه)
+        
+        مخاطبین تغییر نمی‌کنند و می‌تواند در یک رشته پس‌زمینه اجرا شود؛
+        گروه‌های تأییدشده با merge_duplicates ادغام می‌شوند.
+        
+        Args:
+            on_progress: فراخوانی با (مرحله انجام‌شده، کل) (اختیاری)
+            is_cancelled: تابع بررسی لغو عملیات (اختیاری)
+            
+        Returns:
+            گروه‌های تکراری یا None اگر لغو شد
+        """
+        return find_duplicates(list(self.contacts), on_progress, is_cancelled)
+    
+    def _contains(self, contact: Contact) -> bool:
+        """آیا خود این مخاطب هنوز در دفترچه است"""
+        bucket = self._by_name.get(name_key(contact.first_name, contact.last_name), ())
+        return any(candidate is contact for candidate in bucket)
+    
+    def merge_duplicates(self, groups: List[DuplicateGroup]) -> Tuple[bool, str, int]:
+        """
+        ادغام هر گروه تکراری در مخاطب اصلی آن در یک عملیات (قابل برگشت)
+        
+        یادداشت‌های همه اعضای گروه به ترتیب زمان در مخاطب اصلی جمع می‌شوند
+        و ایمیل خالی مخاطب اصلی از اعضای دیگر پر می‌شود؛ بقیه اعضا حذف
+        می‌شوند. مخاطبینی که پس از یافتن گروه حذف شده‌اند نادیده گرفته
+        می‌شوند.
+        
+        Args:
+            groups: گروه‌های تکراری (از find_duplicates)
+            
+        Returns:
+            نتیجه عملیات، پیام و تعداد مخاطبین حذف‌شده
+        """
+        updates = []
+        removed = {}
+        primaries = set()
+        for group in groups:
+            primary = group.primary
+            if id(primary) in removed or not self._contains(primary):
+                continue
+            duplicates = [contact for contact in group.duplicates
+                          if id(contact) not in primaries and id(contact) not in removed
+                          and contact is not primary and self._contains(contact)]
+            if not duplicates:
+                continue
+            primaries.add(id(primary))
+            
+            members = [primary] + duplicates
+            member_notes = self.store.notes_for(members)
+            notes = [note for notes in member_notes for note in notes]
+            notes.sort(key=lambda note: note.get('timestamp') or 0)
+            before = {'notes': member_notes[0]}
+            after = {'notes': notes}
+            if not primary.email:
+                email = next((contact.email for contact in duplicates if contact.email), None)
+                if email:
+                    before['email'], after['email'] = None, email
+            updates.append({'op': 'update', 'id': primary.id, 'before': before, 'after': after})
+            for contact, contact_notes in zip(duplicates, member_notes[1:]):
+                removed[id(contact)] = contact_record(contact, contact_notes)
+        if not updates:
+            return False, "مخاطبی برای ادغام یافت نشد", 0
+        
+        # یک عملیات گروهی تا کل ادغام با یک undo برگردد
+        operation = {'op': 'batch',
+                     'operations': updates + [{'op': 'delete', 'contacts': list(removed.values())}]}
+        if self._execute(operation):
+            return True, f"{len(removed)} مخاطب تکراری در {len(updates)} مخاطب ادغام شد", len(removed)
+        return False, "خطا در ذخیره‌سازی تغییرات", 0
     
     def import_from_csv(self, file_path: str) -> Tuple[bool, str, int]:
         """
@@ -310,60 +837,13 @@ class ContactManager:
         Returns:
             نتیجه عملیات، پیام و تعداد مخاطبین وارد شده
         """
-        try:
-            imported_count = 0
-            with open(file_path, 'r') as file:
-                lines = file.readlines()
-                
-                # رد کردن سرصفحه
-                for i in range(1, len(lines)):
-                    line = lines[i].strip()
-                    if not line:
-                        continue
-                        
-                    # پردازش فیلدهای دارای کاما
-                    fields = []
-                    in_quotes = False
-                    current_field = ""
-                    
-                    for char in line:
-                        if char == '"':
-                            in_quotes = not in_quotes
-                        elif char == ',' and not in_quotes:
-                            fields.append(current_field)
-                            current_field = ""
-                        else:
-                            current_field += char
-                    
-                    # اضافه کردن آخرین فیلد
-                    fields.append(current_field)
-                    
-                    # اطمینان از وجود حداقل 3 فیلد
-                    if len(fields) < 3:
-                        continue
-                        
-                    first_name = fields[0].strip()
-                    last_name = fields[1].strip()
-                    phone = fields[2].strip()
-                    
-                    # فیلدهای اختیاری
-                    email = fields[3].strip() if len(fields) > 3 else None
-                    note = fields[4].strip() if len(fields) > 4 else None
-                    
-                    # رد کردن مخاطبین تکراری
-                    if self.find_contact(first_name, last_name, phone):
-                        continue
-                        
-                    # ایجاد مخاطب جدید
-                    new_contact = Contact(first_name, last_name, phone, email)
-                    if note:
-                        new_contact.add_note(note)
-                        
-                    self.contacts.append(new_contact)
-                    imported_count += 1
-            
-            if imported_count > 0 and self.save_contacts():
-                return True, f"{imported_count} مخاطب با موفقیت وارد شد", imported_count
-            return False, "مخاطب جدیدی وارد نشد", 0
-        except Exception as e:
-            return False, f"خطا در واردات: {str(e)}", 0 
\ No newline at end of file
+        return self.import_contacts(file_path)
+
+
+def _remove_identical(items: list, item) -> bool:
+    """حذف خود شیء (نه شیء مساوی) از لیست"""
+    for i, candidate in enumerate(items):
+        if candidate is item:
+            del items[i]
+            return True
+    return False
@@ -0,0 +1,181 @@
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from models.contact import Contact
+from models.contact_io import CancelCheck, ProgressCallback
+from utils.normalizers import email_key, name_skeleton
+from utils.validators import Validators
+
+# امتیاز هر نشانه تکراری بودن؛ جفت‌هایی با مجموع MATCH_THRESHOLD و بیشتر تکراری‌اند.
+# نام مشابه به تنهایی کافی نیست (دو «علی رضایی» می‌توانند دو نفر باشند)، ولی
+# نام مشابه با تلفن یا ایمیل یکسان، یا تلفن و ایمیل یکسان کافی است.
+PHONE_WEIGHT = 0.45
+EMAIL_WEIGHT = 0.35
+NAME_WEIGHT = 0.45
+MATCH_THRESHOLD = 0.8
+# بلوک‌های بزرگ‌تر (مثلاً یک نام بسیار رایج) مقایسه نمی‌شوند تا زمان اجرا
+# با تعداد مخاطبین خطی بماند
+MAX_BLOCK_SIZE = 100
+PROGRESS_STEP = 1000  # فاصله گزارش پیشرفت و بررسی لغو
+
+
+class DuplicateGroup:
+    """گروه مخاطبین تکراری پیشنهادی برای ادغام"""
+
+    def __init__(self, contacts: List[Contact], score: float):
+        """
+        Args:
+            contacts: مخاطبین گروه؛ اولی مخاطب اصلی است
+            score: کمترین امتیاز بین جفت‌های گروه
+        """
+        self.contacts = contacts
+        self.score = score
+
+    @property
+    def primary(self) -> Contact:
+        """مخاطبی که بقیه در آن ادغام می‌شوند"""
+        return self.contacts[0]
+
+    @property
+    def duplicates(self) -> List[Contact]:
+        """مخاطبینی که پس از ادغام حذف می‌شوند"""
+        return self.contacts[1:]
+
+
+def contact_keys(contact: Contact, skeletons: Dict[str, str] = None) -> Tuple[str, str, str, str]:
+    """
+    کلیدهای مقایسه یک مخاطب
+
+    Args:
+        contact: مخاطب
+        skeletons: حافظه اسکلت نام‌ها (نام‌ها در دفترچه‌های بزرگ بسیار تکرار می‌شوند)
+
+    Returns:
+        کلید تلفن، کلید ایمیل، اسکلت نام کامل و اسکلت نام کامل با ترتیب برعکس
+    """
+    if skeletons is None:
+        skeletons = {}
+    first_name = skeletons.get(contact.first_name)
+    if first_name is None:
+        first_name = skeletons[contact.first_name] = name_skeleton(contact.first_name)
+    last_name = skeletons.get(contact.last_name)
+    if last_name is None:
+        last_name = skeletons[contact.last_name] = name_skeleton(contact.last_name)
+    return (Validators.phone_match_key(contact.phone),
+            email_key(contact.email),
+            f'{first_name} {last_name}'.strip(),
+            f'{last_name} {first_name}'.strip())
+
+
+def score_keys(first: tuple, second: tuple) -> float:
+    """
+    امتیاز تکراری بودن دو مخاطب (بین 0 و 1) از روی contact_keys آن‌ها
+
+    شباهت نام نسبت SequenceMatcher اسکلت‌های نام است؛ جابه‌جا بودن نام و
+    نام خانوادگی هم در نظر گرفته می‌شود.
+    """
+    phone, email, name, _ = first
+    score = 0.0
+    if phone and phone == second[0]:
+        score += PHONE_WEIGHT
+    if email and email == second[1]:
+        score += EMAIL_WEIGHT
+    if name and second[2]:
+        if name == second[2] or name == second[3]:
+            similarity = 1.0
+        else:
+            similarity = max(SequenceMatcher(None, name, second[2]).ratio(),
+                             SequenceMatcher(None, name, second[3]).ratio())
+        score += NAME_WEIGHT * similarity
+    return min(score, 1.0)
+
+
+def _primary_order(contact: Contact, position: int) -> tuple:
+    """ترتیب انتخاب مخاطب اصلی: دارای ایمیل، بیشترین یادداشت، قدیمی‌ترین"""
+    return not contact.email, -contact.note_count, position
+
+
+def find_duplicates(contacts: List[Contact], on_progress: ProgressCallback = None,
+                    is_cancelled: CancelCheck = None) -> Optional[List[DuplicateGroup]]:
+    """
+    یافتن گروه‌های مخاطبین تکراری
+
+    مخاطبین فقط با هم‌بلوکی‌های خود مقایسه می‌شوند: مخاطبینی که تلفن
+    (در قالب E.164)، ایمیل یا اسکلت آوایی نام یکسان دارند. جفت‌های با امتیاز
+    کافی با هم گروه می‌شوند (اگر الف با ب و ب با ج تکراری باشد، هر سه یک
+    گروه‌اند). مخاطبین تغییر نمی‌کنند، پس می‌تواند در یک رشته پس‌زمینه
+    اجرا شود.
+
+    Args:
+        contacts: مخاطبین
+        on_progress: فراخوانی با (مرحله انجام‌شده، کل) (اختیاری)
+        is_cancelled: تابع بررسی لغو عملیات (اختیاری)
+
+    Returns:
+        گروه‌ها به ترتیب امتیاز (بیشترین اول)، یا None اگر لغو شد
+    """
+    total = 2 * len(contacts)
+    keys = []
+    skeletons: Dict[str, str] = {}
+    blocks: Dict[tuple, List[int]] = {}
+    for position, contact in enumerate(contacts):
+        if position % PROGRESS_STEP == 0:
+            if is_cancelled and is_cancelled():
+                return None
+            if on_progress:
+                on_progress(position, total)
+        contact_key = contact_keys(contact, skeletons)
+        keys.append(contact_key)
+        for kind, key in enumerate(contact_key[:3]):
+            if key:
+                blocks.setdefault((kind, key), []).append(position)
+
+    # اتصال جفت‌های تکراری با union-find؛ هر ریشه کمترین امتیاز گروهش را نگه می‌دارد
+    parents = list(range(len(contacts)))
+    scores: Dict[int, float] = {}
+
+    def root(position: int) -> int:
+        while parents[position] != position:
+            parents[position] = parents[parents[position]]
+            position = parents[position]
+        return position
+
+    compared = set()
+    candidates = [block for block in blocks.values() if 1 < len(block) <= MAX_BLOCK_SIZE]
+    for done, block in enumerate(candidates):
+        if done % PROGRESS_STEP == 0:
+            if is_cancelled and is_cancelled():
+                return None
+            if on_progress:
+                on_progress(len(contacts) + len(contacts) * done // len(candidates), total)
+        for i, first in enumerate(block):
+            for second in block[i + 1:]:
+                pair = (first, second)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                score = score_keys(keys[first], keys[second])
+                if score < MATCH_THRESHOLD:
+                    continue
+                first_root, second_root = root(first), root(second)
+                score = min(score, scores.pop(first_root, 1.0), scores.pop(second_root, 1.0))
+                if first_root != second_root:
+                    parents[second_root] = first_root
+                scores[first_root] = score
+
+    members: Dict[int, List[int]] = {}
+    for position in scores:
+        members[position] = []
+    for position in range(len(contacts)):
+        group_root = root(position)
+        if group_root in members:
+            members[group_root].append(position)
+    groups = []
+    for group_root, positions in members.items():
+        positions.sort(key=lambda position: _primary_order(contacts[position], position))
+        groups.append(DuplicateGroup([contacts[position] for position in positions],
+                                     scores[group_root]))
+    groups.sort(key=lambda group: -group.score)
+    if on_progress:
+        on_progress(total, total)
+    return groups
@@ -0,0 +1,180 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from models.contact import Contact
+
+# عملیات‌ها دیکشنری‌هایی با کلید 'op' هستند و مخاطبین را با شناسه (id) مشخص می‌کنند:
+#   add / delete: {'contacts': [رکورد مخاطب]}
+#   update: {'id', 'before': {فیلد: مقدار قبلی}, 'after': {فیلد: مقدار جدید}}
+#           (فیلدها: first_name، last_name، phone، email و notes)
+#   add_note / delete_note: {'id', 'index', 'note'}
+#   batch: {'operations': [عملیات]}
+# هر عملیات ثبت‌شده شماره ترتیبی 'seq' هم دارد.
+UNDO_LIMIT = 100  # حداکثر تعداد عملیات قابل برگشت
+
+
+def contact_record(contact: Contact, notes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    رکورد کامل یک مخاطب برای عملیات افزودن و حذف
+
+    Args:
+        contact: مخاطب
+        notes: یادداشت‌های مخاطب
+
+    Returns:
+        دیکشنری مخاطب با شناسه و یادداشت‌ها
+    """
+    record = {'id': contact.id, 'first_name': contact.first_name,
+              'last_name': contact.last_name, 'phone': contact.phone}
+    if contact.email:
+        record['email'] = contact.email
+    if notes:
+        record['notes'] = [dict(note) for note in notes]
+    return record
+
+
+def contact_from_record(record: Dict[str, Any]) -> Contact:
+    """
+    ساخت مخاطب از رکورد contact_record
+
+    Args:
+        record: رکورد مخاطب
+
+    Returns:
+        مخاطب با یادداشت‌های بارگذاری‌شده
+    """
+    contact = Contact(record['first_name'], record['last_name'], record['phone'], record.get('email'))
+    contact.id = record['id']
+    if 'notes' in record:
+        contact.set_notes([dict(note) for note in record['notes']])
+    return contact
+
+
+def inverse(operation: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    عملیات برگرداننده یک عملیات (برای undo)
+
+    Args:
+        operation: عملیات
+
+    Returns:
+        عملیات معکوس (بدون seq)
+    """
+    kind = operation['op']
+    if kind in ('add', 'delete'):
+        return {'op': 'delete' if kind == 'add' else 'add', 'contacts': operation['contacts']}
+    if kind == 'update':
+        return {'op': 'update', 'id': operation['id'],
+                'before': operation['after'], 'after': operation['before']}
+    if kind in ('add_note', 'delete_note'):
+        return {'op': 'delete_note' if kind == 'add_note' else 'add_note', 'id': operation['id'],
+                'index': operation['index'], 'note': operation['note']}
+    if kind == 'batch':
+        return {'op': 'batch',
+                'operations': [inverse(child) for child in reversed(operation['operations'])]}
+    raise ValueError(f"Unknown operation: {kind}")
+
+
+def operation_size(operation: Dict[str, Any]) -> int:
+    """تعداد تغییرات یک عملیات (هر مخاطب افزوده یا حذف‌شده یک تغییر است)"""
+    kind = operation['op']
+    if kind in ('add', 'delete'):
+        return len(operation['contacts'])
+    if kind == 'batch':
+        return sum(operation_size(child) for child in operation['operations'])
+    return 1
+
+
+def touched_ids(operation: Dict[str, Any]) -> List[int]:
+    """شناسه مخاطبینی که عملیات تغییرشان می‌دهد"""
+    kind = operation['op']
+    if kind in ('add', 'delete'):
+        return [record['id'] for record in operation['contacts']]
+    if kind == 'batch':
+        return [contact_id for child in operation['operations'] for contact_id in touched_ids(child)]
+    return [operation['id']]
+
+
+class OperationJournal:
+    """
+    دفتر عملیات مخاطبین
+
+    هر تغییر به صورت یک خط JSON به انتهای فایل اضافه می‌شود تا اگر برنامه
+    پیش از ذخیره در محل ذخیره‌سازی بسته شد، در اجرای بعد دوباره اعمال
+    شود؛ پس از ذخیره (checkpoint) فایل خالی می‌شود. پشته‌های undo و redo
+    فقط در حافظه هستند.
+    """
+
+    def __init__(self, path: Optional[str], last_seq: int = 0):
+        """
+        Args:
+            path: مسیر فایل دفتر (None برای دفتر فقط در حافظه)
+            last_seq: شماره آخرین عملیات ذخیره‌شده در محل ذخیره‌سازی
+        """
+        self.path = path
+        self.seq = last_seq
+        self.undo_stack: List[Dict[str, Any]] = []
+        self.redo_stack: List[Dict[str, Any]] = []
+        self._file = None
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """
+        عملیات‌های فایل دفتر که هنوز در محل ذخیره‌سازی نیستند
+
+        Returns:
+            عملیات‌ها به ترتیب ثبت (خط ناقص آخر فایل نادیده گرفته می‌شود)
+        """
+        operations = []
+        if not self.path or not os.path.exists(self.path):
+            return operations
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    operation = json.loads(line)
+                except ValueError:
+                    break
+                if operation.get('seq', 0) > self.seq:
+                    operations.append(operation)
+        if operations:
+            self.seq = operations[-1]['seq']
+        return operations
+
+    def append(self, operation: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        ثبت یک عملیات در انتهای فایل دفتر
+
+        Args:
+            operation: عملیات
+
+        Returns:
+            عملیات با شماره ترتیبی
+        """
+        self.seq += 1
+        operation['seq'] = self.seq
+        if self.path:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(operation, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self._file.flush()
+        return operation
+
+    def record(self, operation: Dict[str, Any]):
+        """افزودن عملیات جدید کاربر به پشته undo (و پاک کردن پشته redo)"""
+        self.undo_stack.append(operation)
+        del self.undo_stack[:-UNDO_LIMIT]
+        self.redo_stack.clear()
+
+    def truncate(self):
+        """خالی کردن فایل دفتر پس از ذخیره عملیات‌ها در محل ذخیره‌سازی"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path and os.path.exists(self.path):
+            open(self.path, 'w').close()
+
+    def close(self):
+        """بستن فایل دفتر"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,222 @@
+import re
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterable, List, Set
+
+from models.contact import Contact
+from utils.normalizers import normalize_text, phone_key
+
+GRAM_SIZE = 3
+_WORD_SEPARATORS = r'\s@._\-+'
+_WORD_SPLIT = re.compile(f'[{_WORD_SEPARATORS}]+')
+_PHONE_QUERY = re.compile(r'[\d\s\-+()]+')
+
+
+class ContactSearchIndex:
+    """
+    ایندکس جستجوی مخاطبین با سه‌حرفی‌ها (trigram) و پیشوند کلمات
+
+    عبارت‌های سه حرف به بالا به صورت زیررشته در نام و نام خانوادگی (و نام
+    کامل) و ایمیل جستجو می‌شوند؛ عبارت‌های یک و دو حرفی با ابتدای کلمات
+    مقایسه می‌شوند. عبارت‌هایی که فقط رقم (و فاصله، خط تیره یا +) دارند
+    در ارقام شماره تلفن هم جستجو می‌شوند.
+
+    هر کلید به لیستی از شناسه‌های عددی مخاطبین اشاره می‌کند. با افزودن و
+    ویرایش فقط کلیدهای جدید اضافه می‌شوند و حذف‌ها تنبل است: نتایج همیشه
+    با متن فعلی مخاطب بررسی می‌شوند و وقتی ورودی‌های کهنه زیاد شدند،
+    لیست‌ها یک‌جا فشرده می‌شوند. مخاطبین جدید در صف می‌مانند تا
+    index_pending آن‌ها را دسته‌دسته (در زمان بیکاری برنامه) ایندکس کند؛
+    جستجو فقط باقی‌مانده صف را یک‌جا ایندکس می‌کند، پس بارگذاری دفترچه
+    هزینه ساخت ایندکس را نمی‌پردازد.
+    """
+
+    def __init__(self):
+        """سازنده کلاس ایندکس جستجو"""
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._ids: Dict[Contact, int] = {}
+        self._contacts: Dict[int, Contact] = {}
+        # متن نرمال‌شده و ارقام تلفن هر مخاطب، برای بررسی نهایی نتایج
+        self._documents: Dict[int, tuple] = {}
+        # مخاطبینی که هنوز ایندکس نشده‌اند، به ترتیب افزودن
+        self._pending: Dict[Contact, None] = {}
+        self._next_id = 0
+        self._live_keys = 0
+        self._stale_keys = 0
+
+    def __len__(self) -> int:
+        return len(self._documents) + len(self._pending)
+
+    @staticmethod
+    def _document(contact: Contact) -> tuple:
+        """متن قابل جستجو و ارقام تلفن یک مخاطب"""
+        name = f'{normalize_text(contact.first_name)} {normalize_text(contact.last_name)}'
+        return f'{name}\n{normalize_text(contact.email)}', phone_key(contact.phone)
+
+    @staticmethod
+    def _keys(document: tuple) -> Set[str]:
+        """کلیدهای ایندکس یک سند: سه‌حرفی‌ها و پیشوندهای '^' کلمات"""
+        text, digits = document
+        keys = {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+        keys.update([digits[i:i + GRAM_SIZE] for i in range(len(digits) - GRAM_SIZE + 1)])
+        for word in _WORD_SPLIT.split(text) + [digits]:
+            if word:
+                keys.add('^' + word[:1])
+                keys.add('^' + word[:2])
+        return keys
+
+    def add(self, contact: Contact):
+        """
+        افزودن مخاطب به ایندکس، یا به‌روزرسانی آن پس از ویرایش
+
+        جایگاه مخاطب در ترتیب نتایج پس از ویرایش حفظ می‌شود.
+
+        Args:
+            contact: مخاطب
+        """
+        contact_id = self._ids.get(contact)
+        if contact_id is None:
+            self._pending[contact] = None
+            return
+        document = self._document(contact)
+        old = self._documents[contact_id]
+        if old == document:
+            return
+        self._documents[contact_id] = document
+
+        old_keys = self._keys(old)
+        new_keys = self._keys(document)
+        postings = self._postings
+        for key in new_keys - old_keys:
+            postings[key].append(contact_id)
+        self._live_keys += len(new_keys) - len(old_keys)
+        self._stale_keys += len(old_keys - new_keys)
+        self._maybe_compact()
+
+    def _insert(self, contact: Contact, document: tuple):
+        """ثبت مخاطب جدید با شناسه بعدی"""
+        contact_id = self._next_id
+        self._next_id += 1
+        self._ids[contact] = contact_id
+        self._contacts[contact_id] = contact
+        self._documents[contact_id] = document
+        keys = self._keys(document)
+        postings = self._postings
+        for key in keys:
+            postings[key].append(contact_id)
+        self._live_keys += len(keys)
+
+    def add_many(self, contacts: Iterable[Contact]):
+        """
+        افزودن گروهی مخاطبین به ایندکس
+
+        Args:
+            contacts: مخاطبین
+        """
+        for contact in contacts:
+            self.add(contact)
+
+    def flush(self):
+        """ایندکس کردن مخاطبین در صف (پیش از هر جستجو خودکار انجام می‌شود)"""
+        pending, self._pending = self._pending, {}
+        for contact in pending:
+            self._insert(contact, self._document(contact))
+
+    def index_pending(self, batch_size: int) -> bool:
+        """
+        ایندکس کردن حداکثر batch_size مخاطب از ابتدای صف
+
+        Args:
+            batch_size: تعداد مخاطبین این دسته
+
+        Returns:
+            True اگر هنوز مخاطبی در صف مانده باشد
+        """
+        pending = self._pending
+        for contact in list(islice(pending, batch_size)):
+            del pending[contact]
+            self._insert(contact, self._document(contact))
+        return bool(pending)
+
+    def remove(self, contact: Contact):
+        """
+        حذف مخاطب از ایندکس
+
+        Args:
+            contact: مخاطب
+        """
+        if self._pending.pop(contact, False) is None:
+            return
+        contact_id = self._ids.pop(contact, None)
+        if contact_id is None:
+            return
+        del self._contacts[contact_id]
+        keys = len(self._keys(self._documents.pop(contact_id)))
+        self._live_keys -= keys
+        self._stale_keys += keys
+        self._maybe_compact()
+
+    def clear(self):
+        """خالی کردن ایندکس"""
+        self._postings.clear()
+        self._ids.clear()
+        self._contacts.clear()
+        self._documents.clear()
+        self._pending.clear()
+        self._next_id = 0
+        self._live_keys = 0
+        self._stale_keys = 0
+
+    def _maybe_compact(self):
+        """ساخت دوباره لیست‌ها وقتی ورودی‌های کهنه از ورودی‌های زنده بیشتر شدند"""
+        if self._stale_keys <= max(self._live_keys, 1000):
+            return
+        self._postings.clear()
+        postings = self._postings
+        for contact_id in sorted(self._documents):
+            for key in self._keys(self._documents[contact_id]):
+                postings[key].append(contact_id)
+        self._stale_keys = 0
+
+    def search(self, term: str, limit: int = None) -> List[Contact]:
+        """
+        جستجوی مخاطبین
+
+        Args:
+            term: عبارت جستجو
+            limit: حداکثر تعداد نتایج (اختیاری)
+
+        Returns:
+            لیست مخاطبین یافت شده به ترتیب افزودن
+        """
+        query = normalize_text(term)
+        if not query:
+            return []
+        if self._pending:
+            self.flush()
+
+        phone_query = _PHONE_QUERY.fullmatch(query) is not None and bool(phone_key(query))
+        needle = phone_key(query) if phone_query else query
+
+        if len(needle) < GRAM_SIZE:
+            # عبارت کوتاه: فقط ابتدای کلمات
+            candidates = self._postings.get('^' + needle, ())
+            word_start = re.compile(f'(?:^|[{_WORD_SEPARATORS}]){re.escape(needle)}')
+
+            def matches(document):
+                return (word_start.search(document[0]) is not None
+                        or document[1].startswith(needle))
+        else:
+            grams = {needle[i:i + GRAM_SIZE] for i in range(len(needle) - GRAM_SIZE + 1)}
+            candidates = min((self._postings.get(gram, ()) for gram in grams), key=len)
+
+            # ارقام در تلفن و همچنین در متن (مثلاً ایمیل) جستجو می‌شوند
+            def matches(document):
+                return needle in document[0] or (phone_query and needle in document[1])
+
+        documents = self._documents
+        found = {contact_id for contact_id in candidates
+                 if contact_id in documents and matches(documents[contact_id])}
+        ordered = sorted(found)
+        if limit is not None:
+            ordered = ordered[:limit]
+        return [self._contacts[contact_id] for contact_id in ordered]
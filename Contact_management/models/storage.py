@@ -0,0 +1,398 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+from models.contact import Contact, parse_timestamp
+from models.journal import touched_ids
+
+
+class ContactStore(ABC):
+    """
+    واسط ذخیره‌سازی مخاطبین
+
+    ContactManager لیست مخاطبین را در حافظه نگه می‌دارد، هر تغییر را در
+    دفتر عملیات ثبت می‌کند و عملیات‌های دفتر را در هر checkpoint با apply
+    ذخیره می‌کند. همه متدهای ذخیره‌سازی در صورت خطا پیام را چاپ کرده و
+    False برمی‌گردانند.
+    """
+
+    @abstractmethod
+    def load(self) -> List[Contact]:
+        """
+        بارگذاری همه مخاطبین
+
+        Returns:
+            لیست مخاطبین
+        """
+
+    @abstractmethod
+    def save_all(self, contacts: List[Contact]) -> bool:
+        """
+        جایگزینی کل داده‌های ذخیره‌شده با لیست داده‌شده
+
+        Args:
+            contacts: همه مخاطبین
+
+        Returns:
+            نتیجه عملیات
+        """
+
+    def notes_for(self, contacts: List[Contact]) -> List[List[Dict[str, Any]]]:
+        """
+        یادداشت‌های مخاطبین (کپی، به ترتیب افزودن)
+
+        Args:
+            contacts: مخاطبین
+
+        Returns:
+            لیست یادداشت‌های هر مخاطب به همان ترتیب
+        """
+        return [list(contact.notes or ()) for contact in contacts]
+
+    @abstractmethod
+    def apply(self, operations: List[Dict[str, Any]], contacts: Dict[int, Contact]) -> bool:
+        """
+        ذخیره عملیات‌های دفتر عملیات (models.journal) در یک عملیات (checkpoint)
+
+        Args:
+            operations: عملیات‌ها به ترتیب ثبت (با شماره seq)
+            contacts: مخاطبین فعلی بر اساس شناسه
+
+        Returns:
+            نتیجه عملیات
+        """
+
+    def applied_seq(self) -> int:
+        """شماره آخرین عملیات دفتر که ذخیره شده است (0 اگر ثبت نمی‌شود)"""
+        return 0
+
+    def close(self):
+        """آزاد کردن منابع"""
+
+
+class JsonContactStore(ContactStore):
+    """
+    ذخیره‌سازی در یک فایل JSON (قالب قدیمی برنامه)
+
+    هر checkpoint کل فایل را دوباره می‌نویسد؛ برای دفترچه‌های کوچک یا
+    سازگاری با نسخه‌های قبلی مناسب است.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: مسیر فایل JSON
+        """
+        self.file_path = file_path
+        self._contacts: List[Contact] = []
+
+    def load(self) -> List[Contact]:
+        if os.path.exists(self.file_path):
+            with open(self.file_path, 'r') as file:
+                data = file.read()
+                if data:
+                    self._contacts = [Contact.from_dict(contact_data)
+                                      for contact_data in json.loads(data)]
+        else:
+            with open(self.file_path, 'w') as file:
+                file.write(json.dumps([]))
+        return self._contacts
+
+    def save_all(self, contacts: List[Contact]) -> bool:
+        try:
+            self._contacts = contacts
+            contacts_data = [contact.to_dict() for contact in contacts]
+            with open(self.file_path, 'w') as file:
+                file.write(json.dumps(contacts_data, indent=4))
+            return True
+        except Exception as e:
+            print(f"Error saving contacts: {str(e)}")
+            return False
+
+    # لیست بارگذاری‌شده همان لیست ContactManager است و از قبل تغییر کرده
+    def apply(self, operations: List[Dict[str, Any]], contacts: Dict[int, Contact]) -> bool:
+        return self.save_all(self._contacts)
+
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS contacts(
+        id INTEGER PRIMARY KEY,
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        email TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS notes(
+        id INTEGER PRIMARY KEY,
+        contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE,
+        text TEXT NOT NULL,
+        timestamp INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS meta(
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_contacts_name ON contacts(first_name COLLATE NOCASE, last_name COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_contacts_phone ON contacts(phone)',
+    'CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email COLLATE NOCASE)',
+    'CREATE INDEX IF NOT EXISTS idx_notes_contact ON notes(contact_id, id)',
+]
+
+# هر مخاطب با تعداد یادداشت‌ها و متن آخرین یادداشت (لیست یادداشت‌ها جداگانه خوانده می‌شود)
+SQL_SELECT_CONTACTS = '''
+    SELECT c.id, c.first_name, c.last_name, c.phone, c.email,
+           (SELECT COUNT(*) FROM notes WHERE contact_id = c.id),
+           (SELECT text FROM notes WHERE contact_id = c.id ORDER BY id DESC LIMIT 1)
+    FROM contacts AS c ORDER BY c.id
+'''
+SQL_SELECT_NOTES = '''
+    SELECT contact_id, text, timestamp FROM notes WHERE contact_id IN ({}) ORDER BY contact_id, id
+'''
+MAX_QUERY_PARAMS = 500
+SQL_MAX_CONTACT_ID = 'SELECT COALESCE(MAX(id), 0) FROM contacts'
+SQL_INSERT_CONTACT = '''
+    INSERT INTO contacts (id, first_name, last_name, phone, email) VALUES (?, ?, ?, ?, ?)
+'''
+SQL_DELETE_CONTACT = 'DELETE FROM contacts WHERE id = ?'
+SQL_DELETE_CONTACT_NOTES = 'DELETE FROM notes WHERE contact_id = ?'
+SQL_COUNT_NOTES = 'SELECT COUNT(*) FROM notes WHERE contact_id = ?'
+SQL_SELECT_CONTACT_NOTES = 'SELECT text, timestamp FROM notes WHERE contact_id = ? ORDER BY id'
+CONTACT_FIELDS = ('first_name', 'last_name', 'phone', 'email')
+SQL_INSERT_NOTE = 'INSERT INTO notes (contact_id, text, timestamp) VALUES (?, ?, ?)'
+SQL_DELETE_NOTE = '''
+    DELETE FROM notes WHERE id = (
+        SELECT id FROM notes WHERE contact_id = ? ORDER BY id LIMIT 1 OFFSET ?
+    )
+'''
+SQL_GET_META = 'SELECT value FROM meta WHERE key = ?'
+SQL_SET_META = 'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)'
+
+
+class SQLiteContactStore(ContactStore):
+    """
+    ذخیره‌سازی در پایگاه داده SQLite
+
+    مخاطبین و یادداشت‌ها در دو جدول جدا نگهداری می‌شوند. تغییرات در هر
+    checkpoint دفتر عملیات با apply در یک تراکنش نوشته می‌شوند و شماره
+    آخرین عملیات ذخیره‌شده در جدول meta ثبت می‌شود. شناسه سطر هر مخاطب در
+    contact.id نگه داشته می‌شود.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: مسیر فایل پایگاه داده
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self._owner = threading.get_ident()
+        self._readers = threading.local()
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def get_meta(self, key: str):
+        row = self.connection.execute(SQL_GET_META, (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.connection:
+            self.connection.execute(SQL_SET_META, (key, value))
+
+    def is_empty(self) -> bool:
+        return self.connection.execute('SELECT 1 FROM contacts LIMIT 1').fetchone() is None
+
+    def load(self) -> List[Contact]:
+        contacts = []
+        for contact_id, first_name, last_name, phone, email, note_count, last_note in \
+                self.connection.execute(SQL_SELECT_CONTACTS):
+            contact = Contact(first_name, last_name, phone, email)
+            contact.id = contact_id
+            contact.set_note_summary(note_count, last_note)
+            contacts.append(contact)
+        return contacts
+
+    def _reader(self) -> sqlite3.Connection:
+        """اتصال خواندن رشته فعلی (رشته‌های پس‌زمینه مثل صادرات اتصال جدا دارند)"""
+        if threading.get_ident() == self._owner:
+            return self.connection
+        connection = getattr(self._readers, 'connection', None)
+        if connection is None:
+            connection = self._readers.connection = sqlite3.connect(self.db_path)
+        return connection
+
+    def notes_for(self, contacts: List[Contact]) -> List[List[Dict[str, Any]]]:
+        # contact.notes یک بار خوانده می‌شود؛ checkpoint در رشته اصلی ممکن است آن را آزاد کند
+        loaded = [contact.notes for contact in contacts]
+        notes = {contact.id: [] for contact, cached in zip(contacts, loaded) if cached is None}
+        ids = list(notes)
+        connection = self._reader()
+        for start in range(0, len(ids), MAX_QUERY_PARAMS):
+            chunk = ids[start:start + MAX_QUERY_PARAMS]
+            statement = SQL_SELECT_NOTES.format(', '.join('?' * len(chunk)))
+            for contact_id, text, timestamp in connection.execute(statement, chunk):
+                notes[contact_id].append({'text': text, 'timestamp': parse_timestamp(timestamp)})
+        return [list(cached) if cached is not None else notes[contact.id]
+                for contact, cached in zip(contacts, loaded)]
+
+    def _insert(self, contacts: List[Contact]):
+        """درج گروهی مخاطبین (مخاطبین بدون شناسه، شناسه‌های پس از بزرگ‌ترین شناسه فعلی را می‌گیرند)"""
+        cursor = self.connection.cursor()
+        next_id = max([cursor.execute(SQL_MAX_CONTACT_ID).fetchone()[0]] +
+                      [contact.id for contact in contacts if contact.id is not None]) + 1
+        for contact in contacts:
+            if contact.id is None:
+                contact.id = next_id
+                next_id += 1
+        cursor.executemany(SQL_INSERT_CONTACT, (
+            (contact.id, contact.first_name, contact.last_name, contact.phone, contact.email)
+            for contact in contacts
+        ))
+        cursor.executemany(SQL_INSERT_NOTE, (
+            (contact.id, note.get('text', ''), note.get('timestamp'))
+            for contact in contacts for note in contact.notes
+        ))
+
+    def _write(self, action: str, statement, *args) -> bool:
+        """اجرای یک تغییر در تراکنش؛ در صورت خطا برگشت تراکنش و False"""
+        try:
+            with self.connection:
+                statement(*args)
+            return True
+        except Exception as e:
+            print(f"Error {action}: {str(e)}")
+            return False
+
+    @staticmethod
+    def _release_notes(contacts: List[Contact]):
+        """یادداشت‌های ذخیره‌شده فقط در پایگاه داده می‌مانند"""
+        for contact in contacts:
+            if contact.notes is not None:
+                contact.set_note_summary(contact.note_count, contact.last_note)
+
+    def save_all(self, contacts: List[Contact]) -> bool:
+        # یادداشت‌های بارگذاری‌نشده پیش از پاک کردن جدول خوانده می‌شوند
+        for contact, notes in zip(contacts, self.notes_for(contacts)):
+            contact.set_notes(notes)
+
+        def replace():
+            self.connection.execute('DELETE FROM notes')
+            self.connection.execute('DELETE FROM contacts')
+            self._insert(contacts)
+        if not self._write('saving contacts', replace):
+            return False
+        self._release_notes(contacts)
+        return True
+
+    def add_contacts(self, contacts: List[Contact]) -> bool:
+        """درج گروهی مخاطبین در یک تراکنش (برای انتقال از فایل JSON)"""
+        if not self._write('saving contacts', self._insert, contacts):
+            return False
+        self._release_notes(contacts)
+        return True
+
+    def applied_seq(self) -> int:
+        return int(self.get_meta('journal_seq') or 0)
+
+    def _apply_operation(self, cursor: sqlite3.Cursor, operation: Dict[str, Any]):
+        """اجرای SQL یک عملیات دفتر"""
+        kind = operation['op']
+        if kind == 'add':
+            records = operation['contacts']
+            cursor.executemany(SQL_INSERT_CONTACT, (
+                (record['id'], record['first_name'], record['last_name'], record['phone'],
+                 record.get('email')) for record in records
+            ))
+            cursor.executemany(SQL_INSERT_NOTE, (
+                (record['id'], note.get('text', ''), note.get('timestamp'))
+                for record in records for note in record.get('notes', ())
+            ))
+        elif kind == 'delete':
+            # یادداشت‌ها با ON DELETE CASCADE پاک می‌شوند
+            cursor.executemany(SQL_DELETE_CONTACT, ((record['id'],) for record in operation['contacts']))
+        elif kind == 'update':
+            changes = operation['after']
+            fields = [field for field in CONTACT_FIELDS if field in changes]
+            if fields:
+                cursor.execute(
+                    f"UPDATE contacts SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?",
+                    [changes[field] for field in fields] + [operation['id']]
+                )
+            if 'notes' in changes:
+                self._replace_notes(cursor, operation['id'], changes['notes'])
+        elif kind == 'add_note':
+            count = cursor.execute(SQL_COUNT_NOTES, (operation['id'],)).fetchone()[0]
+            note = operation['note']
+            if operation['index'] >= count:
+                cursor.execute(SQL_INSERT_NOTE, (operation['id'], note.get('text', ''), note.get('timestamp')))
+            else:
+                # درج در میانه: یادداشت‌ها به ترتیب شناسه سطر خوانده می‌شوند
+                notes = [{'text': text, 'timestamp': timestamp} for text, timestamp in
+                         cursor.execute(SQL_SELECT_CONTACT_NOTES, (operation['id'],))]
+                notes.insert(operation['index'], note)
+                self._replace_notes(cursor, operation['id'], notes)
+        elif kind == 'delete_note':
+            cursor.execute(SQL_DELETE_NOTE, (operation['id'], operation['index']))
+        elif kind == 'batch':
+            for child in operation['operations']:
+                self._apply_operation(cursor, child)
+
+    @staticmethod
+    def _replace_notes(cursor: sqlite3.Cursor, contact_id: int, notes: List[Dict[str, Any]]):
+        cursor.execute(SQL_DELETE_CONTACT_NOTES, (contact_id,))
+        cursor.executemany(SQL_INSERT_NOTE, (
+            (contact_id, note.get('text', ''), note.get('timestamp')) for note in notes
+        ))
+
+    def apply(self, operations: List[Dict[str, Any]], contacts: Dict[int, Contact]) -> bool:
+        if not operations:
+            return True
+
+        def apply_all():
+            cursor = self.connection.cursor()
+            for operation in operations:
+                self._apply_operation(cursor, operation)
+            cursor.execute(SQL_SET_META, ('journal_seq', str(operations[-1]['seq'])))
+        if not self._write('saving changes', apply_all):
+            return False
+        self._release_notes([contacts[contact_id] for operation in operations
+                             for contact_id in touched_ids(operation) if contact_id in contacts])
+        return True
+
+    def close(self):
+        self.connection.close()
+
+
+def migrate_json_to_sqlite(json_path: str, store: SQLiteContactStore) -> int:
+    """
+    انتقال مخاطبین فایل JSON قدیمی به پایگاه داده SQLite
+
+    فقط یک بار و فقط در یک پایگاه داده خالی انجام می‌شود؛ فایل JSON دست
+    نخورده باقی می‌ماند.
+
+    Args:
+        json_path: مسیر فایل JSON
+        store: پایگاه داده مقصد
+
+    Returns:
+        تعداد مخاطبین منتقل‌شده
+    """
+    if store.get_meta('migrated_from') or not store.is_empty() or not os.path.exists(json_path):
+        return 0
+    contacts = JsonContactStore(json_path).load()
+    if not store.add_contacts(contacts):
+        return 0
+    store.set_meta('migrated_from', os.path.abspath(json_path))
+    return len(contacts)
@@ -1,8 +1,180 @@
 """
 ابزار بارگذاری تم‌های مختلف برای برنامه مدیریت مخاطبین
+
+مسیر فایل‌های تم نسبت به همین پوشه محاسبه می‌شود (نه پوشه جاری اجرای
+برنامه) و هر تم فقط یک بار از دیسک خوانده و در حافظه نگه داشته می‌شود.
+با build_theme_bundle همه تم‌ها فشرده و در یک فایل (THEME_BUNDLE) ذخیره
+می‌شوند تا با اولین درخواست همه یک‌جا بارگذاری شوند:
+
+    python -m resources.themes.theme_loader
 """
 
-from PyQt6.QtCore import QFile, QTextStream
+import json
+import os
+import re
+import time
+
+THEMES_DIR = os.path.dirname(os.path.abspath(__file__))
+PREMIUM_PREFIX = "premium_"
+THEME_BUNDLE = os.path.join(THEMES_DIR, "themes.bundle.json")
+# پوشه برنامه؛ آدرس‌های نسبی url(...) تم‌ها نسبت به آن هستند
+APP_DIR = os.path.dirname(os.path.dirname(THEMES_DIR))
+
+_COMMENTS = re.compile(r'/\*.*?\*/', re.DOTALL)
+_WHITESPACE = re.compile(r'\s+')
+_RELATIVE_URL = re.compile(r'url\(\s*(["\']?)(?![a-zA-Z]+:|/|:)')
+# با CONTACTS_TIMING=1 زمان اعمال تم و راه‌اندازی برنامه چاپ می‌شود
+SHOW_TIMINGS = os.environ.get("CONTACTS_TIMING") == "1"
+
+# شیوه‌نامه‌های خوانده‌شده: نام تم -> متن
+_stylesheets = {}
+_bundle_checked = False
+_current_theme = None
+
+
+def theme_path(theme_name):
+    """
+    مسیر فایل .qss یک تم
+    
+    Args:
+        theme_name: نام تم (بدون پسوند .qss)
+    
+    Returns:
+        str: مسیر مطلق فایل تم
+    """
+    if theme_name.startswith(PREMIUM_PREFIX):
+        return os.path.join(THEMES_DIR, "premium", f"{theme_name[len(PREMIUM_PREFIX):]}.qss")
+    return os.path.join(THEMES_DIR, f"{theme_name}.qss")
+
+
+def resolve_urls(stylesheet):
+    """
+    تبدیل آدرس‌های نسبی url(...) شیوه‌نامه به مسیر مطلق در پوشه برنامه
+    
+    Args:
+        stylesheet: متن شیوه‌نامه
+    
+    Returns:
+        str: شیوه‌نامه با آدرس‌های مطلق
+    """
+    prefix = APP_DIR.replace(os.sep, '/') + '/'
+    return _RELATIVE_URL.sub(lambda match: f"url({match.group(1)}{prefix}", stylesheet)
+
+
+def compact_stylesheet(stylesheet):
+    """
+    حذف توضیحات و فاصله‌های اضافی شیوه‌نامه (برای بسته تم‌ها)
+    
+    Args:
+        stylesheet: متن شیوه‌نامه
+    
+    Returns:
+        str: شیوه‌نامه فشرده
+    """
+    return _WHITESPACE.sub(' ', _COMMENTS.sub('', stylesheet)).strip()
+
+
+def _source_mtimes():
+    """زمان تغییر فایل‌های تم موجود"""
+    mtimes = {}
+    for theme_name in get_available_themes():
+        try:
+            mtimes[theme_name] = os.path.getmtime(theme_path(theme_name))
+        except OSError:
+            continue
+    return mtimes
+
+
+def build_theme_bundle(bundle_path=THEME_BUNDLE):
+    """
+    ساخت بسته تم‌ها: همه شیوه‌نامه‌ها فشرده در یک فایل JSON
+    
+    آدرس‌های url(...) هنگام بارگذاری بسته مطلق می‌شوند تا بسته به محل
+    نصب برنامه وابسته نباشد.
+    
+    Args:
+        bundle_path: مسیر فایل بسته
+    
+    Returns:
+        int: تعداد تم‌های بسته
+    """
+    mtimes = _source_mtimes()
+    stylesheets = {}
+    for theme_name in mtimes:
+        with open(theme_path(theme_name), 'r', encoding='utf-8') as file:
+            stylesheets[theme_name] = compact_stylesheet(file.read())
+    with open(bundle_path, 'w', encoding='utf-8') as file:
+        json.dump({'mtimes': mtimes, 'themes': stylesheets}, file, ensure_ascii=False)
+    return len(stylesheets)
+
+
+def load_theme_bundle(bundle_path=THEME_BUNDLE):
+    """
+    افزودن تم‌های بسته به حافظه (اگر بسته با فایل‌های تم هم‌خوان باشد)
+    
+    Args:
+        bundle_path: مسیر فایل بسته
+    
+    Returns:
+        bool: True اگر بسته خوانده شد
+    """
+    if not os.path.exists(bundle_path):
+        return False
+    try:
+        with open(bundle_path, 'r', encoding='utf-8') as file:
+            bundle = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"خطا: بسته تم‌ها خوانده نشد: {e}")
+        return False
+    # بسته‌ای که پس از ساختش فایل‌های تم تغییر کرده‌اند کنار گذاشته می‌شود
+    if bundle.get('mtimes') != _source_mtimes():
+        print("بسته تم‌ها قدیمی است؛ تم‌ها از فایل‌ها خوانده می‌شوند.")
+        return False
+    for theme_name, stylesheet in bundle.get('themes', {}).items():
+        _stylesheets.setdefault(theme_name, resolve_urls(stylesheet))
+    return True
+
+
+def get_stylesheet(theme_name):
+    """
+    متن شیوه‌نامه یک تم (از حافظه، بسته تم‌ها یا فایل تم)
+    
+    Args:
+        theme_name: نام تم (بدون پسوند .qss)
+    
+    Returns:
+        str: متن شیوه‌نامه، یا None اگر تم یافت نشد
+    """
+    global _bundle_checked
+    stylesheet = _stylesheets.get(theme_name)
+    if stylesheet is not None:
+        return stylesheet
+    if not _bundle_checked:
+        _bundle_checked = True
+        load_theme_bundle()
+        stylesheet = _stylesheets.get(theme_name)
+        if stylesheet is not None:
+            return stylesheet
+    
+    path = theme_path(theme_name)
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            stylesheet = resolve_urls(file.read())
+    except FileNotFoundError:
+        print(f"خطا: فایل تم '{path}' یافت نشد.")
+        return None
+    except OSError:
+        print(f"خطا: نمی‌توان فایل تم '{path}' را باز کرد.")
+        return None
+    _stylesheets[theme_name] = stylesheet
+    return stylesheet
+
+
+def clear_theme_cache():
+    """پاک کردن شیوه‌نامه‌های نگه‌داشته‌شده (مثلاً پس از ویرایش فایل‌های تم)"""
+    global _bundle_checked
+    _stylesheets.clear()
+    _bundle_checked = False
 
 
 def load_theme(app, theme_name):
@@ -16,29 +188,48 @@ def load_theme(app, theme_name):
     Returns:
         bool: True اگر بارگذاری موفق بود، False در غیر این صورت
     """
-    # بررسی آیا تم از دسته premium است
-    if theme_name.startswith("premium_"):
-        theme_path = f"resources/themes/premium/{theme_name[8:]}.qss"
-    else:
-        theme_path = f"resources/themes/{theme_name}.qss"
-    
-    # بررسی وجود فایل
-    style_file = QFile(theme_path)
-    if not style_file.exists():
-        print(f"خطا: فایل تم '{theme_path}' یافت نشد.")
+    global _current_theme
+    started = time.perf_counter()
+    stylesheet = get_stylesheet(theme_name)
+    if stylesheet is None:
         return False
+    app.setStyleSheet(stylesheet)
+    _current_theme = theme_name
+    if SHOW_TIMINGS:
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"تم '{theme_name}' در {elapsed:.0f} میلی‌ثانیه اعمال شد.")
+    return True
+
+
+def preview_theme(widget, theme_name):
+    """
+    نمایش یک تم فقط روی یک ویجت و فرزندانش (بدون تغییر تم برنامه)
+    
+    Args:
+        widget: ویجت پیش‌نمایش
+        theme_name: نام تم (None برای برگرداندن به تم برنامه)
     
-    # باز کردن فایل و خواندن محتوا
-    if style_file.open(QFile.OpenModeFlag.ReadOnly | QFile.OpenModeFlag.Text):
-        stream = QTextStream(style_file)
-        stylesheet = stream.readAll()
-        app.setStyleSheet(stylesheet)
-        style_file.close()
-        print(f"تم '{theme_name}' با موفقیت اعمال شد.")
+    Returns:
+        bool: True اگر تم اعمال شد
+    """
+    if theme_name is None:
+        widget.setStyleSheet("")
         return True
-    else:
-        print(f"خطا: نمی‌توان فایل تم '{theme_path}' را باز کرد.")
+    stylesheet = get_stylesheet(theme_name)
+    if stylesheet is None:
         return False
+    widget.setStyleSheet(stylesheet)
+    return True
+
+
+def get_current_theme():
+    """
+    نام آخرین تمی که با load_theme اعمال شد
+    
+    Returns:
+        str: نام تم، یا None اگر هنوز تمی اعمال نشده است
+    """
+    return _current_theme
 
 
 def get_available_themes():
@@ -92,4 +283,9 @@ def get_available_themes():
         "premium_18_coffee_cream",
         "premium_19_emerald_city",
         "premium_20_cosmic_void"
-    ] 
\ No newline at end of file
+    ]
+
+
+if __name__ == "__main__":
+    count = build_theme_bundle()
+    print(f"{count} تم در '{THEME_BUNDLE}' ذخیره شد.")
@@ -1,7 +1,8 @@
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QApplication, QFrame)
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QApplication, QFrame,
+                             QMainWindow, QWidget, QLineEdit, QTableWidget, QTableWidgetItem)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap, QIcon
-from resources.themes.theme_loader import load_theme, get_available_themes
+from resources.themes.theme_loader import load_theme, get_available_themes, preview_theme
 
 class ThemeSelectorDialog(QDialog):
     def __init__(self, parent=None):
@@ -32,6 +33,11 @@ class ThemeSelectorDialog(QDialog):
         theme_layout.addWidget(self.theme_combo)
         layout.addLayout(theme_layout)
         
+        # پیش‌نمایش: تم انتخاب‌شده فقط روی این ویجت اعمال می‌شود، نه کل برنامه
+        self.preview = self.create_preview()
+        layout.addWidget(self.preview)
+        self.theme_combo.currentIndexChanged.connect(self.update_preview)
+        
         button_layout = QHBoxLayout()
         self.apply_button = QPushButton("اعمال")
         self.apply_button.clicked.connect(self.apply_theme)
@@ -43,6 +49,30 @@ class ThemeSelectorDialog(QDialog):
         button_layout.addWidget(cancel_button)
         layout.addLayout(button_layout)
     
+    def create_preview(self):
+        # QMainWindow جاسازی‌شده تا قواعد QMainWindow تم‌ها هم دیده شوند
+        preview = QMainWindow(self)
+        preview.setWindowFlags(Qt.WindowType.Widget)
+        preview.setMinimumSize(420, 220)
+        central = QWidget()
+        preview_layout = QVBoxLayout(central)
+        preview_layout.addWidget(QLabel("پیش‌نمایش تم"))
+        line_edit = QLineEdit()
+        line_edit.setPlaceholderText("جستجو...")
+        preview_layout.addWidget(line_edit)
+        table = QTableWidget(2, 3)
+        table.setHorizontalHeaderLabels(["first_name", "last_name", "phone"])
+        for row, values in enumerate([("علی", "رضایی", "09121234567"), ("Sara", "Karimi", "09351234567")]):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+        preview_layout.addWidget(table)
+        preview_layout.addWidget(QPushButton("دکمه نمونه"))
+        preview.setCentralWidget(central)
+        return preview
+    
+    def update_preview(self):
+        preview_theme(self.preview, self.theme_combo.currentData())
+    
     def set_current_theme(self, theme_name):
         self.current_theme = theme_name
         for i in range(self.theme_combo.count()):
@@ -0,0 +1,197 @@
+from typing import Callable, List, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+from models.contact import Contact
+from models.contact_manager import ContactListener
+from utils.normalizers import normalize_text
+
+# عنوان و مقدار نمایشی هر ستون جدول
+COLUMNS = (
+    ('first_name', lambda contact: contact.first_name),
+    ('last_name', lambda contact: contact.last_name),
+    ('phone', lambda contact: contact.phone),
+    ('email', lambda contact: contact.email or ''),
+    ('massage', lambda contact: contact.last_note or ''),
+)
+
+
+class ContactTableModel(QAbstractTableModel, ContactListener):
+    """
+    مدل جدول مخاطبین
+
+    فقط ارجاع به مخاطبین را نگه می‌دارد و جدول فقط سلول‌های قابل مشاهده را
+    می‌خواند. تغییرات ContactManager به صورت اعلان سطری (افزودن، حذف و
+    تغییر یک سطر) به نما می‌رسد، نه با ساختن دوباره کل جدول.
+
+    مرتب‌سازی در خود مدل با sort پایتون انجام می‌شود و مخاطبین جدید یا
+    ویرایش‌شده در جای درست ترتیب فعلی قرار می‌گیرند.
+    """
+
+    def __init__(self, contacts: List[Contact], parent=None):
+        """
+        Args:
+            contacts: مخاطبین اولیه
+            parent: والد مدل
+        """
+        super().__init__(parent)
+        self._contacts: List[Contact] = list(contacts)
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._contacts)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return COLUMNS[index.column()][1](self._contacts[index.row()])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def contact_at(self, row: int) -> Contact:
+        """مخاطب سطر row"""
+        return self._contacts[row]
+
+    def row_of(self, contact: Contact) -> int:
+        """شماره سطر مخاطب (برای مخاطب نمایش‌داده‌نشده -1)"""
+        for row, candidate in enumerate(self._contacts):
+            if candidate is contact:
+                return row
+        return -1
+
+    # مرتب‌سازی
+    def _sort_key(self) -> Callable[[Contact], str]:
+        value = COLUMNS[self._sort_column][1]
+        return lambda contact: normalize_text(value(contact))
+
+    def _descending(self) -> bool:
+        return self._sort_order == Qt.SortOrder.DescendingOrder
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        """مرتب‌سازی سطرها بر اساس ستون column (برای -1، ترتیب افزودن)"""
+        self._sort_column = column
+        self._sort_order = order
+        if column < 0 or column >= len(COLUMNS):
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_rows = {id(contact): row for row, contact in enumerate(self._contacts)}
+        self._contacts.sort(key=self._sort_key(), reverse=self._descending())
+        new_rows = [0] * len(self._contacts)
+        for row, contact in enumerate(self._contacts):
+            new_rows[old_rows[id(contact)]] = row
+        old_indexes = self.persistentIndexList()
+        self.changePersistentIndexList(old_indexes, [
+            self.index(new_rows[index.row()], index.column()) for index in old_indexes
+        ])
+        self.layoutChanged.emit()
+
+    def _sorted_position(self, contact: Contact, rows: range) -> int:
+        """جای مخاطب در ترتیب فعلی (جستجوی دودویی در بازه rows)"""
+        key = self._sort_key()
+        target = key(contact)
+        descending = self._descending()
+        low, high = rows.start, rows.stop
+        while low < high:
+            middle = (low + high) // 2
+            current = key(self._contacts[middle])
+            if (current > target) if descending else (current < target):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _is_sorted(self) -> bool:
+        return 0 <= self._sort_column < len(COLUMNS)
+
+    # اعلان‌های ContactManager
+    def contacts_added(self, contacts: List[Contact]):
+        if len(contacts) == 1 and self._is_sorted():
+            row = self._sorted_position(contacts[0], range(0, len(self._contacts)))
+        else:
+            row = len(self._contacts)
+        self.beginInsertRows(QModelIndex(), row, row + len(contacts) - 1)
+        self._contacts[row:row] = contacts
+        self.endInsertRows()
+        if len(contacts) > 1 and self._is_sorted():
+            self.sort(self._sort_column, self._sort_order)
+
+    def contact_changed(self, contact: Contact):
+        row = self.row_of(contact)
+        if row < 0:
+            return
+        if self._is_sorted():
+            # جابه‌جایی سطر اگر مقدار ستون مرتب‌سازی تغییر کرده باشد
+            del self._contacts[row]
+            target = self._sorted_position(contact, range(0, len(self._contacts)))
+            self._contacts.insert(row, contact)
+            if target != row:
+                destination = target + 1 if target > row else target
+                self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+                del self._contacts[row]
+                self._contacts.insert(target, contact)
+                self.endMoveRows()
+                row = target
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+    def contact_removed(self, contact: Contact):
+        row = self.row_of(contact)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._contacts[row]
+        self.endRemoveRows()
+
+    def contacts_reset(self, contacts: List[Contact]):
+        self.beginResetModel()
+        self._contacts = list(contacts)
+        self.endResetModel()
+        if self._is_sorted():
+            self.sort(self._sort_column, self._sort_order)
+
+
+class ContactFilterProxyModel(QSortFilterProxyModel):
+    """
+    پروکسی فیلتر و مرتب‌سازی جدول مخاطبین
+
+    فیلتر با لیست نتایج جستجو (از ایندکس جستجوی ContactManager) انجام
+    می‌شود. مرتب‌سازی به مدل منبع سپرده می‌شود؛ مقایسه‌های
+    QSortFilterProxyModel برای هر جفت سطر یک فراخوانی data پایتون دارند و
+    برای 100 هزار سطر چند ثانیه طول می‌کشند.
+    """
+
+    def __init__(self, parent=None):
+        """
+        Args:
+            parent: والد مدل
+        """
+        super().__init__(parent)
+        self._matches: Optional[set] = None
+
+    def set_matches(self, contacts: Optional[List[Contact]]):
+        """
+        محدود کردن جدول به مخاطبین داده‌شده
+
+        Args:
+            contacts: مخاطبین قابل نمایش (None برای نمایش همه)
+        """
+        if contacts is None and self._matches is None:
+            return
+        self._matches = None if contacts is None else set(contacts)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent) -> bool:
+        return self._matches is None or self.sourceModel().contact_at(source_row) in self._matches
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def contact_at(self, row: int) -> Contact:
+        """مخاطب سطر row جدول"""
+        return self.sourceModel().contact_at(self.mapToSource(self.index(row, 0)).row())
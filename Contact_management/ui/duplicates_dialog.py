@@ -0,0 +1,95 @@
+from typing import List
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QDialog, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem, QVBoxLayout
+)
+
+from models.dedup import DuplicateGroup
+
+
+class DuplicatesDialog(QDialog):
+    """
+    دیالوگ بررسی مخاطبین تکراری
+
+    هر گروه با مخاطب اصلی (پررنگ) و مخاطبینی که در آن ادغام می‌شوند نمایش
+    داده می‌شود؛ کاربر گروه‌های قابل ادغام را با تیک انتخاب می‌کند.
+    """
+
+    def __init__(self, groups: List[DuplicateGroup], parent=None):
+        """
+        Args:
+            groups: گروه‌های تکراری (از ContactManager.find_duplicates)
+            parent: والد ویجت
+        """
+        super().__init__(parent)
+        self.setWindowTitle("مخاطبین تکراری")
+        self.resize(700, 500)
+        self.groups = groups
+
+        layout = QVBoxLayout()
+        duplicates = sum(len(group.duplicates) for group in groups)
+        layout.addWidget(QLabel(
+            f"{len(groups)} گروه تکراری یافت شد؛ با ادغام گروه‌های انتخاب‌شده "
+            f"{duplicates} مخاطب حذف و یادداشت‌هایشان به مخاطب اصلی منتقل می‌شود."
+        ))
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["نام", "تلفن", "ایمیل", "یادداشت‌ها"])
+        bold = QFont()
+        bold.setBold(True)
+        self.items = []
+        for group in groups:
+            primary = group.primary
+            item = QTreeWidgetItem([
+                f"{primary.first_name} {primary.last_name} ({group.score:.0%})"
+            ])
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(0, Qt.CheckState.Checked)
+            for contact in group.contacts:
+                child = QTreeWidgetItem([
+                    f"{contact.first_name} {contact.last_name}",
+                    contact.phone,
+                    contact.email or '',
+                    str(contact.note_count)
+                ])
+                if contact is primary:
+                    for column in range(4):
+                        child.setFont(column, bold)
+                item.addChild(child)
+            self.items.append(item)
+        self.tree.addTopLevelItems(self.items)
+        self.tree.expandAll()
+        layout.addWidget(self.tree)
+
+        buttons = QHBoxLayout()
+        select_all = QPushButton("انتخاب همه")
+        select_all.clicked.connect(lambda: self.set_all_checked(True))
+        select_none = QPushButton("حذف انتخاب‌ها")
+        select_none.clicked.connect(lambda: self.set_all_checked(False))
+        self.merge_button = QPushButton("ادغام گروه‌های انتخاب‌شده")
+        self.merge_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("انصراف")
+        cancel_button.clicked.connect(self.reject)
+        for button in (select_all, select_none, self.merge_button, cancel_button):
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.setLayout(layout)
+
+    def set_all_checked(self, checked: bool):
+        """انتخاب یا لغو انتخاب همه گروه‌ها"""
+        state = Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
+        for item in self.items:
+            item.setCheckState(0, state)
+
+    def selected_groups(self) -> List[DuplicateGroup]:
+        """
+        گروه‌های انتخاب‌شده برای ادغام
+
+        Returns:
+            لیست گروه‌ها
+        """
+        return [group for group, item in zip(self.groups, self.items)
+                if item.checkState(0) == Qt.CheckState.Checked]
@@ -1,21 +1,32 @@
 import sys
 from PyQt6 import QtWidgets
 from PyQt6.QtWidgets import (
-    QMainWindow, QTableWidgetItem, QMessageBox, 
+    QMainWindow, QMessageBox, 
     QDialog, QVBoxLayout, QTextEdit, QPushButton,
-    QLabel, QFileDialog
+    QLabel, QFileDialog, QLineEdit, QProgressDialog
 )
-from PyQt6.QtGui import QAction
+from PyQt6.QtCore import QRect, QTimer, Qt
+from PyQt6.QtGui import QAction, QFont, QKeySequence
 
-from models.contact_manager import ContactManager
+from models.contact import format_timestamp
+from models.contact_manager import ContactListener, ContactManager
+from ui.duplicates_dialog import DuplicatesDialog
 from ui.input_dialog import InputDialog
+from ui.contact_table_model import ContactTableModel, ContactFilterProxyModel
+from ui.workers import DedupWorker, ExportWorker, ImportWorker
 from utils.validators import Validators
 from contact_manager import Ui_MainWindow
 from resources.themes.theme_selector import ThemeSelectorDialog
-from resources.themes.theme_loader import load_theme
+from resources.themes.theme_loader import get_current_theme, load_theme
 
+SEARCH_DEBOUNCE_MS = 150  # مکث تایپ پیش از اجرای جستجوی زنده
+PROGRESS_DELAY_MS = 300  # نوار پیشرفت فقط برای واردات و صادرات طولانی‌تر نمایش داده می‌شود
+CHECKPOINT_INTERVAL_MS = 5000  # فاصله ذخیره تغییرات دفتر عملیات در پایگاه داده
+INDEX_BATCH_SIZE = 2000  # مخاطبینی که در هر دور حلقه رویداد به ایندکس جستجو اضافه می‌شوند
+FILE_FILTERS = "CSV Files (*.csv);;vCard Files (*.vcf *.vcard)"
 
-class MainWindow(QMainWindow, Ui_MainWindow):
+
+class MainWindow(QMainWindow, Ui_MainWindow, ContactListener):
     """کلاس پنجره اصلی برنامه"""
     
     def __init__(self, parent=None):
@@ -47,6 +58,30 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # اتصال گزینه‌های منو
         self.actionexport_to_csv.triggered.connect(self.export_to_csv)
         self.actionimport_from_csv.triggered.connect(self.import_from_csv)
+        self.actionfind_duplicates = QAction("یافتن و ادغام مخاطبین تکراری", self)
+        self.actionfind_duplicates.setObjectName("actionfind_duplicates")
+        self.actionfind_duplicates.triggered.connect(self.find_duplicates_dialog)
+        self.menutools.addAction(self.actionfind_duplicates)
+        
+        # برگشت و انجام دوباره تغییرات مخاطبین (Ctrl+Z و Ctrl+Y)
+        self.actionundo = QAction("برگشت", self)
+        self.actionundo.setObjectName("actionundo")
+        self.actionundo.setShortcut(QKeySequence.StandardKey.Undo)
+        self.actionundo.triggered.connect(self.undo)
+        self.actionredo = QAction("انجام دوباره", self)
+        self.actionredo.setObjectName("actionredo")
+        self.actionredo.setShortcut(QKeySequence.StandardKey.Redo)
+        self.actionredo.triggered.connect(self.redo)
+        self.menutools.insertActions(self.actionfind_duplicates, [self.actionundo, self.actionredo])
+        self.menutools.insertSeparator(self.actionfind_duplicates)
+        self.contact_manager.add_listener(self)
+        self.history_changed()
+        
+        # تغییرات ثبت‌شده در دفتر عملیات هر چند ثانیه در پایگاه داده ذخیره می‌شوند
+        self.checkpoint_timer = QTimer(self)
+        self.checkpoint_timer.setInterval(CHECKPOINT_INTERVAL_MS)
+        self.checkpoint_timer.timeout.connect(self.contact_manager.checkpoint)
+        self.checkpoint_timer.start()
         
         # اضافه کردن گزینه تغییر تم به منو
         self.actionchange_theme = QAction("تغییر تم برنامه", self)
@@ -56,42 +91,103 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if hasattr(self, 'menuFile'):
             self.menuFile.addAction(self.actionchange_theme)
         
+        # جستجوی زنده: با هر مکث در تایپ، جدول به نتایج محدود می‌شود
+        self.search_edit = QLineEdit(self.centralwidget)
+        self.search_edit.setGeometry(QRect(260, 10, 771, 32))
+        self.search_edit.setPlaceholderText("جستجو در نام، نام خانوادگی، شماره تلفن یا ایمیل...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_live_search)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        
         # راه‌اندازی جدول
         self.setup_table()
         self.refresh_table()
         
+        # ساخت ایندکس جستجو پس از نمایش پنجره، دسته‌دسته تا رابط کاربری قفل نشود
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(0)
+        self.index_timer.timeout.connect(self.index_pending_contacts)
+        self.index_timer.start()
+        
         # نمایش پیام وضعیت
         self.show_status("برنامه مدیریت مخاطبین با موفقیت بارگذاری شد")
     
     def setup_table(self):
         """تنظیم جدول نمایش مخاطبین"""
-        # تنظیم عرض ستون‌ها
-        header = self.tableWidget.horizontalHeader()
+        # مدل جدول تغییرات ContactManager را سطر به سطر دریافت می‌کند؛
+        # فیلتر جستجو و مرتب‌سازی از طریق پروکسی انجام می‌شود
+        self.table_model = ContactTableModel(self.contact_manager.contacts, self)
+        self.contact_manager.add_listener(self.table_model)
+        self.table_proxy = ContactFilterProxyModel(self)
+        self.table_proxy.setSourceModel(self.table_model)
+        self.tableView.setModel(self.table_proxy)
+        
+        # تنظیم عرض ستون‌ها و فونت سرستون‌ها
+        header = self.tableView.horizontalHeader()
         header.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
+        font = QFont()
+        font.setPointSize(14)
+        font.setBold(True)
+        header.setFont(font)
+        
+        # ارتفاع ثابت سطرها (بدون اندازه‌گیری محتوای همه سطرها)
+        self.tableView.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
         
         # فعال‌سازی مرتب‌سازی
-        self.tableWidget.setSortingEnabled(True)
+        self.tableView.setSortingEnabled(True)
         
         # فعال‌سازی انتخاب سطرها
-        self.tableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
-        self.tableWidget.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self.tableView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tableView.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
     
     def refresh_table(self):
-        """به‌روزرسانی جدول با اطلاعات جدید مخاطبین"""
-        self.tableWidget.setSortingEnabled(False)  # غیرفعال‌سازی مرتب‌سازی هنگام به‌روزرسانی
-        self.tableWidget.setRowCount(len(self.contact_manager.contacts))
-        
-        for i, contact in enumerate(self.contact_manager.contacts):
-            self.tableWidget.setItem(i, 0, QTableWidgetItem(contact.first_name))
-            self.tableWidget.setItem(i, 1, QTableWidgetItem(contact.last_name))
-            self.tableWidget.setItem(i, 2, QTableWidgetItem(contact.phone))
-            self.tableWidget.setItem(i, 3, QTableWidgetItem(contact.email or ''))
-            
-            # نمایش یادداشت آخر در جدول
-            note_text = contact.notes[-1]['text'] if contact.notes else ''
-            self.tableWidget.setItem(i, 4, QTableWidgetItem(note_text))
+        """
+        اعمال دوباره جستجوی فعلی پس از تغییر مخاطبین
         
-        self.tableWidget.setSortingEnabled(True)  # فعال‌سازی مجدد مرتب‌سازی
+        سطرهای جدول خودشان با اعلان‌های ContactManager به‌روز می‌شوند؛ فقط
+        نتایج جستجو (اگر عبارتی در جعبه جستجو باشد) باید دوباره محاسبه شوند.
+        """
+        search_term = self.search_edit.text().strip()
+        if search_term:
+            self.table_proxy.set_matches(self.contact_manager.search_contacts(search_term))
+        else:
+            self.table_proxy.set_matches(None)
+    
+    def history_changed(self):
+        """به‌روزرسانی عنوان و فعال بودن گزینه‌های برگشت و انجام دوباره"""
+        label = self.contact_manager.undo_label()
+        self.actionundo.setText(f"برگشت {label}" if label else "برگشت")
+        self.actionundo.setEnabled(label is not None)
+        label = self.contact_manager.redo_label()
+        self.actionredo.setText(f"انجام دوباره {label}" if label else "انجام دوباره")
+        self.actionredo.setEnabled(label is not None)
+    
+    def undo(self):
+        """برگرداندن آخرین تغییر مخاطبین"""
+        success, message = self.contact_manager.undo()
+        self.show_undo_result(success, message)
+    
+    def redo(self):
+        """انجام دوباره آخرین تغییر برگردانده‌شده"""
+        success, message = self.contact_manager.redo()
+        self.show_undo_result(success, message)
+    
+    def show_undo_result(self, success: bool, message: str):
+        """نمایش نتیجه برگشت یا انجام دوباره"""
+        if success:
+            self.refresh_table()
+            self.show_status(message)
+        else:
+            self.show_message("خطا", message, QMessageBox.Icon.Warning)
+    
+    def closeEvent(self, event):
+        """ذخیره تغییرات ذخیره‌نشده پیش از بستن پنجره"""
+        self.checkpoint_timer.stop()
+        self.contact_manager.close()
+        super(MainWindow, self).closeEvent(event)
     
     def show_status(self, message: str):
         """
@@ -145,7 +241,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             
             # اعتبارسنجی شماره تلفن
             if not Validators.validate_phone(inputs["شماره تلفن"]):
-                self.show_message("خطا", "شماره تلفن باید فقط شامل اعداد باشد", 
+                self.show_message("خطا", "شماره تلفن باید 3 تا 15 رقم (با فاصله، خط تیره یا + دلخواه) باشد", 
                                  QMessageBox.Icon.Warning)
                 return
             
@@ -210,7 +306,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                     return
                     
                 if edit_inputs["شماره تلفن جدید"] and not Validators.validate_phone(edit_inputs["شماره تلفن جدید"]):
-                    self.show_message("خطا", "شماره تلفن باید فقط شامل اعداد باشد", QMessageBox.Icon.Warning)
+                    self.show_message("خطا", "شماره تلفن باید 3 تا 15 رقم (با فاصله، خط تیره یا + دلخواه) باشد", QMessageBox.Icon.Warning)
                     return
                     
                 if edit_inputs["ایمیل جدید"] and not Validators.validate_email(edit_inputs["ایمیل جدید"]):
@@ -248,22 +344,27 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.show_message("خطا", "لطفاً عبارت جستجو را وارد کنید", QMessageBox.Icon.Warning)
                 return
             
-            results = self.contact_manager.search_contacts(search_term)
-            
-            if results:
-                # به‌روزرسانی جدول با نتایج جستجو
-                self.tableWidget.setRowCount(len(results))
-                for i, contact in enumerate(results):
-                    self.tableWidget.setItem(i, 0, QTableWidgetItem(contact.first_name))
-                    self.tableWidget.setItem(i, 1, QTableWidgetItem(contact.last_name))
-                    self.tableWidget.setItem(i, 2, QTableWidgetItem(contact.phone))
-                    self.tableWidget.setItem(i, 3, QTableWidgetItem(contact.email or ''))
-                    note_text = contact.notes[-1]['text'] if contact.notes else ''
-                    self.tableWidget.setItem(i, 4, QTableWidgetItem(note_text))
-                
-                self.show_status(f"{len(results)} مخاطب با عبارت '{search_term}' یافت شد")
-            else:
-                self.show_status(f"مخاطبی با عبارت '{search_term}' یافت نشد")
+            # نمایش نتایج از طریق جعبه جستجوی زنده
+            self.search_edit.blockSignals(True)
+            self.search_edit.setText(search_term)
+            self.search_edit.blockSignals(False)
+            self.run_live_search()
+    
+    def run_live_search(self):
+        """اعمال عبارت جعبه جستجو بر جدول"""
+        self.search_timer.stop()
+        search_term = self.search_edit.text().strip()
+        if not search_term:
+            self.table_proxy.set_matches(None)
+            self.show_status("")
+            return
+        
+        results = self.contact_manager.search_contacts(search_term)
+        self.table_proxy.set_matches(results)
+        if results:
+            self.show_status(f"{len(results)} مخاطب با عبارت '{search_term}' یافت شد")
+        else:
+            self.show_status(f"مخاطبی با عبارت '{search_term}' یافت نشد")
     
     def delete_contact_dialog(self):
         """نمایش دیالوگ حذف مخاطب"""
@@ -354,7 +455,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 # قالب‌بندی یادداشت‌ها
                 formatted_notes = ""
                 for i, note in enumerate(notes, 1):
-                    formatted_notes += f"{i}. [{note.get('timestamp', 'بدون تاریخ')}]\n{note.get('text', '')}\n\n"
+                    formatted_notes += f"{i}. [{format_timestamp(note.get('timestamp')) or 'بدون تاریخ'}]\n{note.get('text', '')}\n\n"
                 
                 notes_text.setText(formatted_notes)
                 layout.addWidget(notes_text)
@@ -389,7 +490,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 # نمایش یادداشت‌ها و درخواست شماره یادداشت برای حذف
                 notes_text = "یادداشت‌های موجود:\n\n"
                 for i, note in enumerate(notes, 1):
-                    notes_text += f"{i}. [{note.get('timestamp', 'بدون تاریخ')}] {note.get('text', '')[:30]}...\n"
+                    notes_text += f"{i}. [{format_timestamp(note.get('timestamp')) or 'بدون تاریخ'}] {note.get('text', '')[:30]}...\n"
                 
                 index_dialog = InputDialog("حذف یادداشت - مرحله 2", [("شماره یادداشت", "شماره یادداشت برای حذف را وارد کنید")], self)
                 
@@ -429,39 +530,107 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.show_status(message)
     
     def export_to_csv(self):
-        """صادرات مخاطبین به فایل CSV"""
+        """صادرات مخاطبین به فایل CSV یا vCard در پس‌زمینه"""
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "صادرات مخاطبین",
             "",
-            "CSV Files (*.csv)"
+            FILE_FILTERS
         )
         
         if file_path:
-            success, message = self.contact_manager.export_to_csv(file_path)
-            
-            if success:
-                self.show_status(message)
-            else:
-                self.show_message("خطا", message, QMessageBox.Icon.Warning)
+            worker = ExportWorker(self.contact_manager, file_path, self)
+            worker.completed.connect(self.on_export_completed)
+            self.start_file_job(worker, "در حال صادرات مخاطبین...")
     
     def import_from_csv(self):
-        """واردات مخاطبین از فایل CSV"""
+        """واردات مخاطبین از فایل CSV یا vCard در پس‌زمینه"""
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "واردات مخاطبین",
             "",
-            "CSV Files (*.csv)"
+            FILE_FILTERS
         )
         
         if file_path:
-            success, message, count = self.contact_manager.import_from_csv(file_path)
-            
+            worker = ImportWorker(self.contact_manager, file_path, self)
+            worker.completed.connect(self.on_import_completed)
+            worker.failed.connect(lambda error: self.show_message(
+                "خطا", f"خطا در واردات: {error}", QMessageBox.Icon.Warning))
+            self.start_file_job(worker, "در حال خواندن فایل...")
+    
+    def start_file_job(self, worker, label: str):
+        """
+        اجرای یک کار پس‌زمینه با نوار پیشرفت و دکمه لغو
+        
+        Args:
+            worker: ImportWorker، ExportWorker یا DedupWorker
+            label: متن نوار پیشرفت
+        """
+        progress = QProgressDialog(label, "لغو", 0, 100, self)
+        progress.setWindowTitle("مدیریت مخاطبین")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(PROGRESS_DELAY_MS)
+        progress.setAutoClose(False)
+        progress.canceled.connect(worker.requestInterruption)
+        worker.progress.connect(progress.setValue)
+        worker.finished.connect(progress.deleteLater)
+        worker.finished.connect(worker.deleteLater)
+        # checkpoint در حین کار، یادداشت‌هایی را که کار پس‌زمینه می‌خواند آزاد می‌کند
+        self.checkpoint_timer.stop()
+        worker.finished.connect(self.checkpoint_timer.start)
+        worker.start()
+    
+    def index_pending_contacts(self):
+        """ایندکس کردن یک دسته از مخاطبین در صف ایندکس جستجو"""
+        if not self.contact_manager.search_index.index_pending(INDEX_BATCH_SIZE):
+            self.index_timer.stop()
+    
+    def on_import_completed(self, result):
+        """ذخیره مخاطبین خوانده‌شده در یک تراکنش و نمایش نتیجه"""
+        success, message, count = self.contact_manager.finish_import(result)
+        if success:
+            self.refresh_table()
+            self.index_timer.start()
+            self.show_status(message)
+        elif result.cancelled:
+            self.show_status(message)
+        else:
+            self.show_message("خطا", message, QMessageBox.Icon.Warning)
+    
+    def on_export_completed(self, success: bool, message: str):
+        """نمایش نتیجه صادرات"""
+        if success or self.sender().isInterruptionRequested():
+            self.show_status(message)
+        else:
+            self.show_message("خطا", message, QMessageBox.Icon.Warning)
+    
+    def find_duplicates_dialog(self):
+        """یافتن مخاطبین تکراری در پس‌زمینه"""
+        worker = DedupWorker(self.contact_manager, self)
+        worker.completed.connect(self.on_duplicates_found)
+        self.start_file_job(worker, "در حال یافتن مخاطبین تکراری...")
+    
+    def on_duplicates_found(self, groups):
+        """نمایش گروه‌های تکراری و ادغام گروه‌های انتخاب‌شده"""
+        if groups is None:
+            self.show_status("یافتن مخاطبین تکراری لغو شد")
+            return
+        if not groups:
+            self.show_status("مخاطب تکراری یافت نشد")
+            return
+        
+        dialog = DuplicatesDialog(groups, self)
+        if dialog.exec():
+            selected = dialog.selected_groups()
+            if not selected:
+                return
+            success, message, _ = self.contact_manager.merge_duplicates(selected)
             if success:
                 self.refresh_table()
                 self.show_status(message)
             else:
-                self.show_message("خطا", message, QMessageBox.Icon.Warning) 
+                self.show_message("خطا", message, QMessageBox.Icon.Warning)
                 
     def change_theme_dialog(self):
         """نمایش دیالوگ تغییر تم"""
@@ -481,6 +650,5 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     
     def get_current_theme(self):
         """دریافت تم فعلی برنامه"""
-        # در اینجا می‌توانید تم فعلی را از تنظیمات برنامه بخوانید
-        # فعلاً به صورت پیش‌فرض تم اول را برمی‌گرداند
-        return "premium_7_midnight_galaxy"
\ No newline at end of file
+        # آخرین تم اعمال‌شده با load_theme (در غیر این صورت تم پیش‌فرض)
+        return get_current_theme() or "premium_7_midnight_galaxy"
\ No newline at end of file
@@ -0,0 +1,112 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from models.contact_manager import ContactManager
+
+
+def _percent(done: int, total: int) -> int:
+    return 100 if total <= 0 else min(100, done * 100 // total)
+
+
+class ImportWorker(QThread):
+    """
+    خواندن، اعتبارسنجی و حذف تکراری‌های فایل واردات در پس‌زمینه
+
+    مخاطبین در این رشته تغییر نمی‌کنند؛ نتیجه در رشته اصلی با
+    ContactManager.finish_import در یک تراکنش ذخیره می‌شود. لغو با
+    requestInterruption انجام می‌شود.
+
+    Signals:
+        progress(int): درصد خوانده‌شده از فایل
+        completed(object): نتیجه خواندن (ImportResult)
+        failed(str): پیام خطا
+    """
+
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, contact_manager: ContactManager, file_path: str, parent=None):
+        """
+        Args:
+            contact_manager: مدیریت مخاطبین
+            file_path: مسیر فایل CSV یا vCard
+            parent: والد
+        """
+        super().__init__(parent)
+        self.contact_manager = contact_manager
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            result = self.contact_manager.prepare_import(
+                self.file_path,
+                lambda done, total: self.progress.emit(_percent(done, total)),
+                self.isInterruptionRequested
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.completed.emit(result)
+
+
+class ExportWorker(QThread):
+    """
+    نوشتن مخاطبین در فایل CSV یا vCard در پس‌زمینه
+
+    Signals:
+        progress(int): درصد مخاطبین نوشته‌شده
+        completed(bool, str): نتیجه عملیات و پیام
+    """
+
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(bool, str)
+
+    def __init__(self, contact_manager: ContactManager, file_path: str, parent=None):
+        """
+        Args:
+            contact_manager: مدیریت مخاطبین
+            file_path: مسیر فایل خروجی
+            parent: والد
+        """
+        super().__init__(parent)
+        self.contact_manager = contact_manager
+        self.file_path = file_path
+
+    def run(self):
+        success, message = self.contact_manager.export_contacts(
+            self.file_path,
+            lambda done, total: self.progress.emit(_percent(done, total)),
+            self.isInterruptionRequested
+        )
+        self.completed.emit(success, message)
+
+
+class DedupWorker(QThread):
+    """
+    یافتن گروه‌های مخاطبین تکراری در پس‌زمینه
+
+    گروه‌ها در رشته اصلی با ContactManager.merge_duplicates ادغام می‌شوند.
+
+    Signals:
+        progress(int): درصد پیشرفت
+        completed(object): لیست DuplicateGroup یا None اگر لغو شد
+    """
+
+    progress = pyqtSignal(int)
+    completed = pyqtSignal(object)
+
+    def __init__(self, contact_manager: ContactManager, parent=None):
+        """
+        Args:
+            contact_manager: مدیریت مخاطبین
+            parent: والد
+        """
+        super().__init__(parent)
+        self.contact_manager = contact_manager
+
+    def run(self):
+        groups = self.contact_manager.find_duplicates(
+            lambda done, total: self.progress.emit(_percent(done, total)),
+            self.isInterruptionRequested
+        )
+        self.completed.emit(groups)
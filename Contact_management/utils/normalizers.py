@@ -0,0 +1,111 @@
+import re
+from typing import Optional, Tuple
+
+# یکسان‌سازی حروف عربی و فارسی برای جستجو: ي/ى -> ی، ك -> ک، ة -> ه، أ/إ -> ا، ؤ -> و
+# حذف نیم‌فاصله (ZWNJ)، کشیده (ـ) و اعراب؛ ارقام فارسی و عربی -> لاتین
+_SEARCH_TRANSLATION = {
+    **{ord(src): dst for src, dst in zip('يىكةأإؤ', 'ییکهااو')},
+    **{ord(char): None for char in '\u200c\u200d\u0640'},
+    **{code: None for code in range(0x064B, 0x0660)},
+    0x0670: None,
+    **{ord(char): str(digit) for digit, char in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{ord(char): str(digit) for digit, char in enumerate('٠١٢٣٤٥٦٧٨٩')},
+}
+_DIGIT_TRANSLATION = {key: value for key, value in _SEARCH_TRANSLATION.items()
+                      if value and value.isdigit()}
+_NON_DIGITS = re.compile(r'[^0-9]+')
+
+# اسکلت آوایی نام: حروف فارسی به حرف لاتین هم‌صدا، ترکیب‌های دوحرفی لاتین
+# (kh، sh و ...) به یک نشانه تبدیل و مصوت‌ها (و ا، و، ی، ع) حذف می‌شوند تا
+# «Ali Rezaei»، «Ali Rezayi» و «علی رضایی» هر سه «l rz» شوند.
+_LATIN_DIGRAPHS = {'kh': 'X', 'gh': 'G', 'ch': 'C', 'sh': 'S', 'zh': 'J',
+                   'ph': 'f', 'th': 't', 'dh': 'z', 'ck': 'k'}
+_LATIN_DIGRAPH_PATTERN = re.compile('|'.join(_LATIN_DIGRAPHS))
+_SKELETON_TRANSLATION = {
+    **{ord(src): dst for src, dst in zip('بپتثحدذرزسصضطظفکگلمنه', 'bptshdzrzssztzfkglmnh')},
+    **{ord(src): dst for src, dst in zip('جچخژشغق', 'JCXJSGG')},
+    **{ord(src): dst for src, dst in zip('cjqx', 'kJGX')},
+    # w مثل v و «و» حذف می‌شود (Wahid، Vahid و وحید)؛ translate فقط یک بار اجرا می‌شود
+    **{ord(char): None for char in 'aeiouyvwاآءئویع'},
+}
+_NON_SKELETON = re.compile(r'[^a-zA-Z ]+')
+_REPEATED = re.compile(r'(\w)\1+')
+
+
+def name_key(first_name: str, last_name: str) -> Tuple[str, str]:
+    """
+    کلید نرمال‌شده نام و نام خانوادگی برای ایندکس‌ها
+
+    Args:
+        first_name: نام
+        last_name: نام خانوادگی
+
+    Returns:
+        زوج نام و نام خانوادگی نرمال‌شده با normalize_text
+    """
+    return normalize_text(first_name), normalize_text(last_name)
+
+
+def phone_key(phone: Optional[str]) -> str:
+    """
+    کلید نرمال‌شده شماره تلفن: فقط ارقام، با ارقام فارسی و عربی تبدیل‌شده به لاتین
+
+    Args:
+        phone: شماره تلفن
+
+    Returns:
+        رشته ارقام (برای شماره خالی، رشته خالی)
+    """
+    if not phone:
+        return ''
+    if not phone.isascii():
+        phone = phone.translate(_DIGIT_TRANSLATION)
+    return _NON_DIGITS.sub('', phone)
+
+
+def name_skeleton(text: Optional[str]) -> str:
+    """
+    اسکلت آوایی نام برای مقایسه نام‌های فارسی و لاتین (فقط صامت‌ها)
+
+    Args:
+        text: نام یا نام کامل
+
+    Returns:
+        صامت‌های هر کلمه با حروف لاتین، بدون حروف تکراری پشت سر هم
+    """
+    text = _LATIN_DIGRAPH_PATTERN.sub(lambda match: _LATIN_DIGRAPHS[match.group()], normalize_text(text))
+    text = _NON_SKELETON.sub(' ', text.translate(_SKELETON_TRANSLATION))
+    return ' '.join(_REPEATED.sub(r'\1', text).split())
+
+
+def email_key(email: Optional[str]) -> str:
+    """
+    کلید نرمال‌شده ایمیل
+
+    Args:
+        email: ایمیل
+
+    Returns:
+        ایمیل بدون فاصله و با حروف کوچک (برای ایمیل خالی، رشته خالی)
+    """
+    return email.strip().casefold() if email else ''
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    نرمال‌سازی متن برای جستجو (آگاه از املای فارسی)
+    
+    حروف عربی به معادل فارسی تبدیل، نیم‌فاصله و اعراب حذف، ارقام لاتین و
+    حروف کوچک می‌شوند تا «علي» و «علی» یا «می‌رود» و «میرود» یکی شوند.
+    
+    Args:
+        text: متن
+        
+    Returns:
+        متن نرمال‌شده (برای متن خالی، رشته خالی)
+    """
+    if not text:
+        return ''
+    if text.isascii():  # جدول تبدیل فقط حروف غیر ASCII را تغییر می‌دهد
+        return text.casefold().strip()
+    return text.translate(_SEARCH_TRANSLATION).casefold().strip()
@@ -1,5 +1,57 @@
 import re
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.normalizers import phone_key
+
+# کدهای خطای validate_batch (ترکیب بیتی؛ 0 یعنی ردیف معتبر است)
+ERROR_FIRST_NAME = 1
+ERROR_LAST_NAME = 2
+ERROR_PHONE = 4
+ERROR_EMAIL = 8
+
+IRAN_COUNTRY_CODE = '98'
+MIN_PHONE_DIGITS = 3  # شماره‌های کوتاه مثل 110
+MAX_PHONE_DIGITS = 15  # حداکثر طول E.164
+MIN_E164_DIGITS = 8
+
+# حروف (هر زبان) با فاصله، نیم‌فاصله، آپاستروف، خط تیره یا نقطه بین کلمات
+_NAME_PATTERN = re.compile(r"[^\W\d_]+(?:[ \u200c'\-.]+[^\W\d_]+)*\.?")
+# ارقام (لاتین، فارسی یا عربی) با + اول و فاصله، خط تیره، نقطه یا پرانتز
+_PHONE_PATTERN = re.compile(r'\+?[\d\s\-.()]+')
+_EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s.]+(?:\.[^@\s.]+)+')
+
+
+def _phone_digits(phone: Optional[str]) -> Optional[str]:
+    """ارقام شماره تلفن معتبر (None برای شماره نامعتبر)"""
+    if not phone:
+        return None
+    if phone.isascii() and phone.isdigit():  # حالت رایج: فقط ارقام لاتین
+        digits = phone
+    else:
+        phone = phone.strip()
+        if not phone or _PHONE_PATTERN.fullmatch(phone) is None:
+            return None
+        digits = phone_key(phone)
+    return digits if MIN_PHONE_DIGITS <= len(digits) <= MAX_PHONE_DIGITS else None
+
+
+def _to_e164(phone: str, digits: str) -> Optional[str]:
+    """قالب E.164 شماره معتبر phone با ارقام digits (None برای شماره محلی بدون کد)"""
+    if phone[0] == '+' or phone.lstrip()[0] == '+':
+        number = digits
+    elif digits.startswith('00'):
+        number = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        number = IRAN_COUNTRY_CODE + digits[1:]
+    elif len(digits) == 10 and digits.startswith('9'):
+        number = IRAN_COUNTRY_CODE + digits
+    elif len(digits) == 12 and digits.startswith(IRAN_COUNTRY_CODE):
+        number = digits
+    else:
+        return None
+    if number.startswith('0') or not MIN_E164_DIGITS <= len(number) <= MAX_PHONE_DIGITS:
+        return None
+    return '+' + number
 
 
 class Validators:
@@ -12,13 +64,13 @@ class Validators:
         
         Args:
             name: نام برای اعتبارسنجی
-            
+        
         Returns:
-            نتیجه اعتبارسنجی
+            نتیجه اعتبارسنجی (نام‌های چندکلمه‌ای مثل «محمد رضا» یا «علی‌رضا» معتبرند)
         """
         if not name or not name.strip():
             return False
-        return name.isalpha()
+        return _NAME_PATTERN.fullmatch(name.strip()) is not None
     
     @staticmethod
     def validate_phone(phone: str) -> bool:
@@ -27,13 +79,44 @@ class Validators:
         
         Args:
             phone: شماره تلفن برای اعتبارسنجی
-            
+        
         Returns:
-            نتیجه اعتبارسنجی
+            نتیجه اعتبارسنجی (فاصله، خط تیره، پرانتز و + اول مجازند)
         """
-        if not phone or not phone.strip():
-            return False
-        return phone.isnumeric()
+        return _phone_digits(phone) is not None
+    
+    @staticmethod
+    def normalize_phone(phone: Optional[str]) -> Optional[str]:
+        """
+        تبدیل شماره تلفن به قالب E.164 (مثلاً +989121234567)
+        
+        شماره‌های ایرانی با 0 اول (09121234567)، بدون 0 (9121234567)، با 98
+        یا 0098 و شماره‌های بین‌المللی با + یا 00 پشتیبانی می‌شوند.
+        
+        Args:
+            phone: شماره تلفن
+        
+        Returns:
+            شماره E.164، یا None برای شماره نامعتبر یا شماره محلی بدون کد
+        """
+        digits = _phone_digits(phone)
+        return _to_e164(phone, digits) if digits else None
+    
+    @staticmethod
+    def phone_match_key(phone: Optional[str]) -> str:
+        """
+        کلید مقایسه شماره تلفن‌ها در قالب‌های مختلف
+        
+        Args:
+            phone: شماره تلفن
+        
+        Returns:
+            شماره E.164، یا ارقام شماره اگر قابل تبدیل نباشد
+        """
+        digits = _phone_digits(phone)
+        if not digits:
+            return phone_key(phone)
+        return _to_e164(phone, digits) or digits
     
     @staticmethod
     def validate_email(email: Optional[str]) -> bool:
@@ -42,15 +125,15 @@ class Validators:
         
         Args:
             email: ایمیل برای اعتبارسنجی
-            
+        
         Returns:
             نتیجه اعتبارسنجی
         """
         if not email:
             return True  # ایمیل اختیاری است
-            
-        # الگوی ساده برای اعتبارسنجی ایمیل
-        return email.endswith('@gmail.com') or email.endswith('@yahoo.com')
+        
+        # الگوی ساده: بخش نام، @ و دامنه نقطه‌دار بدون فاصله
+        return _EMAIL_PATTERN.fullmatch(email.strip()) is not None
     
     @staticmethod
     def validate_note(note: str) -> bool:
@@ -59,8 +142,51 @@ class Validators:
         
         Args:
             note: یادداشت برای اعتبارسنجی
-            
+        
         Returns:
             نتیجه اعتبارسنجی
         """
-        return bool(note and note.strip()) 
\ No newline at end of file
+        return bool(note and note.strip())
+    
+    @staticmethod
+    def validate_batch(rows: Iterable[Sequence[Optional[str]]]) -> Tuple[List[int], List[Optional[str]]]:
+        """
+        اعتبارسنجی گروهی ردیف‌ها در یک پیمایش (مثلاً ردیف‌های فایل واردات)
+        
+        نتیجه نام‌ها (که در دفترچه‌های بزرگ بسیار تکرار می‌شوند) یک بار
+        محاسبه و نگه داشته می‌شود.
+        
+        Args:
+            rows: ردیف‌های (نام، نام خانوادگی، تلفن، ایمیل)
+        
+        Returns:
+            کد خطای هر ردیف (ترکیب ERROR_*، 0 برای ردیف معتبر) و کلید
+            phone_match_key تلفن هر ردیف (برای تلفن نامعتبر None)
+        """
+        validate_name = Validators.validate_name
+        validate_email = Validators.validate_email
+        names: Dict[str, bool] = {}
+        errors = []
+        phones = []
+        for first_name, last_name, phone, email in rows:
+            error = 0
+            valid = names.get(first_name)
+            if valid is None:
+                valid = names[first_name] = validate_name(first_name)
+            if not valid:
+                error |= ERROR_FIRST_NAME
+            valid = names.get(last_name)
+            if valid is None:
+                valid = names[last_name] = validate_name(last_name)
+            if not valid:
+                error |= ERROR_LAST_NAME
+            digits = _phone_digits(phone)
+            if digits:
+                phones.append(_to_e164(phone, digits) or digits)
+            else:
+                error |= ERROR_PHONE
+                phones.append(None)
+            if email and not validate_email(email):
+                error |= ERROR_EMAIL
+            errors.append(error)
+        return errors, phones
@@ -0,0 +1,300 @@
+"""
+Streaming encrypted backup format for the Password Manager.
+
+Layout of a ``.pmbak`` file::
+
+    MAGIC
+    key header       (plain JSON: KDF parameters and salt)
+    frame: header    (username, created_at, compression, chunk_size)
+    frame: chunk 1   (JSON list of [website, username, password])
+    ...
+    frame: chunk N
+    frame: manifest  (entry count and the SHA-256 of every chunk frame)
+    footer: offset of the manifest frame
+
+Frames are encrypted with a key derived from the backup password and the
+salt in the key header, so a backup does not depend on the vault's data
+key and can be restored after a key rotation, into another account or
+without users.db. The key header and every frame are a 4-byte big-endian
+length followed by the payload; frames are Fernet tokens, so each chunk
+is authenticated on its own. Chunks are optionally compressed with zlib
+before encryption. Entries are written and read one chunk at a time,
+which keeps memory use independent of the vault size.
+
+Version 1 backups have no key header; their frames were encrypted with a
+vault key and are read with that cipher.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from cryptography.fernet import Fernet, InvalidToken
+
+import credentials
+from parallel import imap_bounded
+
+BACKUP_EXTENSION = '.pmbak'
+MAGIC = b'PMBAK\x00\x02\n'
+LEGACY_MAGIC = b'PMBAK\x00\x01\n'  # version 1, encrypted with a vault key
+FORMAT_VERSION = 2
+DEFAULT_CHUNK_SIZE = 500
+
+_FRAME = struct.Struct('>I')
+_FOOTER = struct.Struct('>Q')
+
+
+class BackupFormatError(Exception):
+    """Raised when a backup file is damaged, truncated or was tampered with."""
+
+
+def backup_version(path):
+    """Get the streaming backup format version of path.
+
+    Returns:
+        int: FORMAT_VERSION, 1 for a backup encrypted with a vault key, or
+        None if path is not a streaming backup
+    """
+    try:
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+    except OSError:
+        return None
+    return {MAGIC: FORMAT_VERSION, LEGACY_MAGIC: 1}.get(magic)
+
+
+def is_backup_file(path):
+    """Check whether path starts with the streaming backup magic bytes."""
+    return backup_version(path) is not None
+
+
+def backup_cipher(password, salt, params):
+    """Fernet cipher for a backup, derived from the backup password."""
+    key = credentials.derive_key(password, salt, params)
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def _check_kdf(params):
+    # Parameters come from the file; refuse ones that would exhaust memory
+    algorithm = params.get('algorithm') if isinstance(params, dict) else None
+    if algorithm == 'scrypt' and 1 < params.get('n', 0) <= credentials.MAX_SCRYPT_N:
+        return
+    if algorithm == 'pbkdf2_sha256' and params.get('i', 0) >= 1:
+        return
+    raise BackupFormatError('Backup uses unsupported key derivation parameters')
+
+
+def _write_frame(f, fernet, payload):
+    token = fernet.encrypt(payload)
+    f.write(_FRAME.pack(len(token)))
+    f.write(token)
+    return token
+
+
+def _read_frame(f):
+    raw = f.read(_FRAME.size)
+    if len(raw) != _FRAME.size:
+        raise BackupFormatError('Backup file is truncated')
+    (length,) = _FRAME.unpack(raw)
+    token = f.read(length)
+    if len(token) != length:
+        raise BackupFormatError('Backup file is truncated')
+    return token
+
+
+def _decrypt(fernet, token):
+    try:
+        return fernet.decrypt(token)
+    except InvalidToken:
+        raise BackupFormatError('Backup chunk failed authentication (wrong password or corrupted file)')
+
+
+def write_backup(path, entries, password, username, params=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, compress=True):
+    """Write entries to an encrypted streaming backup.
+
+    The file is written next to path and moved into place once complete,
+    so an interrupted backup never leaves a partial file behind.
+
+    Args:
+        path (str): Destination file
+        entries (iterable): (website, username, password) tuples
+        password (str): Backup password the encryption key is derived from
+        username (str): Owner recorded in the header
+        params (dict): KDF parameters, defaults to credentials.DEFAULT_PARAMS
+        chunk_size (int): Entries per encrypted chunk
+        compress (bool): Compress chunks with zlib before encrypting
+
+    Returns:
+        dict: The manifest (entry and chunk counts plus chunk digests)
+    """
+    params = params or credentials.DEFAULT_PARAMS
+    salt = os.urandom(credentials.SALT_SIZE)
+    fernet = backup_cipher(password, salt, params)
+    key_header = json.dumps({
+        'kdf': params,
+        'salt': base64.urlsafe_b64encode(salt).decode('ascii'),
+    }).encode('utf-8')
+    header = {
+        'version': FORMAT_VERSION,
+        'username': username,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'compression': 'zlib' if compress else None,
+        'chunk_size': chunk_size,
+    }
+    manifest = {'entries': 0, 'chunks': 0, 'digests': []}
+    temp_path = path + '.tmp'
+
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(_FRAME.pack(len(key_header)))
+            f.write(key_header)
+            _write_frame(f, fernet, json.dumps(header).encode('utf-8'))
+
+            iterator = iter(entries)
+            while True:
+                chunk = [list(entry) for entry in islice(iterator, chunk_size)]
+                if not chunk:
+                    break
+                payload = json.dumps(chunk, separators=(',', ':')).encode('utf-8')
+                if compress:
+                    payload = zlib.compress(payload)
+                token = _write_frame(f, fernet, payload)
+                manifest['entries'] += len(chunk)
+                manifest['chunks'] += 1
+                manifest['digests'].append(hashlib.sha256(token).hexdigest())
+
+            manifest_offset = f.tell()
+            _write_frame(f, fernet, json.dumps(manifest).encode('utf-8'))
+            f.write(_FOOTER.pack(manifest_offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return manifest
+
+
+class BackupReader:
+    """Read and verify a streaming backup.
+
+    Opening the reader loads only the header and the manifest. Iterating
+    it decodes chunks in a thread pool (at most a few chunks ahead of the
+    consumer) and checks every chunk against the manifest digest before
+    decrypting it.
+    """
+
+    def __init__(self, path, password=None, legacy_cipher=None, max_workers=None):
+        """
+        Args:
+            path (str): Backup file
+            password (str): Backup password (current format)
+            legacy_cipher (Fernet): Vault cipher a version 1 backup was written with
+            max_workers (int): Decode threads, defaults to the CPU count
+
+        Raises:
+            BackupFormatError: If the file is not a complete backup, or the
+                password or cipher does not open it
+        """
+        self.path = path
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic == MAGIC:
+                if password is None:
+                    raise BackupFormatError('This backup needs its backup password')
+                try:
+                    key_header = json.loads(_read_frame(f))
+                    params = key_header['kdf']
+                    salt = base64.urlsafe_b64decode(key_header['salt'])
+                except (ValueError, KeyError, TypeError):
+                    raise BackupFormatError('Backup key header is damaged')
+                _check_kdf(params)
+                fernet = backup_cipher(password, salt, params)
+                version = FORMAT_VERSION
+            elif magic == LEGACY_MAGIC:
+                if legacy_cipher is None:
+                    raise BackupFormatError('This backup was encrypted with a vault key')
+                fernet = legacy_cipher
+                version = 1
+            else:
+                raise BackupFormatError('Not a password manager backup file')
+            self.fernet = fernet
+            self.header = json.loads(_decrypt(fernet, _read_frame(f)))
+            self._chunks_offset = f.tell()
+
+            f.seek(0, os.SEEK_END)
+            if f.tell() < self._chunks_offset + _FOOTER.size:
+                raise BackupFormatError('Backup file is truncated')
+            f.seek(-_FOOTER.size, os.SEEK_END)
+            (self._manifest_offset,) = _FOOTER.unpack(f.read(_FOOTER.size))
+            if not self._chunks_offset <= self._manifest_offset < f.tell():
+                raise BackupFormatError('Backup file is truncated')
+            f.seek(self._manifest_offset)
+            self.manifest = json.loads(_decrypt(fernet, _read_frame(f)))
+
+        if self.header.get('version') != version:
+            raise BackupFormatError(f"Unsupported backup version: {self.header.get('version')}")
+
+    @property
+    def username(self):
+        return self.header['username']
+
+    @property
+    def created_at(self):
+        return self.header['created_at']
+
+    def __len__(self):
+        return self.manifest['entries']
+
+    def __iter__(self):
+        """Yield entries as dicts with 'website', 'username' and 'password' keys."""
+        for chunk in self.iter_chunks():
+            for website, username, password in chunk:
+                yield {'website': website, 'username': username, 'password': password}
+
+    def iter_chunks(self):
+        """Yield each chunk as a list of [website, username, password] lists."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from imap_bounded(pool, self._decode_chunk, self._iter_tokens(),
+                                    self.max_workers * 2)
+
+    def verify(self):
+        """Check every chunk digest without decrypting anything.
+
+        Raises:
+            BackupFormatError: If a chunk is missing, extra or modified
+        """
+        for _ in self._iter_tokens():
+            pass
+
+    def _iter_tokens(self):
+        digests = self.manifest['digests']
+        with open(self.path, 'rb') as f:
+            f.seek(self._chunks_offset)
+            for index, expected in enumerate(digests):
+                if f.tell() >= self._manifest_offset:
+                    raise BackupFormatError('Backup is missing chunks')
+                token = _read_frame(f)
+                if hashlib.sha256(token).hexdigest() != expected:
+                    raise BackupFormatError(f'Backup chunk {index + 1} does not match the manifest')
+                yield token
+            if f.tell() != self._manifest_offset:
+                raise BackupFormatError('Backup contains unexpected data')
+
+    def _decode_chunk(self, token):
+        payload = _decrypt(self.fernet, token)
+        if self.header.get('compression') == 'zlib':
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
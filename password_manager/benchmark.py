@@ -0,0 +1,234 @@
+"""
+Headless benchmark for the Password Manager data paths.
+
+Seeds a temporary users.db per vault size and times the database, crypto,
+backup, restore, re-key and audit code paths the GUI uses, without
+starting a Qt event loop. Results are written as JSON; pass an earlier
+report as --baseline to fail when an operation got slower.
+
+    python benchmark.py --sizes 1000,10000 --output bench.json
+    python benchmark.py --baseline bench.json --threshold 1.5
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from cryptography.fernet import Fernet, MultiFernet
+
+import credentials
+import vault_keys
+from audit import run_audit
+from backup_format import BackupReader, write_backup
+from vault import VaultRepository
+from workers import BulkImportWorker, RekeyWorker
+
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_REPEAT = 5
+SITES = ('google', 'github', 'amazon', 'bank', 'mail', 'shop', 'news', 'forum', 'cloud', 'game')
+
+
+def measure(func, repeat, items=1):
+    """Run func repeat times and summarize the timings.
+
+    Args:
+        func (callable): Operation to time
+        repeat (int): Number of runs
+        items (int): Units of work per run, for per-item figures
+
+    Returns:
+        dict: median/min/max seconds, runs and items per second
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        'median_s': round(median, 6),
+        'min_s': round(min(timings), 6),
+        'max_s': round(max(timings), 6),
+        'runs': repeat,
+        'items': items,
+        'items_per_s': round(items / median, 1) if median else None,
+    }
+
+
+def make_entries(size, rng):
+    """Generate (website, username, password) tuples."""
+    return [(f'{rng.choice(SITES)}{i}.example.com', f'user{i % 997}@mail.com',
+             ''.join(rng.choice('abcdefghXYZ0123!@#') for _ in range(14)))
+            for i in range(size)]
+
+
+def bench_size(size, repeat, workdir, seed=0):
+    """Benchmark every operation against a vault with size entries."""
+    rng = random.Random(seed)
+    db_path = os.path.join(workdir, f'users_{size}.db')
+    results = {}
+
+    results['init_db_new'] = measure(
+        lambda: VaultRepository(os.path.join(workdir, f'init_{rng.random()}.db')).close(), repeat)
+
+    vault = VaultRepository(db_path)
+    results['init_db_existing'] = measure(lambda: VaultRepository(db_path).close(), repeat)
+
+    params = credentials.DEFAULT_PARAMS
+    results['kdf_hash_password'] = measure(lambda: credentials.hash_password('benchmark', params),
+                                           repeat)
+    user_id = vault.create_user('bench', credentials.hash_password('benchmark', params), 30)
+    key_record = vault_keys.wrap_data_key(Fernet.generate_key(), 'benchmark', params)
+    vault.save_user_key(user_id, key_record)
+    results['unlock_data_key'] = measure(
+        lambda: vault_keys.unlock('benchmark', vault.get_user_key(user_id), params), repeat)
+    data_key = vault_keys.unwrap_data_key(vault.get_user_key(user_id), 'benchmark')
+    cipher = Fernet(data_key)
+
+    entries = make_entries(size, rng)
+    sample = [password for _, _, password in entries[:min(size, 2000)]]
+    results['encrypt'] = measure(lambda: [cipher.encrypt(p.encode()) for p in sample],
+                                 repeat, len(sample))
+    tokens = [cipher.encrypt(p.encode()) for p in sample]
+    results['decrypt'] = measure(lambda: [cipher.decrypt(t) for t in tokens], repeat, len(tokens))
+
+    encrypted = [(w, u, cipher.encrypt(p.encode()).decode()) for w, u, p in entries]
+    results['import_entries'] = measure(lambda: vault.import_entries(user_id, [encrypted]), 1, size)
+
+    def uncached_user_id():
+        vault._user_ids.clear()
+        vault.get_user_id('bench')
+
+    results['get_user_id_uncached'] = measure(uncached_user_id, repeat * 100, 1)
+    results['get_user_id_cached'] = measure(lambda: vault.get_user_id('bench'), repeat * 100, 1)
+    results['count_entries'] = measure(lambda: vault.count_entries(user_id), repeat)
+
+    def add_and_delete():
+        vault.add_entry(user_id, 'bench-single', 'user', encrypted[0][2])
+        vault.delete_entry(user_id, 'bench-single', 'user')
+
+    results['add_delete_entry'] = measure(add_and_delete, repeat)
+    results['page_first'] = measure(lambda: vault.page_entries(user_id, None, 200), repeat)
+    middle = vault.connection.execute(
+        'SELECT website, id FROM passwords WHERE user_id = ? ORDER BY website, id LIMIT 1 OFFSET ?',
+        (user_id, size // 2)).fetchone()
+    results['page_middle'] = measure(lambda: vault.page_entries(user_id, middle, 200), repeat)
+    results['search_fts'] = measure(lambda: vault.search_entries(user_id, 'github1'), repeat)
+    results['search_fts_broad'] = measure(lambda: vault.search_entries(user_id, 'example'), repeat)
+    results['search_short_like'] = measure(lambda: vault.search_entries(user_id, 'gi'), repeat)
+    results['fts_enabled'] = vault.fts_enabled
+
+    backup_path = os.path.join(workdir, f'backup_{size}.pmbak')
+
+    def backup():
+        write_backup(backup_path, ((w, u, cipher.decrypt(t.encode()).decode())
+                                   for w, u, t in vault.iter_entries_with_secrets(user_id)),
+                     'benchmark', 'bench', params)
+
+    results['backup_write'] = measure(backup, max(1, repeat // 2), size)
+    results['backup_read'] = measure(lambda: sum(1 for _ in BackupReader(backup_path, 'benchmark')),
+                                     max(1, repeat // 2), size)
+
+    restore_user = vault.create_user('restore', 'x', 30)
+
+    def restore():
+        BulkImportWorker(vault, restore_user, BackupReader(backup_path, 'benchmark'),
+                         lambda p: cipher.encrypt(p.encode()).decode(), size).run()
+
+    results['restore_end_to_end'] = measure(restore, 1, size)
+
+    results['audit'] = measure(
+        lambda: run_audit(vault.iter_audit_rows(user_id),
+                          lambda t: cipher.decrypt(t.encode()).decode()),
+        max(1, repeat // 2), size)
+
+    new_key = Fernet.generate_key()
+    rotate = MultiFernet([Fernet(new_key), cipher])
+    results['rekey'] = measure(lambda: RekeyWorker(vault, user_id, rotate).run(), 1, size)
+
+    vault.close()
+    return results
+
+
+def compare(report, baseline, threshold):
+    """List operations whose median time grew by more than threshold times."""
+    regressions = []
+    for size, operations in report['results'].items():
+        for name, current in operations.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if not isinstance(current, dict) or not isinstance(previous, dict):
+                continue
+            if previous['median_s'] and current['median_s'] > previous['median_s'] * threshold:
+                regressions.append({'size': size, 'operation': name,
+                                    'baseline_s': previous['median_s'],
+                                    'current_s': current['median_s']})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Password Manager data paths')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated vault sizes (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='runs per operation (default: %(default)s)')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='earlier report to compare against')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='slowdown factor counted as a regression (default: %(default)s)')
+    parser.add_argument('--profile', action='store_true',
+                        help='print the top functions by cumulative time')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'results': {},
+    }
+
+    profiler = cProfile.Profile() if args.profile else None
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            if profiler:
+                profiler.enable()
+            report['results'][str(size)] = bench_size(size, args.repeat, workdir)
+            if profiler:
+                profiler.disable()
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report['regressions'] = regressions
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if profiler:
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(25)
+    if args.baseline and exit_code:
+        print(f"{len(report['regressions'])} operations regressed", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
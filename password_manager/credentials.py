@@ -0,0 +1,167 @@
+"""
+Master password hashing for the Password Manager.
+
+Hashes are salted and derived with scrypt (or PBKDF2-HMAC-SHA256) from
+hashlib. The algorithm and its cost parameters are encoded into every
+stored hash, so users keep working when the defaults change and are
+upgraded the next time they log in::
+
+    scrypt$n=16384,r=8,p=1$<salt>$<hash>
+    pbkdf2_sha256$i=600000$<salt>$<hash>
+
+Plain 64-character hex strings are legacy unsalted SHA-256 hashes.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import time
+
+SALT_SIZE = 16
+KEY_SIZE = 32
+TARGET_UNLOCK_TIME = 0.25  # seconds
+
+# Used until calibrate() has picked parameters for this machine
+DEFAULT_PARAMS = {'algorithm': 'scrypt', 'n': 2 ** 14, 'r': 8, 'p': 1}
+MIN_PBKDF2_ITERATIONS = 100_000
+MAX_SCRYPT_N = 2 ** 20
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def derive_key(password, salt, params):
+    """Derive KEY_SIZE bytes from a password with the given KDF parameters."""
+    password = password.encode('utf-8')
+    if params['algorithm'] == 'scrypt':
+        n, r, p = params['n'], params['r'], params['p']
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * r * n * p + 2 ** 20, dklen=KEY_SIZE)
+    if params['algorithm'] == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', password, salt, params['i'], dklen=KEY_SIZE)
+    raise ValueError(f"Unknown KDF algorithm: {params['algorithm']}")
+
+
+def _format_params(params):
+    return ','.join(f'{key}={params[key]}' for key in sorted(params) if key != 'algorithm')
+
+
+def parse_hash(encoded):
+    """Split an encoded hash into (params, salt, digest).
+
+    Legacy SHA-256 hashes are reported with algorithm 'sha256' and no salt.
+
+    Raises:
+        ValueError: If encoded is not a recognized hash
+    """
+    if '$' not in encoded:
+        if len(encoded) == 64:
+            return {'algorithm': 'sha256'}, b'', bytes.fromhex(encoded)
+        raise ValueError('Unrecognized password hash')
+    try:
+        algorithm, param_text, salt, digest = encoded.split('$')
+        params = {'algorithm': algorithm}
+        for pair in param_text.split(','):
+            key, value = pair.split('=')
+            params[key] = int(value)
+        return params, _b64decode(salt), _b64decode(digest)
+    except ValueError:
+        raise ValueError('Unrecognized password hash')
+
+
+def hash_password(password, params=None):
+    """Hash a master password with a fresh random salt.
+
+    Args:
+        password (str): The master password
+        params (dict): KDF parameters, defaults to DEFAULT_PARAMS
+
+    Returns:
+        str: Encoded hash including algorithm, parameters and salt
+    """
+    params = params or DEFAULT_PARAMS
+    salt = os.urandom(SALT_SIZE)
+    digest = derive_key(password, salt, params)
+    return f"{params['algorithm']}${_format_params(params)}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def verify_password(password, encoded):
+    """Check a master password against a stored hash in constant time."""
+    try:
+        params, salt, expected = parse_hash(encoded)
+    except ValueError:
+        return False
+    if params['algorithm'] == 'sha256':
+        actual = hashlib.sha256(password.encode('utf-8')).digest()
+    else:
+        actual = derive_key(password, salt, params)
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(encoded, params=None):
+    """Check whether a stored hash is weaker than the current parameters."""
+    params = params or DEFAULT_PARAMS
+    try:
+        current, _, _ = parse_hash(encoded)
+    except ValueError:
+        return True
+    return params_weaker(current, params)
+
+
+def params_weaker(current, params):
+    """Check whether KDF parameters current are weaker than params."""
+    if current['algorithm'] != params['algorithm']:
+        return True
+    return any(current.get(key, 0) < value
+               for key, value in params.items() if key != 'algorithm')
+
+
+def check_password(password, encoded, params=None):
+    """Verify a password and produce an upgraded hash when one is due.
+
+    Returns:
+        tuple: (matches, new_hash) where new_hash is None unless the stored
+        hash matched and should be replaced
+    """
+    if not verify_password(password, encoded):
+        return False, None
+    if needs_rehash(encoded, params):
+        return True, hash_password(password, params)
+    return True, None
+
+
+def _time_derivation(params):
+    start = time.perf_counter()
+    derive_key('calibration', b'\0' * SALT_SIZE, params)
+    return time.perf_counter() - start
+
+
+def calibrate(target=TARGET_UNLOCK_TIME, algorithm='scrypt'):
+    """Pick KDF parameters that take about target seconds on this machine.
+
+    scrypt doubles n (memory and time) until the target is reached;
+    PBKDF2 scales its iteration count linearly from a short measurement.
+
+    Returns:
+        dict: Parameters for hash_password()
+    """
+    if algorithm == 'scrypt':
+        params = dict(DEFAULT_PARAMS, n=2 ** 12)
+        elapsed = _time_derivation(params)
+        while elapsed * 2 <= target and params['n'] < MAX_SCRYPT_N:
+            params['n'] *= 2
+            elapsed = _time_derivation(params)
+        params['n'] = max(params['n'], DEFAULT_PARAMS['n'])
+        return params
+    if algorithm == 'pbkdf2_sha256':
+        sample = {'algorithm': algorithm, 'i': 20_000}
+        elapsed = max(_time_derivation(sample), 1e-6)
+        iterations = int(sample['i'] * target / elapsed) // 1000 * 1000
+        return {'algorithm': algorithm, 'i': max(iterations, MIN_PBKDF2_ITERATIONS)}
+    raise ValueError(f'Unknown KDF algorithm: {algorithm}')
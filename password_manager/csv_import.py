@@ -0,0 +1,172 @@
+"""
+CSV password export import for the Password Manager.
+
+Reads the CSV files that browsers and other password managers export
+(Chrome, Edge, Firefox, Safari, Bitwarden, 1Password, LastPass, KeePass
+and similar) one row at a time. Columns are found by their header names,
+websites are reduced to their domain, and rows without a website or
+password are skipped and counted.
+"""
+
+import csv
+from itertools import islice
+from urllib.parse import urlsplit
+
+CSV_EXTENSION = '.csv'
+PREVIEW_BATCH_SIZE = 1000
+
+# Lower-cased header names accepted for each field, in order of preference.
+# Rows with an empty preferred column fall back to the next one present.
+COLUMN_ALIASES = {
+    'website': ('url', 'login_uri', 'website', 'web site', 'uri', 'origin', 'hostname',
+                'name', 'title'),
+    'username': ('username', 'login_username', 'login name', 'user name', 'login', 'user',
+                 'email'),
+    'password': ('password', 'login_password', 'pass'),
+}
+
+
+class CsvImportError(Exception):
+    """Raised when a file is not a recognizable CSV password export."""
+
+
+def normalize_website(value):
+    """Reduce a URL to its lower-case domain without a leading 'www.'.
+
+    'https://www.GitHub.com/login' becomes 'github.com'. Values that are not
+    URLs, such as 'My Bank', are only trimmed.
+    """
+    value = value.strip()
+    if not value or any(c.isspace() for c in value):
+        return value
+    try:
+        host = urlsplit(value if '://' in value else '//' + value).hostname
+    except ValueError:
+        return value
+    if not host:
+        return value
+    return host[4:] if host.startswith('www.') else host
+
+
+def find_columns(header):
+    """Map 'website', 'username' and 'password' to column indexes.
+
+    Returns:
+        dict: Field name -> list of candidate column indexes, best first
+
+    Raises:
+        CsvImportError: If there is no website or no password column
+    """
+    names = [name.strip().lower() for name in header]
+    columns = {field: [names.index(alias) for alias in aliases if alias in names]
+               for field, aliases in COLUMN_ALIASES.items()}
+    if not columns['website'] or not columns['password']:
+        raise CsvImportError('The file has no website and password columns. Expected a '
+                             'header row such as "url,username,password".')
+    return columns
+
+
+class CsvImportReader:
+    """Stream entries from a CSV password export.
+
+    Iterating yields dicts with 'website', 'username' and 'password' keys,
+    reading the file row by row, so it can be passed straight to
+    BulkImportWorker. After a full iteration, rows holds the number of data
+    rows read and invalid the number skipped for lacking a website or
+    password.
+    """
+
+    def __init__(self, path, encoding='utf-8-sig'):
+        """
+        Args:
+            path (str): CSV file with a header row
+            encoding (str): File encoding; the default also strips a BOM
+
+        Raises:
+            CsvImportError: If the header is missing or not recognized
+            OSError: If the file cannot be read
+        """
+        self.path = path
+        self.encoding = encoding
+        try:
+            with self._open() as f:
+                header = next(csv.reader(f), None)
+        except (UnicodeDecodeError, csv.Error):
+            raise CsvImportError('The file is not a UTF-8 encoded CSV file.')
+        if not header:
+            raise CsvImportError('The file is empty.')
+        self.columns = find_columns(header)
+        self.rows = 0
+        self.invalid = 0
+
+    def _open(self):
+        return open(self.path, newline='', encoding=self.encoding)
+
+    def __iter__(self):
+        self.rows = 0
+        self.invalid = 0
+        with self._open() as f:
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                if not any(field.strip() for field in row):
+                    continue
+                self.rows += 1
+                entry = self._parse(row)
+                if entry is None:
+                    self.invalid += 1
+                    continue
+                yield entry
+
+    def _field(self, row, field):
+        for index in self.columns[field]:
+            if index < len(row) and row[index].strip():
+                return row[index]
+        return ''
+
+    def _parse(self, row):
+        website = normalize_website(self._field(row, 'website'))
+        password = self._field(row, 'password')
+        if not website or not password:
+            return None
+        return {'website': website, 'username': self._field(row, 'username').strip(),
+                'password': password}
+
+
+def preview_import(vault, user_id, reader, batch_size=PREVIEW_BATCH_SIZE):
+    """Dry run: count what importing reader would do without writing anything.
+
+    Reads the file once and checks each batch of website/username pairs
+    against the vault; nothing is encrypted.
+
+    Args:
+        vault (VaultRepository): Repository the entries would be added to
+        user_id (int): Owner of the entries
+        reader (CsvImportReader): Export to check
+        batch_size (int): Pairs looked up per query
+
+    Returns:
+        dict: 'rows' read, 'invalid' rows without a website or password,
+        'duplicates' repeated within the file, 'existing' entries already in
+        the vault and 'new' entries that would be added
+    """
+    seen = set()
+    duplicates = existing = new = 0
+    entries = iter(reader)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            break
+        pairs = []
+        for entry in batch:
+            pair = (entry['website'], entry['username'])
+            if pair in seen:
+                duplicates += 1
+            else:
+                seen.add(pair)
+                pairs.append(pair)
+        found = len(vault.existing_pairs(user_id, pairs))
+        existing += found
+        new += len(pairs) - found
+    return {'rows': reader.rows, 'invalid': reader.invalid, 'duplicates': duplicates,
+            'existing': existing, 'new': new}
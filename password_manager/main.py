@@ -3,16 +3,25 @@ import string
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QLabel, QPushButton,
                              QLineEdit, QVBoxLayout, QHBoxLayout, QDialog, QMessageBox,
-                             QStackedWidget, QTextEdit, QInputDialog)
-from PyQt6.QtCore import Qt, pyqtSignal
+                             QStackedWidget, QTextEdit, QInputDialog, QProgressDialog,
+                             QProgressBar, QTreeWidget, QTreeWidgetItem)
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon
-import hashlib
 import sqlite3
 
 from cryptography.fernet import Fernet
 
 from passwd import Ui_MainWindow
-# from main import cipher_suite
+from vault import VaultRepository
+from workers import (AuditWorker, BulkImportWorker, ImportPreviewWorker, RekeyWorker,
+                     TaskWorker)
+from audit import STRENGTH_LABELS, AuditCache, check_password_strength
+import credentials
+import vault_keys
+from vault_view import VaultViewDialog
+from csv_import import CSV_EXTENSION, CsvImportError, CsvImportReader
+from backup_format import (BACKUP_EXTENSION, FORMAT_VERSION, BackupFormatError, BackupReader,
+                           backup_version, write_backup)
 
 import json
 import os
@@ -22,79 +31,76 @@ from datetime import datetime
 DATABASE_NAME = 'users.db'
 MIN_PASSWORD_LENGTH = 8
 DEFAULT_PASSWORD_LENGTH = 16
-ENCRYPTION_KEY = b'Ke3NG7IWYBOdv42RPxPRhdQcK0WRVY-cGnGvpHyTVvM='
-cipher_suite = Fernet(ENCRYPTION_KEY)
-
-# Create database and user tables
-def init_db():
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            age INTEGER
-        )
-    ''')
-    conn.commit()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS passwords(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            website TEXT NOT NULL,
-            username TEXT NOT NULL,
-            password TEXT NOT NULL,
-            user_id INTEGER NOT NULL,
-            FOREIGN KEY(user_id) REFERENCES users(id),
-            UNIQUE(website, username, user_id)
-        )
-    ''')
-    conn.commit()
-    conn.close()
+KDF_SETTING = 'kdf_params'
+IDLE_CHECK_INTERVAL_MS = 10000
+# Key of vaults created before per-user data keys; only used to read and migrate old rows
+LEGACY_ENCRYPTION_KEY = b'Ke3NG7IWYBOdv42RPxPRhdQcK0WRVY-cGnGvpHyTVvM='
+legacy_cipher = Fernet(LEGACY_ENCRYPTION_KEY)
+
+# Open the database (creates the tables on first run); every query goes through the vault
+vault = VaultRepository(DATABASE_NAME)
+
+# Data key of the logged-in user, unlocked with the master password
+key_session = vault_keys.KeySession()
 
-# Initialize the database
-init_db()
+# Audit reports, valid until the vault changes
+audit_cache = AuditCache()
 
 def generate_strong_password(length=DEFAULT_PASSWORD_LENGTH):
     characters = string.ascii_letters + string.digits + "!@#$%^&*()_+<>?"
     strong_password = ''.join(secrets.choice(characters) for _ in range(length))
     return strong_password
 
-# Helper function for database connections
-def get_db_connection():
-    return sqlite3.connect(DATABASE_NAME)
-
 # Helper function to get user_id from username
 def get_user_id(username):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM users WHERE username=?', (username,))
-        user = cursor.fetchone()
-        conn.close()
-        return user[0] if user else None
-    except Exception:
-        if 'conn' in locals():
-            conn.close()
+        return vault.get_user_id(username)
+    except sqlite3.Error:
         return None
         
+# KDF parameters calibrated for this machine (defaults until calibration ran)
+def kdf_params():
+    return vault.get_setting(KDF_SETTING, credentials.DEFAULT_PARAMS)
+
 # Helper function for password hashing
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+def hash_password(password, params=None):
+    return credentials.hash_password(password, params or kdf_params())
+
+# Runs on a worker thread: verify the master password and open the user's data key
+def unlock_vault(password, stored_hash, key_record, params):
+    matches, new_hash = credentials.check_password(password, stored_hash, params)
+    if not matches:
+        return False, None, None
+    return True, new_hash, vault_keys.unlock(password, key_record, params)
+
+# Runs on a worker thread: check the current master password, hash the new one
+# and re-wrap the data key for it
+def verify_and_rehash(current_password, new_password, stored_hash, data_key, previous_key,
+                      retired_keys, params):
+    if not credentials.verify_password(current_password, stored_hash):
+        return None
+    return (credentials.hash_password(new_password, params),
+            vault_keys.wrap_data_key(data_key, new_password, params, previous_key, retired_keys))
+
+# Runs on a worker thread: check the master password and create a new data key
+def verify_and_rotate(password, stored_hash, data_key, retired_keys, params):
+    if not credentials.verify_password(password, stored_hash):
+        return None
+    return vault_keys.rotate_data_key(data_key, password, params, retired_keys)
     
-# Helper function for password encryption
-def encrypt_password(password):
+# Helper function for password encryption (bulk jobs pass one cipher for all rows)
+def encrypt_password(password, cipher=None):
     try:
         password_bytes = password.encode('utf-8')
-        return cipher_suite.encrypt(password_bytes).decode('utf-8')
+        return (cipher or key_session.cipher()).encrypt(password_bytes).decode('utf-8')
     except Exception as e:
         raise Exception(f"Encryption error: {str(e)}")
 
 # Helper function for password decryption
-def decrypt_password(encrypted_password):
+def decrypt_password(encrypted_password, cipher=None):
     try:
         encrypted_bytes = encrypted_password.encode('utf-8')
-        return cipher_suite.decrypt(encrypted_bytes).decode('utf-8')
+        return (cipher or key_session.cipher()).decrypt(encrypted_bytes).decode('utf-8')
     except Exception as e:
         raise Exception(f"Decryption error: {str(e)}")
         
@@ -103,6 +109,7 @@ class LoginPage(QWidget):
 
     def __init__(self):
         super().__init__()
+        self.verify_worker = None  # Background password check, if any
         self.setup_ui()
 
     def setup_ui(self):
@@ -130,9 +137,9 @@ class LoginPage(QWidget):
         layout.addWidget(self.password_input)
 
         # Login button
-        login_btn = QPushButton('Login')
-        login_btn.clicked.connect(self.authenticate)
-        layout.addWidget(login_btn)
+        self.login_btn = QPushButton('Login')
+        self.login_btn.clicked.connect(self.authenticate)
+        layout.addWidget(self.login_btn)
 
         # Register link
         register_link = QPushButton("Don't have an account? Register")
@@ -151,26 +158,61 @@ class LoginPage(QWidget):
             return
 
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
+            stored_hash = vault.get_password_hash(username)
+            key_record = vault.get_user_key(vault.get_user_id(username)) if stored_hash else None
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, 'Error', f'Database connection error: {str(e)}')
+            return
 
-            # Hash the input password for comparison
-            hashed_password = hash_password(password)
+        if not stored_hash:
+            QMessageBox.warning(self, 'Error', 'Incorrect username or password')
+            return
 
-            cursor.execute('SELECT password FROM users WHERE username=?', (username,))
-            result = cursor.fetchone()
+        # Derive the keys on a worker thread so the window stays responsive
+        self.login_btn.setEnabled(False)
+        self.login_btn.setText('Verifying...')
+        worker = TaskWorker(unlock_vault, password, stored_hash, key_record, kdf_params(),
+                            parent=self)
+        worker.succeeded.connect(lambda result: self.on_verified(username, key_record, *result))
+        worker.failed.connect(self.on_verify_failed)
+        self.verify_worker = worker
+        worker.start()
+
+    def on_verified(self, username, key_record, matches, new_hash, keys):
+        self.login_btn.setEnabled(True)
+        self.login_btn.setText('Login')
+        if not matches:
+            QMessageBox.warning(self, 'Error', 'Incorrect username or password')
+            return
 
-            if result and result[0] == hashed_password:
-                self.login_success.emit(username)
-                QMessageBox.information(self, 'Success', 'Login successful')
-            else:
-                QMessageBox.warning(self, 'Error', 'Incorrect username or password')
+        user_id = vault.get_user_id(username)
+        if new_hash:
+            # Transparently upgrade legacy or weaker hashes
+            try:
+                vault.update_password_hash(user_id, new_hash)
+            except sqlite3.Error:
+                pass  # Keep the old hash; the upgrade is retried on the next login
 
+        data_key, previous_key, retired_keys, new_record = keys
+        try:
+            if new_record:
+                # A vault without a data key still has rows under the legacy key
+                legacy_rows = key_record is None and vault.count_entries(user_id) > 0
+                vault.save_user_key(user_id, new_record, legacy_rows=legacy_rows)
+            key_record = vault.get_user_key(user_id)
         except sqlite3.Error as e:
-            QMessageBox.critical(self, 'Error', f'Database connection error: {str(e)}')
-        finally:
-            if 'conn' in locals():
-                conn.close()
+            QMessageBox.critical(self, 'Error', f'Could not store vault key: {str(e)}')
+            return
+
+        key_session.open(user_id, data_key, previous_key,
+                         legacy_cipher if key_record['legacy_rows'] else None, retired_keys)
+        self.login_success.emit(username)
+        QMessageBox.information(self, 'Success', 'Login successful')
+
+    def on_verify_failed(self, error):
+        self.login_btn.setEnabled(True)
+        self.login_btn.setText('Login')
+        QMessageBox.critical(self, 'Error', f'Could not verify password: {error}')
 
     def show_register(self):
         self.parent().setCurrentIndex(1)  # Go to registration page
@@ -179,6 +221,7 @@ class LoginPage(QWidget):
 class RegisterPage(QWidget):
     def __init__(self):
         super().__init__()
+        self.hash_worker = None  # Background password hashing, if any
         self.setup_ui()
 
     def setup_ui(self):
@@ -217,9 +260,9 @@ class RegisterPage(QWidget):
         layout.addWidget(self.age_input)
 
         # Register button
-        register_btn = QPushButton('Register')
-        register_btn.clicked.connect(self.register_user)
-        layout.addWidget(register_btn)
+        self.register_btn = QPushButton('Register')
+        self.register_btn.clicked.connect(self.register_user)
+        layout.addWidget(self.register_btn)
 
         # Login link
         login_link = QPushButton('Already registered? Login')
@@ -256,31 +299,39 @@ class RegisterPage(QWidget):
             return
 
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-
             # Check if user exists
-            cursor.execute('SELECT id FROM users WHERE username=?', (username,))
-            if cursor.fetchone():
+            if vault.user_exists(username):
                 QMessageBox.warning(self, 'Error', 'This username is already registered')
                 return
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, 'Error', f'Registration error: {str(e)}')
+            return
 
-            # Hash the password
-            hashed_password = hash_password(password)
+        # Hash the password on a worker thread
+        self.register_btn.setEnabled(False)
+        worker = TaskWorker(hash_password, password, kdf_params(), parent=self)
+        worker.succeeded.connect(lambda hashed_password: self.save_user(username, hashed_password, age))
+        worker.failed.connect(self.on_hash_failed)
+        self.hash_worker = worker
+        worker.start()
 
+    def save_user(self, username, hashed_password, age):
+        self.register_btn.setEnabled(True)
+        try:
             # Save the new user
-            cursor.execute('INSERT INTO users (username, password, age) VALUES (?, ?, ?)',
-                           (username, hashed_password, age))
-            conn.commit()
+            vault.create_user(username, hashed_password, age)
 
             QMessageBox.information(self, 'Success', 'Registration successful')
             self.show_login()
 
+        except sqlite3.IntegrityError:
+            QMessageBox.warning(self, 'Error', 'This username is already registered')
         except sqlite3.Error as e:
             QMessageBox.critical(self, 'Error', f'Registration error: {str(e)}')
-        finally:
-            if 'conn' in locals():
-                conn.close()
+
+    def on_hash_failed(self, error):
+        self.register_btn.setEnabled(True)
+        QMessageBox.critical(self, 'Error', f'Registration error: {error}')
 
     def show_login(self):
         self.parent().setCurrentIndex(0)  # Go to login page
@@ -292,6 +343,7 @@ class Change_passwd(QDialog):
         super().__init__(parent)
         # Get the username from the parent MainWindow
         self.username = parent.current_username if parent and hasattr(parent, 'current_username') else None
+        self.hash_worker = None  # Background password check, if any
 
         self.setWindowTitle('Change password ...')
         self.setFont(QFont('Arial', 20))
@@ -370,25 +422,45 @@ class Change_passwd(QDialog):
                 QMessageBox.warning(self, 'Error', 'User not found in database!')
                 return
 
-            conn = get_db_connection()
-            cursor = conn.cursor()
-
-            # Verify current password
-            hashed_current = hash_password(current_password)
-            cursor.execute('SELECT password FROM users WHERE id=?', (user_id,))
-            result = cursor.fetchone()
-
-            if not result or result[0] != hashed_current:
+            stored_hash = vault.get_password_hash(self.username)
+            if not stored_hash:
                 QMessageBox.warning(self, 'Error', 'Current password is incorrect!')
                 return
 
-            # Hash the new password
-            hashed_new = hash_password(new_password)
+            # The data key is re-wrapped for the new password, so it must be unlocked
+            if not key_session.is_unlocked:
+                QMessageBox.warning(self, 'Vault Locked',
+                                    'Your vault is locked. Log in again to change your password.')
+                return
+
+            # Verify current password, hash the new one and re-wrap the data key
+            # on a worker thread
+            self.btn.setEnabled(False)
+            worker = TaskWorker(verify_and_rehash, current_password, new_password, stored_hash,
+                                key_session.data_key, key_session.previous_key,
+                                key_session.retired_keys, kdf_params(), parent=self)
+            worker.succeeded.connect(lambda result: self.save_password(user_id, result))
+            worker.failed.connect(self.on_hash_failed)
+            self.hash_worker = worker
+            worker.start()
+
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, 'Database Error',
+                              f"Database error: {str(e)}")
+        except Exception as e:
+            QMessageBox.warning(self, 'Error',
+                              f"An error occurred: {str(e)}")
+
+    def save_password(self, user_id, result):
+        self.btn.setEnabled(True)
+        if result is None:
+            QMessageBox.warning(self, 'Error', 'Current password is incorrect!')
+            return
 
-            # Update password in database
-            cursor.execute("UPDATE users SET password=? WHERE id=?",
-                         (hashed_new, user_id))
-            conn.commit()
+        try:
+            # Update password and wrapped data key in one transaction
+            hashed_new, key_record = result
+            vault.change_master_password(user_id, hashed_new, key_record)
 
             QMessageBox.information(self, 'Success',
                                   "Your password has been changed successfully!")
@@ -397,41 +469,11 @@ class Change_passwd(QDialog):
         except sqlite3.Error as e:
             QMessageBox.warning(self, 'Database Error',
                               f"Database error: {str(e)}")
-            if 'conn' in locals():
-                conn.rollback()
-        except Exception as e:
-            QMessageBox.warning(self, 'Error',
-                              f"An error occurred: {str(e)}")
-            if 'conn' in locals():
-                conn.rollback()
-        finally:
-            if 'conn' in locals():
-                conn.close()
-
-
-# Helper function to check password strength
-def check_password_strength(password):
-    """
-    Check password strength and return a score from 0-4
-    0: Very Weak, 1: Weak, 2: Medium, 3: Strong, 4: Very Strong
-    """
-    score = 0
-    
-    # Length check
-    if len(password) >= 8:
-        score += 1
-    if len(password) >= 12:
-        score += 1
-        
-    # Complexity checks
-    if any(c.islower() for c in password) and any(c.isupper() for c in password):
-        score += 1
-    if any(c.isdigit() for c in password):
-        score += 1
-    if any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?/" for c in password):
-        score += 1
-        
-    return min(4, score)
+
+    def on_hash_failed(self, error):
+        self.btn.setEnabled(True)
+        QMessageBox.warning(self, 'Error', f"An error occurred: {error}")
+
 
 class Add_Password(QDialog):
     def __init__(self, username, parent=None):
@@ -574,15 +616,8 @@ class Add_Password(QDialog):
                 return
 
             # 2. Save to database
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
             try:
-                cursor.execute('''
-                    INSERT INTO passwords (website, username, password, user_id)
-                    VALUES (?, ?, ?, ?)
-                ''', (website, entry_username, encrypted_password, user_id))
-                conn.commit()
+                vault.add_entry(user_id, website, entry_username, encrypted_password)
 
                 QMessageBox.information(self, 'Success',
                                         'Password saved successfully!')
@@ -591,21 +626,13 @@ class Add_Password(QDialog):
             except sqlite3.IntegrityError:
                 QMessageBox.warning(self, 'Duplicate Entry',
                                     'This website/username combination already exists for your account!')
-                conn.rollback()
 
         except sqlite3.Error as e:
             QMessageBox.critical(self, 'Database Error',
                                  f'Database error: {str(e)}')
-            if 'conn' in locals():
-                conn.rollback()
         except Exception as e:
             QMessageBox.critical(self, 'Error',
                                  f'An unexpected error occurred: {str(e)}')
-            if 'conn' in locals():
-                conn.rollback()
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
 class Delete_Password(QDialog):
     def __init__(self, username, parent=None):
@@ -676,17 +703,8 @@ class Delete_Password(QDialog):
             return
         
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
             # Fetch all passwords for this user
-            cursor.execute('''
-                SELECT website, username FROM passwords
-                WHERE user_id = ?
-                ORDER BY website
-            ''', (user_id,))
-            
-            passwords = cursor.fetchall()
+            passwords = vault.list_entries(user_id)
             
             if not passwords:
                 QMessageBox.information(self, 'No Passwords', 'You have not saved any passwords yet.')
@@ -708,9 +726,6 @@ class Delete_Password(QDialog):
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'An unexpected error occurred: {str(e)}')
             self.close()
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
     def delete_password(self):
         website = self.website_input.text().strip()
@@ -738,18 +753,10 @@ class Delete_Password(QDialog):
             return
             
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
             # Delete the password
-            cursor.execute('''
-                DELETE FROM passwords 
-                WHERE user_id = ? AND website = ? AND username = ?
-            ''', (user_id, website, username))
+            deleted = vault.delete_entry(user_id, website, username)
             
-            conn.commit()
-            
-            if cursor.rowcount == 0:
+            if deleted == 0:
                 QMessageBox.warning(self, 'Not Found', 
                                    f'No password found for {website} with username {username}.')
                 return
@@ -767,9 +774,124 @@ class Delete_Password(QDialog):
             QMessageBox.critical(self, 'Database Error', f'Error deleting password: {str(e)}')
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'An unexpected error occurred: {str(e)}')
-        finally:
-            if 'conn' in locals():
-                conn.close()
+
+class Password_Audit(QDialog):
+    """Vault health report: weak, reused and old passwords"""
+    
+    MAX_ITEMS_PER_SECTION = 500
+    
+    def __init__(self, username, parent=None):
+        super().__init__(parent)
+        self.user_id = get_user_id(username)
+        self.worker = None
+        
+        self.setWindowTitle('Password Health Audit')
+        self.resize(600, 450)
+        
+        layout = QVBoxLayout(self)
+        title = QLabel('Password Health Audit')
+        title.setFont(QFont('Arial', 16, QFont.Weight.Bold))
+        layout.addWidget(title)
+        
+        self.summary_label = QLabel('Auditing your passwords...')
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        self.progress_bar = QProgressBar()
+        layout.addWidget(self.progress_bar)
+        
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(['Website', 'Username', 'Details'])
+        layout.addWidget(self.tree)
+        
+        button_layout = QHBoxLayout()
+        refresh_btn = QPushButton('Re-run Audit')
+        refresh_btn.clicked.connect(lambda: self.start_audit(force=True))
+        close_btn = QPushButton('Close')
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(refresh_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        
+        self.start_audit()
+    
+    def start_audit(self, force=False):
+        """Show the cached report for this vault revision, or audit in the background"""
+        if self.worker is not None and self.worker.isRunning():
+            return
+        try:
+            revision = vault.get_revision(self.user_id)
+            report = None if force else audit_cache.get(self.user_id, revision)
+            if report is not None:
+                self.show_report(report)
+                return
+            total = vault.count_entries(self.user_id)
+            cipher = key_session.cipher()
+        except Exception as e:
+            self.summary_label.setText(f'Could not start the audit: {str(e)}')
+            return
+        
+        self.tree.clear()
+        self.summary_label.setText('Auditing your passwords...')
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        
+        worker = AuditWorker(vault, self.user_id,
+                             lambda token: decrypt_password(token, cipher), parent=self)
+        worker.progress.connect(lambda done, total: self.progress_bar.setValue(done))
+        worker.completed.connect(self.on_audit_completed)
+        worker.failed.connect(lambda error: self.summary_label.setText(f'Audit failed: {error}'))
+        self.worker = worker
+        worker.start()
+    
+    def on_audit_completed(self, revision, report):
+        audit_cache.put(self.user_id, revision, report)
+        self.show_report(report)
+    
+    def show_report(self, report):
+        """Fill the tree with the sections of a report"""
+        self.progress_bar.setVisible(False)
+        self.tree.clear()
+        
+        reused_count = sum(len(group) for group in report['reused'])
+        strength = ', '.join(f'{label}: {count}'
+                             for label, count in zip(STRENGTH_LABELS, report['strength']))
+        unknown_age = report['unknown_age']
+        self.summary_label.setText(
+            f"{report['total']} passwords audited. {len(report['weak'])} weak, "
+            f"{reused_count} reused, {len(report['old'])} older than a year, "
+            f"{len(unknown_age)} of unknown age.\n{strength}"
+        )
+        
+        weak = self.add_section(f"Weak passwords ({len(report['weak'])})", report['weak'],
+                                lambda entry: STRENGTH_LABELS[entry['score']])
+        weak.setExpanded(True)
+        
+        reused = QTreeWidgetItem(self.tree, [f"Reused passwords ({len(report['reused'])} groups)"])
+        for group in report['reused'][:self.MAX_ITEMS_PER_SECTION]:
+            self.add_section(f'Shared by {len(group)} entries', group,
+                             lambda entry: STRENGTH_LABELS[entry['score']], parent=reused)
+        reused.setExpanded(True)
+        
+        self.add_section(f"Old passwords ({len(report['old'])})", report['old'],
+                         lambda entry: f"last changed {entry['age_days']} days ago")
+        if unknown_age:
+            self.add_section(f"Unknown age ({len(unknown_age)})", unknown_age,
+                             lambda entry: 'last changed: unknown')
+        if report['failed']:
+            self.add_section(f"Could not decrypt ({len(report['failed'])})", report['failed'],
+                             lambda entry: 'decryption failed')
+        self.tree.resizeColumnToContents(0)
+    
+    def add_section(self, title, entries, details, parent=None):
+        section = QTreeWidgetItem(parent or self.tree, [title])
+        for entry in entries[:self.MAX_ITEMS_PER_SECTION]:
+            QTreeWidgetItem(section, [entry['website'], entry['username'], details(entry)])
+        if len(entries) > self.MAX_ITEMS_PER_SECTION:
+            QTreeWidgetItem(section, [f'... and {len(entries) - self.MAX_ITEMS_PER_SECTION} more'])
+        return section
+
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self):
@@ -779,6 +901,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.setWindowIcon(QIcon('icon.png'))
         self.setFixedSize(380, 500)
         self.current_username = None
+        self.import_worker = None  # Background restore or CSV import job, if any
+        self.import_title = 'Restore'
+        self.preview_worker = None
+        self.rekey_worker = None  # Background re-encryption job, if any
+        self.rotate_worker = None
+        self.calibration_worker = None
 
         # Store the original central widget before replacement
         self.original_central_widget = self.centralWidget()
@@ -803,6 +931,21 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 # ----------------------------------------------------------------------------------------
 
         self.setup_auth_system()
+        self.calibrate_kdf()
+        
+        # Lock the vault after a period without use
+        self.idle_timer = QTimer(self)
+        self.idle_timer.timeout.connect(self.check_idle)
+        self.idle_timer.start(IDLE_CHECK_INTERVAL_MS)
+        
+    def calibrate_kdf(self):
+        """Pick master password hashing costs for this machine on first run"""
+        if vault.get_setting(KDF_SETTING) is not None:
+            return
+        worker = TaskWorker(credentials.calibrate, parent=self)
+        worker.succeeded.connect(lambda params: vault.set_setting(KDF_SETTING, params))
+        self.calibration_worker = worker
+        worker.start()
         
     def create_menu_bar(self):
         """Create menu bar with additional options"""
@@ -819,10 +962,29 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         restore_action = file_menu.addAction('Restore Passwords')
         restore_action.triggered.connect(self.restore_passwords)
         
+        # CSV import action
+        import_action = file_menu.addAction('Import from CSV')
+        import_action.triggered.connect(self.import_csv)
+        
+        # Re-key action
+        rotate_action = file_menu.addAction('Rotate Vault Key')
+        rotate_action.triggered.connect(self.rotate_vault_key)
+        
+        # Lock action
+        lock_action = file_menu.addAction('Lock Vault')
+        lock_action.triggered.connect(self.lock_vault)
+        
         # Exit action
         exit_action = file_menu.addAction('Exit')
         exit_action.triggered.connect(self.close)
         
+        # Tools menu
+        tools_menu = menubar.addMenu('Tools')
+        
+        # Audit action
+        audit_action = tools_menu.addAction('Password Health Audit')
+        audit_action.triggered.connect(self.audit_passwords)
+        
         # Help menu
         help_menu = menubar.addMenu('Help')
         
@@ -843,42 +1005,27 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             return
             
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Fetch all passwords for this user
-            cursor.execute('''
-                SELECT website, username, password FROM passwords
-                WHERE user_id = ?
-            ''', (user_id,))
-            
-            passwords = cursor.fetchall()
-            
-            if not passwords:
+            if not vault.count_entries(user_id):
                 QMessageBox.information(self, 'No Passwords', 
                                       'You have no passwords to backup.')
                 return
                 
-            # Create backup data
-            backup_data = {
-                'username': self.current_username,
-                'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'passwords': []
-            }
+            # The backup key is derived from its own password, so the file does
+            # not depend on the vault key or on users.db
+            backup_password = self.ask_backup_password(confirm=True)
+            if backup_password is None:
+                return
+                
+            failed_sites = []
+            cipher = key_session.cipher()
             
-            # Add passwords to backup
-            for website, username, encrypted_password in passwords:
-                try:
-                    # Decrypt for backup
-                    decrypted_password = decrypt_password(encrypted_password)
-                    backup_data['passwords'].append({
-                        'website': website,
-                        'username': username,
-                        'password': decrypted_password
-                    })
-                except Exception as e:
-                    QMessageBox.warning(self, 'Decryption Error', 
-                                      f'Could not decrypt password for {website}: {str(e)}')
+            def decrypted_entries():
+                # Stream rows from the cursor and decrypt them one at a time
+                for website, username, encrypted_password in vault.iter_entries_with_secrets(user_id):
+                    try:
+                        yield website, username, decrypt_password(encrypted_password, cipher)
+                    except Exception:
+                        failed_sites.append(website)
             
             # Create backup directory if it doesn't exist
             if not os.path.exists('backups'):
@@ -886,20 +1033,46 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 
             # Create backup filename with timestamp
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_file = f'backups/passwords_{self.current_username}_{timestamp}.json'
+            backup_file = f'backups/passwords_{self.current_username}_{timestamp}{BACKUP_EXTENSION}'
             
-            # Write backup file
-            with open(backup_file, 'w') as f:
-                json.dump(backup_data, f, indent=4)
-                
-            QMessageBox.information(self, 'Backup Complete', 
-                                  f'Passwords backed up to {backup_file}')
+            # Write encrypted, chunked backup file
+            manifest = write_backup(backup_file, decrypted_entries(), backup_password,
+                                    self.current_username, kdf_params())
+            
+            message = f'{manifest["entries"]} passwords backed up to {backup_file}'
+            if failed_sites:
+                message += (f'\n\nCould not decrypt {len(failed_sites)} passwords: '
+                            f'{", ".join(failed_sites[:10])}')
+            QMessageBox.information(self, 'Backup Complete', message)
             
         except Exception as e:
             QMessageBox.critical(self, 'Backup Error', f'Error backing up passwords: {str(e)}')
-        finally:
-            if 'conn' in locals():
-                conn.close()
+    
+    def ask_backup_password(self, confirm=False):
+        """Ask for the password of a backup file
+        
+        Args:
+            confirm (bool): Ask twice (when creating a backup)
+            
+        Returns:
+            str: The password, or None if the user canceled
+        """
+        prompt = ('Enter a password for this backup.\n'
+                  'You will need it to restore the backup.' if confirm
+                  else 'Enter the backup password:')
+        password, ok = QInputDialog.getText(self, 'Backup Password', prompt,
+                                            QLineEdit.EchoMode.Password)
+        if not ok or not password:
+            return None
+        if confirm:
+            repeated, ok = QInputDialog.getText(self, 'Backup Password', 'Confirm the backup password:',
+                                                QLineEdit.EchoMode.Password)
+            if not ok:
+                return None
+            if repeated != password:
+                QMessageBox.warning(self, 'Backup Password', 'The passwords do not match.')
+                return None
+        return password
     
     def restore_passwords(self):
         """Restore passwords from a backup file"""
@@ -910,28 +1083,46 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # Get backup file path
         from PyQt6.QtWidgets import QFileDialog
         backup_file, _ = QFileDialog.getOpenFileName(
-            self, 'Select Backup File', 'backups', 'JSON Files (*.json)'
+            self, 'Select Backup File', 'backups',
+            f'Backup Files (*{BACKUP_EXTENSION} *.json);;All Files (*)'
         )
         
         if not backup_file:
             return  # User canceled
             
         try:
-            # Read backup file
-            with open(backup_file, 'r') as f:
-                backup_data = json.load(f)
-                
-            # Verify backup format
-            if not all(key in backup_data for key in ['username', 'created_at', 'passwords']):
-                QMessageBox.critical(self, 'Invalid Backup', 
-                                   'The selected file is not a valid backup file.')
-                return
+            version = backup_version(backup_file)
+            if version is not None:
+                # Streaming backup: only the header and manifest are read here
+                if version == FORMAT_VERSION:
+                    backup_password = self.ask_backup_password()
+                    if backup_password is None:
+                        return
+                    reader = BackupReader(backup_file, backup_password)
+                else:
+                    # Version 1 backups were encrypted with a vault key (or the legacy key)
+                    reader = BackupReader(backup_file,
+                                          legacy_cipher=key_session.restore_cipher(legacy_cipher))
+                backup_username, entries, total = reader.username, reader, len(reader)
+            else:
+                # Legacy plaintext JSON backup
+                with open(backup_file, 'r') as f:
+                    backup_data = json.load(f)
+                    
+                # Verify backup format
+                if not all(key in backup_data for key in ['username', 'created_at', 'passwords']):
+                    QMessageBox.critical(self, 'Invalid Backup', 
+                                       'The selected file is not a valid backup file.')
+                    return
+                backup_username = backup_data['username']
+                entries = backup_data['passwords']
+                total = len(entries)
                 
             # Verify username
-            if backup_data['username'] != self.current_username:
+            if backup_username != self.current_username:
                 confirm = QMessageBox.question(
                     self, 'Username Mismatch',
-                    f'This backup is for user "{backup_data["username"]}" but you are logged in as '
+                    f'This backup is for user "{backup_username}" but you are logged in as '
                     f'"{self.current_username}". Continue anyway?',
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
                 )
@@ -944,54 +1135,223 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 QMessageBox.warning(self, 'Error', 'User not found in database.')
                 return
                 
-            # Restore passwords
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            restored_count = 0
-            skipped_count = 0
-            
-            for item in backup_data['passwords']:
-                website = item['website']
-                username = item['username']
-                password = item['password']
-                
-                # Check if password already exists
-                cursor.execute('''
-                    SELECT id FROM passwords 
-                    WHERE user_id = ? AND website = ? AND username = ?
-                ''', (user_id, website, username))
-                
-                if cursor.fetchone():
-                    skipped_count += 1
-                    continue
-                    
-                # Encrypt and store password
-                try:
-                    encrypted_password = encrypt_password(password)
-                    
-                    cursor.execute('''
-                        INSERT INTO passwords (website, username, password, user_id)
-                        VALUES (?, ?, ?, ?)
-                    ''', (website, username, encrypted_password, user_id))
-                    
-                    restored_count += 1
-                except Exception as e:
-                    QMessageBox.warning(self, 'Encryption Error',
-                                      f'Could not encrypt password for {website}: {str(e)}')
-            
-            conn.commit()
-            conn.close()
-            
-            QMessageBox.information(self, 'Restore Complete',
-                                  f'Restored {restored_count} passwords. '
-                                  f'Skipped {skipped_count} existing passwords.')
+            # Encrypt and store the passwords on a worker thread
+            self.start_bulk_import(user_id, entries, total)
             
+        except BackupFormatError as e:
+            QMessageBox.critical(self, 'Invalid Backup', str(e))
         except json.JSONDecodeError:
             QMessageBox.critical(self, 'Invalid File', 'The selected file is not a valid JSON file.')
         except Exception as e:
             QMessageBox.critical(self, 'Restore Error', f'Error restoring passwords: {str(e)}')
     
+    def import_csv(self):
+        """Import passwords from a browser or password manager CSV export"""
+        if not self.current_username or not key_session.is_unlocked:
+            QMessageBox.warning(self, 'Error', 'You must be logged in to import passwords.')
+            return
+        if self.import_running():
+            return
+            
+        from PyQt6.QtWidgets import QFileDialog
+        csv_file, _ = QFileDialog.getOpenFileName(
+            self, 'Select CSV Export', '', f'CSV Files (*{CSV_EXTENSION});;All Files (*)'
+        )
+        if not csv_file:
+            return  # User canceled
+            
+        user_id = get_user_id(self.current_username)
+        if not user_id:
+            QMessageBox.warning(self, 'Error', 'User not found in database.')
+            return
+            
+        try:
+            reader = CsvImportReader(csv_file)
+        except (CsvImportError, OSError) as e:
+            QMessageBox.critical(self, 'Import Error', str(e))
+            return
+            
+        # Dry run first: count new, existing and unusable rows without writing
+        worker = ImportPreviewWorker(vault, user_id, reader, parent=self)
+        worker.completed.connect(lambda preview: self.confirm_csv_import(user_id, reader, preview))
+        worker.failed.connect(lambda error: QMessageBox.critical(
+            self, 'Import Error', f'Error reading {os.path.basename(csv_file)}: {error}'))
+        self.preview_worker = worker
+        worker.start()
+    
+    def confirm_csv_import(self, user_id, reader, preview):
+        """Show the dry-run counts and start the import if confirmed"""
+        message = (f'Rows in file: {preview["rows"]}\n'
+                   f'New passwords: {preview["new"]}\n'
+                   f'Already in your vault: {preview["existing"]}\n'
+                   f'Duplicate rows: {preview["duplicates"]}\n'
+                   f'Rows without a website or password: {preview["invalid"]}')
+        if not preview['new']:
+            QMessageBox.information(self, 'Import from CSV', message + '\n\nNothing to import.')
+            return
+        confirm = QMessageBox.question(
+            self, 'Import from CSV', message + f'\n\nImport {preview["new"]} new passwords?',
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
+        # Commit batch by batch: an interrupted import can simply be run again
+        self.start_bulk_import(user_id, reader, preview['rows'] - preview['invalid'],
+                               title='Import', atomic=False)
+    
+    def import_running(self):
+        """Warn and return True while a restore or import is still running"""
+        if self.import_worker is not None and self.import_worker.isRunning():
+            QMessageBox.warning(self, self.import_title,
+                                f'A {self.import_title.lower()} is already in progress.')
+            return True
+        return False
+    
+    def start_bulk_import(self, user_id, items, total=None, title='Restore', atomic=True):
+        """Import entries in the background while showing a progress dialog"""
+        if self.import_running():
+            return
+        
+        total = len(items) if total is None else total
+        label = 'Restoring passwords...' if title == 'Restore' else 'Importing passwords...'
+        progress = QProgressDialog(label, None, 0, max(total, 1), self)
+        progress.setWindowTitle(title)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(500)
+        
+        cipher = key_session.cipher()
+        worker = BulkImportWorker(vault, user_id, items,
+                                  lambda password: encrypt_password(password, cipher),
+                                  total, atomic=atomic, parent=self)
+        worker.progress.connect(lambda done, total: progress.setValue(done))
+        worker.completed.connect(self.on_import_completed)
+        worker.failed.connect(self.on_import_failed)
+        worker.finished.connect(progress.close)
+        self.import_worker = worker
+        self.import_title = title
+        worker.start()
+    
+    def on_import_completed(self, restored_count, skipped_count, errors):
+        """Summarize a finished restore"""
+        verb = 'Restored' if self.import_title == 'Restore' else 'Imported'
+        message = (f'{verb} {restored_count} passwords. '
+                   f'Skipped {skipped_count} existing passwords.')
+        items = self.import_worker.items if self.import_worker is not None else None
+        if isinstance(items, CsvImportReader) and items.invalid:
+            message += f'\n\nIgnored {items.invalid} rows without a website or password.'
+        if errors:
+            failed_sites = ', '.join(website for website, _ in errors[:10])
+            message += f'\n\nCould not encrypt {len(errors)} passwords: {failed_sites}'
+            if len(errors) > 10:
+                message += ', ...'
+        QMessageBox.information(self, f'{self.import_title} Complete', message)
+    
+    def on_import_failed(self, error):
+        """Report a restore or import that was rolled back"""
+        QMessageBox.critical(self, f'{self.import_title} Error',
+                             f'Error saving passwords: {error}')
+    
+    def rotate_vault_key(self):
+        """Replace the data key and re-encrypt every password with the new one"""
+        if not self.current_username or not key_session.is_unlocked:
+            QMessageBox.warning(self, 'Error', 'You must be logged in to rotate the vault key.')
+            return
+        if self.rekey_worker is not None and self.rekey_worker.isRunning():
+            QMessageBox.warning(self, 'Rotate Vault Key', 'Re-encryption is already in progress.')
+            return
+        if key_session.previous_key:
+            # An earlier rotation has not finished yet; finish it first
+            self.start_rekey()
+            return
+            
+        password, ok = QInputDialog.getText(
+            self, 'Rotate Vault Key', 'Enter your master password:',
+            QLineEdit.EchoMode.Password
+        )
+        if not ok or not password:
+            return
+            
+        stored_hash = vault.get_password_hash(self.current_username)
+        worker = TaskWorker(verify_and_rotate, password, stored_hash, key_session.data_key,
+                            key_session.retired_keys, kdf_params(), parent=self)
+        worker.succeeded.connect(self.on_key_rotated)
+        worker.failed.connect(lambda error: QMessageBox.critical(
+            self, 'Rotate Vault Key', f'Could not rotate the vault key: {error}'))
+        self.rotate_worker = worker
+        worker.start()
+    
+    def on_key_rotated(self, result):
+        if result is None:
+            QMessageBox.warning(self, 'Rotate Vault Key', 'Incorrect master password.')
+            return
+        new_key, key_record = result
+        user_id = key_session.user_id
+        try:
+            vault.save_user_key(user_id, key_record, restart_rekey=True)
+            legacy_rows = vault.get_user_key(user_id)['legacy_rows']
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, 'Rotate Vault Key', f'Could not store vault key: {str(e)}')
+            return
+        # New rows use the new key right away; old rows stay readable until migrated
+        key_session.open(user_id, new_key, key_session.data_key,
+                         legacy_cipher if legacy_rows else None, key_session.retired_keys)
+        self.start_rekey()
+    
+    def start_rekey(self):
+        """Re-encrypt rows still using a previous or legacy key in the background"""
+        user_id = key_session.user_id
+        key_record = vault.get_user_key(user_id)
+        if not key_record or not (key_record['legacy_rows'] or key_record['previous_wrapped_key']):
+            return
+        if self.rekey_worker is not None and self.rekey_worker.isRunning():
+            return
+            
+        worker = RekeyWorker(vault, user_id, key_session.rekey_cipher(),
+                             key_record['rekey_after_id'], parent=self)
+        worker.progress.connect(lambda done, total: self.statusBar().showMessage(
+            f'Re-encrypting passwords... {done}/{total}'))
+        worker.completed.connect(self.on_rekey_completed)
+        worker.failed.connect(lambda error: self.statusBar().showMessage(
+            f'Re-encryption stopped: {error}. It will resume on the next login.'))
+        self.rekey_worker = worker
+        worker.start()
+    
+    def on_rekey_completed(self, count):
+        # Every row now uses the current data key; the previous one is only kept
+        # (retired) for restoring old backups
+        if key_session.is_unlocked:
+            retired_keys = key_session.retired_keys
+            if key_session.previous_key:
+                retired_keys = retired_keys + [key_session.previous_key]
+            key_session.open(key_session.user_id, key_session.data_key,
+                             retired_keys=retired_keys)
+        self.statusBar().showMessage(f'Re-encrypted {count} passwords with your vault key.', 5000)
+    
+    def check_idle(self):
+        """Lock the vault when it has not been used for a while"""
+        # Every job (restore, re-key, rotation, audit, ...) runs on a QThread
+        # parented to this window or one of its dialogs
+        busy = any(worker.isRunning() for worker in self.findChildren(QThread))
+        if key_session.idle_expired() and not busy:
+            # Close windows that show vault contents before returning to the login page
+            for dialog in self.findChildren(VaultViewDialog) + self.findChildren(Password_Audit):
+                dialog.reject()
+            self.lock_vault()
+            QMessageBox.information(self, 'Vault Locked',
+                                    'Your vault was locked after a period of inactivity.')
+    
+    def lock_vault(self):
+        """Forget the data key and return to the login page"""
+        if not self.current_username:
+            return
+        key_session.lock()
+        audit_cache.clear()
+        vault.close_session()
+        self.current_username = None
+        self.original_central_widget.setVisible(False)
+        self.login_page.password_input.clear()
+        self.stack.setCurrentIndex(0)
+    
     def show_about(self):
         """Show about dialog"""
         QMessageBox.about(self, 'About Password Manager',
@@ -1020,18 +1380,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             QMessageBox.warning(self, 'Error', 'You must be logged in to search passwords.')
             return
             
-        # Get search term
-        search_term, ok = QInputDialog.getText(
-            self, 'Search Passwords', 
-            'Enter website or username to search:',
-            QLineEdit.EchoMode.Normal
-        )
-        
-        if not ok or not search_term.strip():
-            return
-            
-        search_term = search_term.strip()
-        
         # Get user ID first
         user_id = get_user_id(self.current_username)
         if not user_id:
@@ -1039,66 +1387,16 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             return
             
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Search for passwords
-            cursor.execute('''
-                SELECT website, username, password FROM passwords
-                WHERE user_id = ? AND (website LIKE ? OR username LIKE ?)
-                ORDER BY website
-            ''', (user_id, f'%{search_term}%', f'%{search_term}%'))
-            
-            passwords = cursor.fetchall()
-            
-            if not passwords:
-                QMessageBox.information(self, 'No Results', 
-                                       f'No passwords found matching "{search_term}".')
-                return
-                
-            # Create a dialog to display search results
-            dialog = QDialog(self)
-            dialog.setWindowTitle('Search Results')
-            dialog.setFixedSize(600, 400)
-            
-            layout = QVBoxLayout(dialog)
-            
-            # Create text area to display passwords
-            text_area = QTextEdit()
-            text_area.setReadOnly(True)
-            
-            # Format and display passwords
-            text_content = f"<h2>Search Results for '{search_term}'</h2><hr>"
-            
-            for website, username, encrypted_password in passwords:
-                try:
-                    # Decrypt the password
-                    decrypted_password = decrypt_password(encrypted_password)
-                    text_content += f"<p><b>Website:</b> {website}<br>"
-                    text_content += f"<b>Username:</b> {username}<br>"
-                    text_content += f"<b>Password:</b> {decrypted_password}</p><hr>"
-                except Exception as e:
-                    text_content += f"<p><b>Website:</b> {website}<br>"
-                    text_content += f"<b>Username:</b> {username}<br>"
-                    text_content += f"<b>Password:</b> [Error decrypting: {str(e)}]</p><hr>"
-            
-            text_area.setHtml(text_content)
-            layout.addWidget(text_area)
-            
-            # Add close button
-            close_btn = QPushButton('Close')
-            close_btn.clicked.connect(dialog.close)
-            layout.addWidget(close_btn)
-            
+            # Results update as the user types in the search box
+            dialog = VaultViewDialog(vault, user_id, decrypt_password, 'Search Passwords',
+                                     parent=self)
+            dialog.search_input.setFocus()
             dialog.exec()
             
         except sqlite3.Error as e:
             QMessageBox.critical(self, 'Database Error', f'Error searching database: {str(e)}')
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'An unexpected error occurred: {str(e)}')
-        finally:
-            if 'conn' in locals():
-                conn.close()
     
     def view_passwords(self):
         if not self.current_username:
@@ -1112,65 +1410,28 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             return
             
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Fetch all passwords for this user
-            cursor.execute('''
-                SELECT website, username, password FROM passwords
-                WHERE user_id = ?
-                ORDER BY website
-            ''', (user_id,))
-            
-            passwords = cursor.fetchall()
+            # Passwords are paged in and decrypted only when revealed
+            dialog = VaultViewDialog(vault, user_id, decrypt_password, 'Your Saved Passwords',
+                                     parent=self)
             
-            if not passwords:
+            if not dialog.model.rowCount():
                 QMessageBox.information(self, 'No Passwords', 'You have not saved any passwords yet.')
                 return
                 
-            # Create a dialog to display passwords
-            dialog = QDialog(self)
-            dialog.setWindowTitle('Your Saved Passwords')
-            dialog.setFixedSize(600, 400)
-            
-            layout = QVBoxLayout(dialog)
-            
-            # Create text area to display passwords
-            text_area = QTextEdit()
-            text_area.setReadOnly(True)
-            
-            # Format and display passwords
-            text_content = "<h2>Your Saved Passwords</h2><hr>"
-            
-            for website, username, encrypted_password in passwords:
-                try:
-                    # Decrypt the password
-                    decrypted_password = decrypt_password(encrypted_password)
-                    text_content += f"<p><b>Website:</b> {website}<br>"
-                    text_content += f"<b>Username:</b> {username}<br>"
-                    text_content += f"<b>Password:</b> {decrypted_password}</p><hr>"
-                except Exception as e:
-                    text_content += f"<p><b>Website:</b> {website}<br>"
-                    text_content += f"<b>Username:</b> {username}<br>"
-                    text_content += f"<b>Password:</b> [Error decrypting: {str(e)}]</p><hr>"
-            
-            text_area.setHtml(text_content)
-            layout.addWidget(text_area)
-            
-            # Add close button
-            close_btn = QPushButton('Close')
-            close_btn.clicked.connect(dialog.close)
-            layout.addWidget(close_btn)
-            
             dialog.exec()
             
         except sqlite3.Error as e:
             QMessageBox.critical(self, 'Database Error', f'Error accessing database: {str(e)}')
         except Exception as e:
             QMessageBox.critical(self, 'Error', f'An unexpected error occurred: {str(e)}')
-        finally:
-            if 'conn' in locals():
-                conn.close()
+
+    def audit_passwords(self):
+        if not self.current_username:
+            QMessageBox.warning(self, 'Error', 'You must be logged in to audit passwords.')
+            return
+            
+        dialog = Password_Audit(self.current_username, self)
+        dialog.exec()
 
     def delete_password(self):
         if not self.current_username:
@@ -1202,6 +1463,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def on_login_success(self, username):
         self.current_username = username  # Store the username
+        vault.open_session(username)  # Cache the user id for this session
+        self.start_rekey()  # Finish migrating rows from an older key, if any
         QMessageBox.information(self, 'Welcome', f'Hello {username}!\nYou have successfully logged in.')
         # Show main page and hide authentication pages
         self.original_central_widget.setVisible(True)
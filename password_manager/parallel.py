@@ -0,0 +1,23 @@
+"""
+Thread-pool helpers for the Password Manager's bulk jobs.
+"""
+
+from collections import deque
+from itertools import islice
+
+
+def imap_bounded(pool, func, iterable, window):
+    """Like Executor.map, but never has more than window tasks in flight.
+
+    Results are yielded in input order. Executor.map submits the whole
+    iterable up front; this pulls from it only as results are consumed.
+    """
+    pending = deque()
+    iterator = iter(iterable)
+    for item in islice(iterator, window):
+        pending.append(pool.submit(func, item))
+    while pending:
+        result = pending.popleft().result()
+        for item in islice(iterator, 1):
+            pending.append(pool.submit(func, item))
+        yield result
@@ -0,0 +1,641 @@
+"""
+Data access layer for the Password Manager.
+
+Owns the SQLite connections and every query the application runs.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DATABASE_NAME = 'users.db'
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        age INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS passwords(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        website TEXT NOT NULL,
+        username TEXT NOT NULL,
+        password TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        updated_at INTEGER,
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        UNIQUE(website, username, user_id)
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS idx_passwords_user_website
+    ON passwords(user_id, website, id)
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS user_keys(
+        user_id INTEGER PRIMARY KEY,
+        wrapped_key TEXT NOT NULL,
+        previous_wrapped_key TEXT,
+        retired_wrapped_keys TEXT,
+        key_salt TEXT NOT NULL,
+        key_params TEXT NOT NULL,
+        legacy_rows INTEGER NOT NULL DEFAULT 0,
+        rekey_after_id INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS vault_revisions(
+        user_id INTEGER PRIMARY KEY,
+        revision INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS settings(
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    ''',
+]
+
+# Any change to a user's passwords bumps their vault revision, which keys
+# cached results such as the password audit
+REVISION_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS passwords_revision_{name} AFTER {event} ON passwords BEGIN
+        INSERT OR IGNORE INTO vault_revisions (user_id) VALUES ({row}.user_id);
+        UPDATE vault_revisions SET revision = revision + 1 WHERE user_id = {row}.user_id;
+    END
+    '''.format(name=event.lower(), event=event, row=row)
+    for event, row in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old'))
+]
+
+# Trigram full-text index over website/username, kept in sync by triggers.
+# External content: the index stores no copy of the rows themselves.
+FTS_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS passwords_fts_insert AFTER INSERT ON passwords BEGIN
+        INSERT INTO passwords_fts(rowid, website, username)
+        VALUES (new.id, new.website, new.username);
+    END
+'''
+FTS_SCHEMA = [
+    '''
+    CREATE VIRTUAL TABLE passwords_fts USING fts5(
+        website, username,
+        content='passwords', content_rowid='id', tokenize='trigram'
+    )
+    ''',
+    FTS_INSERT_TRIGGER,
+    '''
+    CREATE TRIGGER IF NOT EXISTS passwords_fts_delete AFTER DELETE ON passwords BEGIN
+        INSERT INTO passwords_fts(passwords_fts, rowid, website, username)
+        VALUES ('delete', old.id, old.website, old.username);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS passwords_fts_update AFTER UPDATE OF website, username ON passwords BEGIN
+        INSERT INTO passwords_fts(passwords_fts, rowid, website, username)
+        VALUES ('delete', old.id, old.website, old.username);
+        INSERT INTO passwords_fts(rowid, website, username)
+        VALUES (new.id, new.website, new.username);
+    END
+    ''',
+    # Index rows that existed before the search index was added
+    "INSERT INTO passwords_fts(passwords_fts) VALUES ('rebuild')",
+]
+
+# Trigram matching needs at least this many characters
+MIN_FTS_TERM_LENGTH = 3
+# Matches ranked per search; broader terms should be narrowed by typing more
+MAX_SEARCH_RESULTS = 1000
+# Values bound per IN (...) lookup, below the 999 variable limit of older SQLite builds
+MAX_QUERY_PARAMS = 500
+
+# Statements are kept as constants so sqlite3's statement cache reuses
+# the prepared form on every call.
+SQL_USER_ID = 'SELECT id FROM users WHERE username=?'
+SQL_USER_HASH = 'SELECT password FROM users WHERE username=?'
+SQL_INSERT_USER = 'INSERT INTO users (username, password, age) VALUES (?, ?, ?)'
+SQL_UPDATE_USER_HASH = 'UPDATE users SET password=? WHERE id=?'
+SQL_GET_SETTING = 'SELECT value FROM settings WHERE key=?'
+SQL_SET_SETTING = 'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)'
+SQL_GET_USER_KEY = '''
+    SELECT wrapped_key, previous_wrapped_key, retired_wrapped_keys, key_salt, key_params,
+           legacy_rows, rekey_after_id
+    FROM user_keys WHERE user_id = ?
+'''
+SQL_SAVE_USER_KEY = '''
+    INSERT INTO user_keys (user_id, wrapped_key, previous_wrapped_key, retired_wrapped_keys,
+                           key_salt, key_params, legacy_rows)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        wrapped_key = excluded.wrapped_key,
+        previous_wrapped_key = excluded.previous_wrapped_key,
+        retired_wrapped_keys = excluded.retired_wrapped_keys,
+        key_salt = excluded.key_salt,
+        key_params = excluded.key_params
+'''
+SQL_RESET_REKEY = 'UPDATE user_keys SET rekey_after_id = 0 WHERE user_id = ?'
+SQL_SET_REKEY_CHECKPOINT = 'UPDATE user_keys SET rekey_after_id = ? WHERE user_id = ?'
+SQL_FINISH_REKEY = '''
+    UPDATE user_keys
+    SET previous_wrapped_key = NULL, retired_wrapped_keys = ?, legacy_rows = 0, rekey_after_id = 0
+    WHERE user_id = ?
+'''
+SQL_PAGE_SECRETS_BY_ID = '''
+    SELECT id, password FROM passwords
+    WHERE user_id = ? AND id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+SQL_UPDATE_SECRET = 'UPDATE passwords SET password = ? WHERE id = ?'
+SQL_INSERT_ENTRY = '''
+    INSERT INTO passwords (website, username, password, user_id, updated_at)
+    VALUES (?, ?, ?, ?, strftime('%s', 'now'))
+'''
+SQL_IMPORT_ENTRY = '''
+    INSERT OR IGNORE INTO passwords (website, username, password, user_id, updated_at)
+    VALUES (?, ?, ?, ?, strftime('%s', 'now'))
+'''
+SQL_MAX_ENTRY_ID = 'SELECT COALESCE(MAX(id), 0) FROM passwords'
+SQL_DROP_FTS_INSERT_TRIGGER = 'DROP TRIGGER IF EXISTS passwords_fts_insert'
+SQL_INDEX_NEW_ENTRIES = '''
+    INSERT INTO passwords_fts(rowid, website, username)
+    SELECT id, website, username FROM passwords WHERE id > ?
+'''
+SQL_GET_REVISION = 'SELECT revision FROM vault_revisions WHERE user_id = ?'
+SQL_AUDIT_ROWS = '''
+    SELECT id, website, username, password, updated_at FROM passwords
+    WHERE user_id = ?
+'''
+SQL_ENTRY_EXISTS = '''
+    SELECT 1 FROM passwords
+    WHERE user_id = ? AND website = ? AND username = ?
+'''
+SQL_EXISTING_PAIRS = '''
+    SELECT website, username FROM passwords
+    WHERE user_id = ? AND website IN ({})
+'''
+SQL_DELETE_ENTRY = '''
+    DELETE FROM passwords
+    WHERE user_id = ? AND website = ? AND username = ?
+'''
+SQL_COUNT_ENTRIES = 'SELECT COUNT(*) FROM passwords WHERE user_id = ? AND id > ?'
+SQL_LIST_ENTRIES = '''
+    SELECT website, username FROM passwords
+    WHERE user_id = ?
+    ORDER BY website
+'''
+SQL_LIST_SECRETS = '''
+    SELECT website, username, password FROM passwords
+    WHERE user_id = ?
+    ORDER BY website
+'''
+# Keyset pagination: continue after the (website, id) of the previous page
+SQL_PAGE_ENTRIES = '''
+    SELECT id, website, username, password FROM passwords
+    WHERE user_id = ? AND (website > ? OR (website = ? AND id > ?))
+    ORDER BY website, id
+    LIMIT ?
+'''
+SQL_FTS_EXISTS = "SELECT 1 FROM sqlite_master WHERE name = 'passwords_fts'"
+# Ranked search over the first MAX_SEARCH_RESULTS index hits: websites that
+# start with the term, then websites that contain it, then username-only
+# matches; shorter websites first within each group. (bm25() has to score
+# every hit and takes hundreds of milliseconds for terms matching most rows.)
+# CROSS JOIN keeps the index as the outer loop; otherwise the planner may walk
+# all of the user's rows and run the MATCH once per row.
+SQL_SEARCH_FTS = '''
+    SELECT id, website, username, password FROM (
+        SELECT p.id, p.website, p.username, p.password
+        FROM passwords_fts
+        CROSS JOIN passwords AS p ON p.id = passwords_fts.rowid
+        WHERE passwords_fts MATCH ? AND p.user_id = ?
+        LIMIT ?
+    )
+    ORDER BY instr(lower(website), ?) != 1, instr(lower(website), ?) = 0,
+             length(website), website, id
+    LIMIT ? OFFSET ?
+'''
+SQL_SEARCH_LIKE = '''
+    SELECT id, website, username, password FROM passwords
+    WHERE user_id = ? AND (website LIKE ? ESCAPE '\\' OR username LIKE ? ESCAPE '\\')
+    ORDER BY website, id
+    LIMIT ? OFFSET ?
+'''
+
+
+class VaultRepository:
+    """Long-lived connection manager and query layer for users.db.
+
+    Each thread gets one persistent WAL-mode connection, created on first
+    use and reused afterwards, so the GUI thread and worker threads never
+    share a connection and never reconnect per operation. The id of the
+    logged-in user is cached for the whole session.
+    """
+
+    def __init__(self, database_name=DATABASE_NAME):
+        """Open the database and make sure the schema exists.
+
+        Args:
+            database_name (str): Path of the SQLite database file
+        """
+        self.database_name = database_name
+        self.username = None
+        self.user_id = None
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._user_ids = {}
+        self.fts_enabled = False
+        self.init_db()
+
+    @property
+    def connection(self):
+        """sqlite3.Connection: The calling thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.database_name, cached_statements=256)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in a single transaction, rolling back on error."""
+        conn = self.connection
+        with conn:
+            yield conn
+
+    def init_db(self):
+        """Create database and user tables."""
+        with self.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(passwords)')}
+            if 'updated_at' not in columns:
+                # Rows from before change tracking keep NULL (age unknown)
+                conn.execute('ALTER TABLE passwords ADD COLUMN updated_at INTEGER')
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(user_keys)')}
+            if 'retired_wrapped_keys' not in columns:
+                conn.execute('ALTER TABLE user_keys ADD COLUMN retired_wrapped_keys TEXT')
+            for statement in REVISION_TRIGGERS:
+                conn.execute(statement)
+        self.fts_enabled = self._init_fts()
+
+    def _init_fts(self):
+        """Create the search index, or report that this SQLite build has no FTS5 trigram."""
+        conn = self.connection
+        if conn.execute(SQL_FTS_EXISTS).fetchone():
+            return True
+        try:
+            with self.transaction():
+                for statement in FTS_SCHEMA:
+                    conn.execute(statement)
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    def release_connection(self):
+        """Close the calling thread's connection, e.g. when a worker thread ends."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        with self._lock:
+            self._connections.remove(conn)
+        conn.close()
+        self._local.conn = None
+
+    def close(self):
+        """Close every connection opened by this repository."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    # Settings ---------------------------------------------------------------
+
+    def get_setting(self, key, default=None):
+        """Get a JSON-encoded application setting."""
+        row = self.connection.execute(SQL_GET_SETTING, (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_setting(self, key, value):
+        """Store a JSON-encodable application setting."""
+        with self.transaction() as conn:
+            conn.execute(SQL_SET_SETTING, (key, json.dumps(value)))
+
+    # Session ----------------------------------------------------------------
+
+    def open_session(self, username):
+        """Remember the logged-in user.
+
+        Args:
+            username (str): Name of the user that logged in
+
+        Returns:
+            int: The user's id, or None if the user does not exist
+        """
+        self.username = username
+        self.user_id = self.get_user_id(username)
+        return self.user_id
+
+    def close_session(self):
+        """Forget the logged-in user."""
+        self.username = None
+        self.user_id = None
+
+    # Users ------------------------------------------------------------------
+
+    def get_user_id(self, username):
+        """Look up (and cache) the id of a user.
+
+        Args:
+            username (str): Name of the user
+
+        Returns:
+            int: The user's id, or None if the user does not exist
+        """
+        user_id = self._user_ids.get(username)
+        if user_id is None:
+            row = self.connection.execute(SQL_USER_ID, (username,)).fetchone()
+            if row is None:
+                return None
+            user_id = self._user_ids[username] = row[0]
+        return user_id
+
+    def user_exists(self, username):
+        """Check whether a username is already registered."""
+        return self.get_user_id(username) is not None
+
+    def get_password_hash(self, username):
+        """Get the stored master password hash of a user, or None."""
+        row = self.connection.execute(SQL_USER_HASH, (username,)).fetchone()
+        return row[0] if row else None
+
+    def create_user(self, username, password_hash, age):
+        """Register a new user.
+
+        Raises:
+            sqlite3.IntegrityError: If the username is already taken
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(SQL_INSERT_USER, (username, password_hash, age))
+        self._user_ids[username] = cursor.lastrowid
+        return cursor.lastrowid
+
+    def update_password_hash(self, user_id, password_hash):
+        """Replace a user's master password hash."""
+        with self.transaction() as conn:
+            conn.execute(SQL_UPDATE_USER_HASH, (password_hash, user_id))
+
+    def change_master_password(self, user_id, password_hash, key_record):
+        """Store a new master password hash and the data key re-wrapped for it."""
+        with self.transaction() as conn:
+            conn.execute(SQL_UPDATE_USER_HASH, (password_hash, user_id))
+            self._save_user_key(conn, user_id, key_record)
+
+    # Data keys --------------------------------------------------------------
+
+    def get_user_key(self, user_id):
+        """Get a user's wrapped data key record, or None for a legacy vault."""
+        row = self.connection.execute(SQL_GET_USER_KEY, (user_id,)).fetchone()
+        if row is None:
+            return None
+        keys = ('wrapped_key', 'previous_wrapped_key', 'retired_wrapped_keys', 'key_salt',
+                'key_params', 'legacy_rows', 'rekey_after_id')
+        return dict(zip(keys, row))
+
+    def save_user_key(self, user_id, key_record, legacy_rows=False, restart_rekey=False):
+        """Store a wrapped data key record.
+
+        Args:
+            user_id (int): Owner of the key
+            key_record (dict): Record from vault_keys.wrap_data_key
+            legacy_rows (bool): For a new record: rows still use the legacy key
+            restart_rekey (bool): A new re-key starts; reset its checkpoint
+        """
+        with self.transaction() as conn:
+            self._save_user_key(conn, user_id, key_record, legacy_rows)
+            if restart_rekey:
+                conn.execute(SQL_RESET_REKEY, (user_id,))
+
+    def _save_user_key(self, conn, user_id, key_record, legacy_rows=False):
+        conn.execute(SQL_SAVE_USER_KEY, (
+            user_id, key_record['wrapped_key'], key_record.get('previous_wrapped_key'),
+            key_record.get('retired_wrapped_keys'), key_record['key_salt'],
+            key_record['key_params'], int(legacy_rows)
+        ))
+
+    def page_secrets_by_id(self, user_id, after_id, limit):
+        """Get (id, encrypted_password) rows with id above after_id, in id order."""
+        return self.connection.execute(SQL_PAGE_SECRETS_BY_ID, (user_id, after_id, limit)).fetchall()
+
+    def rekey_batch(self, user_id, rows, last_id):
+        """Write one batch of re-encrypted passwords and advance the re-key checkpoint.
+
+        Args:
+            user_id (int): Owner of the rows
+            rows (list): (encrypted_password, id) tuples
+            last_id (int): Highest id covered by this batch
+        """
+        with self.transaction() as conn:
+            conn.executemany(SQL_UPDATE_SECRET, rows)
+            conn.execute(SQL_SET_REKEY_CHECKPOINT, (last_id, user_id))
+
+    def finish_rekey(self, user_id):
+        """Mark every row as encrypted with the current data key.
+
+        The previous data key is kept as a retired key so version 1 backups
+        written with it can still be restored.
+        """
+        with self.transaction() as conn:
+            row = conn.execute(SQL_GET_USER_KEY, (user_id,)).fetchone()
+            retired = json.loads(row[2]) if row and row[2] else []
+            if row and row[1]:
+                retired.append(row[1])
+            conn.execute(SQL_FINISH_REKEY, (json.dumps(retired) if retired else None, user_id))
+
+    # Password entries -------------------------------------------------------
+
+    def add_entry(self, user_id, website, username, encrypted_password):
+        """Store one encrypted password.
+
+        Raises:
+            sqlite3.IntegrityError: If the website/username pair already exists
+        """
+        with self.transaction() as conn:
+            conn.execute(SQL_INSERT_ENTRY, (website, username, encrypted_password, user_id))
+
+    def add_entries(self, user_id, entries):
+        """Store many encrypted passwords in one transaction.
+
+        Args:
+            user_id (int): Owner of the entries
+            entries (iterable): (website, username, encrypted_password) tuples
+        """
+        with self.transaction() as conn:
+            conn.executemany(SQL_INSERT_ENTRY, (
+                (website, username, encrypted, user_id)
+                for website, username, encrypted in entries
+            ))
+
+    def import_entries(self, user_id, batches, on_batch=None, atomic=True):
+        """Bulk insert encrypted passwords, skipping pairs that already exist.
+
+        Duplicates are dropped by the UNIQUE(website, username, user_id)
+        constraint instead of being looked up one by one.
+
+        Args:
+            user_id (int): Owner of the entries
+            batches (iterable): Lists of (website, username, encrypted_password) tuples
+            on_batch (callable): Called with the batch size after each batch is written
+            atomic (bool): Write all batches in one transaction. Otherwise each
+                batch is committed on its own, so an interrupted import keeps
+                what it wrote and running it again skips those entries.
+
+        Returns:
+            int: Number of inserted rows
+        """
+        inserted = 0
+        if atomic:
+            with self.transaction() as conn:
+                for batch in batches:
+                    inserted += self._insert_batch(conn, user_id, batch, on_batch)
+        else:
+            for batch in batches:
+                with self.transaction() as conn:
+                    inserted += self._insert_batch(conn, user_id, batch, on_batch)
+        return inserted
+
+    def _insert_batch(self, conn, user_id, batch, on_batch):
+        if self.fts_enabled:
+            # Index the batch with one INSERT ... SELECT instead of running the
+            # insert trigger per row, which is several times slower. The trigger
+            # is dropped and recreated inside the write transaction, so other
+            # connections never see it missing.
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            last_id = conn.execute(SQL_MAX_ENTRY_ID).fetchone()[0]
+            conn.execute(SQL_DROP_FTS_INSERT_TRIGGER)
+        # rowcount leaves out the rows written by the index and revision triggers
+        cursor = conn.executemany(SQL_IMPORT_ENTRY, (
+            (website, username, encrypted, user_id)
+            for website, username, encrypted in batch
+        ))
+        if self.fts_enabled:
+            conn.execute(SQL_INDEX_NEW_ENTRIES, (last_id,))
+            conn.execute(FTS_INSERT_TRIGGER)
+        if on_batch is not None:
+            on_batch(len(batch))
+        return cursor.rowcount
+
+    def get_revision(self, user_id):
+        """Get a counter that changes whenever the user's passwords change."""
+        row = self.connection.execute(SQL_GET_REVISION, (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def iter_audit_rows(self, user_id, batch_size=1000):
+        """Yield lists of (id, website, username, encrypted_password, updated_at) rows."""
+        cursor = self.connection.execute(SQL_AUDIT_ROWS, (user_id,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+    def entry_exists(self, user_id, website, username):
+        """Check whether a website/username pair is already stored."""
+        row = self.connection.execute(SQL_ENTRY_EXISTS, (user_id, website, username)).fetchone()
+        return row is not None
+
+    def existing_pairs(self, user_id, pairs):
+        """Get the (website, username) pairs among pairs that are already stored."""
+        pairs = set(pairs)
+        websites = sorted({website for website, _ in pairs})
+        found = set()
+        for start in range(0, len(websites), MAX_QUERY_PARAMS):
+            chunk = websites[start:start + MAX_QUERY_PARAMS]
+            sql = SQL_EXISTING_PAIRS.format(', '.join('?' * len(chunk)))
+            found.update(tuple(row) for row in self.connection.execute(sql, (user_id, *chunk)))
+        return found & pairs
+
+    def delete_entry(self, user_id, website, username):
+        """Delete one password.
+
+        Returns:
+            int: Number of deleted rows (0 or 1)
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(SQL_DELETE_ENTRY, (user_id, website, username))
+        return cursor.rowcount
+
+    def count_entries(self, user_id, after_id=0):
+        """Get the number of passwords stored by a user (with an id above after_id)."""
+        return self.connection.execute(SQL_COUNT_ENTRIES, (user_id, after_id)).fetchone()[0]
+
+    def list_entries(self, user_id):
+        """Get (website, username) pairs of a user ordered by website."""
+        return self.connection.execute(SQL_LIST_ENTRIES, (user_id,)).fetchall()
+
+    def list_entries_with_secrets(self, user_id):
+        """Get (website, username, encrypted_password) rows ordered by website."""
+        return self.connection.execute(SQL_LIST_SECRETS, (user_id,)).fetchall()
+
+    def iter_entries_with_secrets(self, user_id):
+        """Iterate (website, username, encrypted_password) rows without loading them all."""
+        return self.connection.execute(SQL_LIST_SECRETS, (user_id,))
+
+    def search_entries(self, user_id, term, limit=200, offset=0):
+        """Get rows whose website or username contains term, best matches first.
+
+        Uses the trigram index when possible (at most MAX_SEARCH_RESULTS
+        ranked matches) and falls back to a LIKE scan in website order for
+        terms shorter than three characters.
+
+        Args:
+            user_id (int): Owner of the entries
+            term (str): Text to look for (case-insensitive)
+            limit (int): Maximum number of rows
+            offset (int): Number of rows to skip
+
+        Returns:
+            list: (id, website, username, encrypted_password) rows
+        """
+        if self.fts_enabled and len(term) >= MIN_FTS_TERM_LENGTH:
+            # Quote the term so it is matched as a literal substring
+            query = '"' + term.replace('"', '""') + '"'
+            folded = term.lower()
+            return self.connection.execute(SQL_SEARCH_FTS, (
+                query, user_id, MAX_SEARCH_RESULTS, folded, folded, limit, offset
+            )).fetchall()
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        pattern = f'%{escaped}%'
+        return self.connection.execute(SQL_SEARCH_LIKE, (
+            user_id, pattern, pattern, limit, offset
+        )).fetchall()
+
+    def page_entries(self, user_id, after=None, limit=200):
+        """Get one page of (id, website, username, encrypted_password) rows.
+
+        Args:
+            user_id (int): Owner of the entries
+            after (tuple): (website, id) of the last row of the previous page
+            limit (int): Maximum number of rows
+
+        Returns:
+            list: Rows ordered by website, then id
+        """
+        website, entry_id = after or ('', 0)
+        return self.connection.execute(SQL_PAGE_ENTRIES, (
+            user_id, website, website, entry_id, limit
+        )).fetchall()
@@ -0,0 +1,208 @@
+"""
+Per-user vault keys for the Password Manager.
+
+Every user's passwords are encrypted with a random data key. The data key
+is stored wrapped (Fernet-encrypted) by a key derived from the master
+password, so changing the master password only re-wraps one key. Vaults
+created before per-user keys used a single built-in key; those rows stay
+readable through the session cipher until the re-key job has migrated them.
+Data keys replaced by a finished re-key are kept wrapped as retired keys, so
+version 1 backups (encrypted with the data key of their time) still restore.
+"""
+
+import base64
+import json
+import os
+import time
+
+from cryptography.fernet import Fernet, MultiFernet
+
+import credentials
+
+IDLE_TIMEOUT = 300  # seconds without vault access before the session locks
+
+
+def _wrapping_cipher(password, salt, params):
+    key = credentials.derive_key(password, salt, params)
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+def wrap_data_key(data_key, password, params, previous_key=None, retired_keys=()):
+    """Encrypt a data key with a key derived from the master password.
+
+    Args:
+        data_key (bytes): Current data key
+        password (str): The master password
+        params (dict): KDF parameters for the wrapping key
+        previous_key (bytes): Data key of an unfinished re-key, wrapped alongside
+        retired_keys (list): Data keys of finished re-keys, wrapped alongside
+
+    Returns:
+        dict: Key record with 'wrapped_key', 'previous_wrapped_key',
+        'retired_wrapped_keys', 'key_salt' and 'key_params'
+    """
+    salt = os.urandom(credentials.SALT_SIZE)
+    cipher = _wrapping_cipher(password, salt, params)
+    retired = [cipher.encrypt(key).decode('ascii') for key in retired_keys]
+    return {
+        'wrapped_key': cipher.encrypt(data_key).decode('ascii'),
+        'previous_wrapped_key': (cipher.encrypt(previous_key).decode('ascii')
+                                 if previous_key else None),
+        'retired_wrapped_keys': json.dumps(retired) if retired else None,
+        'key_salt': base64.urlsafe_b64encode(salt).decode('ascii'),
+        'key_params': json.dumps(params),
+    }
+
+
+def unwrap_data_key(record, password, wrapped=None):
+    """Decrypt the data key stored in a key record.
+
+    Args:
+        record (dict): Key record as returned by VaultRepository.get_user_key
+        password (str): The master password
+        wrapped (str): Wrapped key to open instead of record['wrapped_key']
+
+    Raises:
+        cryptography.fernet.InvalidToken: If the password does not match
+    """
+    salt = base64.urlsafe_b64decode(record['key_salt'])
+    params = json.loads(record['key_params'])
+    cipher = _wrapping_cipher(password, salt, params)
+    return cipher.decrypt((wrapped or record['wrapped_key']).encode('ascii'))
+
+
+def unlock(password, record, params):
+    """Open (or create) a user's data key at login.
+
+    Runs the key derivation, so call it off the GUI thread.
+
+    Args:
+        password (str): The verified master password
+        record (dict): Stored key record, or None for a vault without one
+        params (dict): Current KDF parameters
+
+    Returns:
+        tuple: (data_key, previous_key, retired_keys, new_record).
+        previous_key is the data key being rotated away from, if a re-key
+        was interrupted. retired_keys lists the data keys of finished
+        re-keys. new_record is None unless the record has to be stored (new
+        key, or wrapping parameters weaker than params).
+    """
+    if record is None:
+        data_key = Fernet.generate_key()
+        return data_key, None, [], wrap_data_key(data_key, password, params)
+
+    data_key = unwrap_data_key(record, password)
+    previous_key = None
+    if record.get('previous_wrapped_key'):
+        previous_key = unwrap_data_key(record, password, record['previous_wrapped_key'])
+    retired_keys = [unwrap_data_key(record, password, wrapped)
+                    for wrapped in json.loads(record.get('retired_wrapped_keys') or '[]')]
+
+    new_record = None
+    if credentials.params_weaker(json.loads(record['key_params']), params):
+        new_record = wrap_data_key(data_key, password, params, previous_key, retired_keys)
+    return data_key, previous_key, retired_keys, new_record
+
+
+def rotate_data_key(data_key, password, params, retired_keys=()):
+    """Create a new data key for a re-key, keeping the current one wrapped as previous.
+
+    Returns:
+        tuple: (new_data_key, new_record)
+    """
+    new_key = Fernet.generate_key()
+    return new_key, wrap_data_key(new_key, password, params, data_key, retired_keys)
+
+
+class KeySession:
+    """Unlocked data key of the logged-in user.
+
+    Holds one cipher for the whole session, so every encrypt/decrypt (and
+    every bulk job) reuses the same Fernet instances. Rows still encrypted
+    with a previous or legacy key are decrypted transparently; new rows are
+    always written with the current data key. The session locks itself
+    after idle_timeout seconds without use.
+    """
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self.user_id = None
+        self.data_key = None
+        self.previous_key = None
+        self.retired_keys = []
+        self._ciphers = []
+        self._cipher = None
+        self._last_used = 0.0
+
+    def open(self, user_id, data_key, previous_key=None, legacy_cipher=None, retired_keys=()):
+        """Unlock the session.
+
+        Args:
+            user_id (int): Owner of the data key
+            data_key (bytes): Current data key
+            previous_key (bytes): Data key of an unfinished re-key
+            legacy_cipher (Fernet): The pre-per-user-key cipher, while
+                legacy rows remain
+            retired_keys (list): Data keys of finished re-keys; only used
+                to restore old backups, never for vault rows
+        """
+        ciphers = [Fernet(data_key)]
+        if previous_key:
+            ciphers.append(Fernet(previous_key))
+        if legacy_cipher is not None:
+            ciphers.append(legacy_cipher)
+        self.user_id = user_id
+        self.data_key = data_key
+        self.previous_key = previous_key
+        self.retired_keys = list(retired_keys)
+        self._ciphers = ciphers
+        self._cipher = MultiFernet(ciphers) if len(ciphers) > 1 else ciphers[0]
+        self._last_used = self._clock()
+
+    def lock(self):
+        """Forget the data key."""
+        self.user_id = None
+        self.data_key = None
+        self.previous_key = None
+        self.retired_keys = []
+        self._ciphers = []
+        self._cipher = None
+
+    @property
+    def is_unlocked(self):
+        return self._cipher is not None
+
+    def cipher(self):
+        """Get the session cipher and reset the idle timer.
+
+        Raises:
+            PermissionError: If the session is locked
+        """
+        if self._cipher is None:
+            raise PermissionError('Vault is locked')
+        self._last_used = self._clock()
+        return self._cipher
+
+    def rekey_cipher(self, *extra_ciphers):
+        """Get a MultiFernet that encrypts (and rotate()s tokens) with the current data key.
+
+        Args:
+            extra_ciphers: Additional ciphers accepted for decryption, e.g.
+                the legacy cipher for backups written before per-user keys
+        """
+        self.cipher()
+        return MultiFernet(self._ciphers + [c for c in extra_ciphers if c not in self._ciphers])
+
+    def restore_cipher(self, legacy_cipher):
+        """Get a MultiFernet that also opens tokens from retired and legacy keys.
+
+        Used for version 1 backups, which were encrypted with whatever data
+        key (or the legacy key) was current when they were written.
+        """
+        return self.rekey_cipher(*[Fernet(key) for key in self.retired_keys], legacy_cipher)
+
+    def idle_expired(self):
+        """Check whether the session has been idle for longer than idle_timeout."""
+        return self.is_unlocked and self._clock() - self._last_used > self.idle_timeout
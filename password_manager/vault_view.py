@@ -0,0 +1,296 @@
+"""
+Paged, lazily decrypted password table for the Password Manager.
+
+Rows are fetched from the vault a page at a time as the view scrolls, and
+a password is only decrypted when the user reveals or copies it.
+"""
+
+import time
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from PyQt6.QtWidgets import (QAbstractItemView, QApplication, QDialog, QHBoxLayout,
+                             QHeaderView, QLabel, QLineEdit, QPushButton, QTableView,
+                             QVBoxLayout)
+
+PAGE_SIZE = 200
+SEARCH_DEBOUNCE_MS = 150
+SECRET_TTL = 30  # seconds a decrypted password stays in memory
+MASK = '••••••••'
+
+
+class SecretCache:
+    """Short-lived store for decrypted passwords.
+
+    Every value expires ttl seconds after it was added; purge() drops
+    expired values and returns their keys so the view can hide them again.
+    """
+
+    def __init__(self, ttl=SECRET_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._values = {}  # key -> (value, expires_at)
+
+    def get(self, key):
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= self._clock():
+            del self._values[key]
+            return None
+        return value
+
+    def put(self, key, value):
+        self._values[key] = (value, self._clock() + self.ttl)
+
+    def discard(self, key):
+        self._values.pop(key, None)
+
+    def purge(self):
+        """Drop expired values and return their keys."""
+        now = self._clock()
+        expired = [key for key, (_, expires_at) in self._values.items() if expires_at <= now]
+        for key in expired:
+            del self._values[key]
+        return expired
+
+    def clear(self):
+        self._values.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._values)
+
+
+class VaultTableModel(QAbstractTableModel):
+    """Website / username / password table backed by paged vault queries.
+
+    Rows keep only the encrypted password. The password column shows a
+    mask until reveal() decrypts that row into the SecretCache; when the
+    cache entry expires the row is masked again. With a search term the
+    rows come from the ranked full-text search instead of the website order.
+    """
+
+    COLUMNS = ('Website', 'Username', 'Password')
+    PASSWORD_COLUMN = 2
+
+    def __init__(self, vault, user_id, decrypt, term=None, page_size=PAGE_SIZE,
+                 cache=None, parent=None):
+        """
+        Args:
+            vault (VaultRepository): Repository to page through
+            user_id (int): Owner of the entries
+            decrypt (callable): Turns a stored token into the plaintext password
+            term (str): Only show entries whose website or username contains term
+            page_size (int): Rows fetched per page
+            cache (SecretCache): Store for revealed passwords
+        """
+        super().__init__(parent)
+        self.vault = vault
+        self.user_id = user_id
+        self.decrypt = decrypt
+        self.term = term
+        self.page_size = page_size
+        self.cache = cache or SecretCache()
+        self._rows = []  # (id, website, username, encrypted_password)
+        self._exhausted = False
+        self.fetchMore(QModelIndex())
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole,
+                                                Qt.ItemDataRole.ToolTipRole):
+            return None
+        entry_id, website, username, _ = self._rows[index.row()]
+        if index.column() == 0:
+            return website
+        if index.column() == 1:
+            return username
+        secret = self.cache.get(entry_id)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return None if secret is not None else 'Double-click to reveal'
+        return secret if secret is not None else MASK
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        if self.term:
+            page = self.vault.search_entries(self.user_id, self.term, self.page_size,
+                                             len(self._rows))
+        else:
+            after = (self._rows[-1][1], self._rows[-1][0]) if self._rows else None
+            page = self.vault.page_entries(self.user_id, after, self.page_size)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def set_term(self, term):
+        """Replace the rows with the first page of results for term."""
+        term = (term or '').strip() or None
+        if term == self.term and self._rows:
+            return
+        self.beginResetModel()
+        self.term = term
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    # Secrets
+
+    def secret(self, row):
+        """Decrypt (or reuse the cached) password of a row."""
+        entry_id, _, _, encrypted_password = self._rows[row]
+        value = self.cache.get(entry_id)
+        if value is None:
+            value = self.decrypt(encrypted_password)
+            self.cache.put(entry_id, value)
+        return value
+
+    def reveal(self, row):
+        """Show the password of a row until its cache entry expires."""
+        self.secret(row)
+        self._password_changed(row)
+
+    def hide(self, row):
+        """Mask the password of a row again right away."""
+        self.cache.discard(self._rows[row][0])
+        self._password_changed(row)
+
+    def is_revealed(self, row):
+        return self._rows[row][0] in self.cache
+
+    def expire_secrets(self):
+        """Mask rows whose decrypted password has expired."""
+        expired = set(self.cache.purge())
+        if not expired:
+            return
+        for row, entry in enumerate(self._rows):
+            if entry[0] in expired:
+                self._password_changed(row)
+
+    def _password_changed(self, row):
+        index = self.index(row, self.PASSWORD_COLUMN)
+        self.dataChanged.emit(index, index)
+
+
+class VaultViewDialog(QDialog):
+    """Dialog showing the vault (or search results) in a VaultTableModel."""
+
+    def __init__(self, vault, user_id, decrypt, title, term=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(600, 400)
+
+        self.model = VaultTableModel(vault, user_id, decrypt, term, parent=self)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel('<h2>Your Saved Passwords</h2>'))
+
+        # Type-ahead search: re-query once typing pauses
+        self.search_input = QLineEdit(term or '')
+        self.search_input.setPlaceholderText('Search by website or username...')
+        self.search_input.setClearButtonEnabled(True)
+        layout.addWidget(self.search_input)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.doubleClicked.connect(self.toggle_reveal)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel('')
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        reveal_btn = QPushButton('Show / Hide')
+        reveal_btn.clicked.connect(lambda: self.toggle_reveal(self.table.currentIndex()))
+        copy_btn = QPushButton('Copy Password')
+        copy_btn.clicked.connect(self.copy_password)
+        close_btn = QPushButton('Close')
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(reveal_btn)
+        button_layout.addWidget(copy_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        # Periodically mask passwords whose cache entry has expired
+        self.expiry_timer = QTimer(self)
+        self.expiry_timer.timeout.connect(self.model.expire_secrets)
+        self.expiry_timer.start(1000)
+
+    def run_search(self):
+        """Show the results for the current contents of the search box"""
+        term = self.search_input.text()
+        try:
+            self.model.set_term(term)
+        except Exception as e:
+            self.status_label.setText(f'Search error: {str(e)}')
+            return
+        if term.strip() and not self.model.rowCount():
+            self.status_label.setText(f'No passwords found matching "{term.strip()}".')
+        else:
+            self.status_label.setText('')
+
+    def toggle_reveal(self, index):
+        """Reveal or hide the password of the selected row"""
+        if not index.isValid():
+            return
+        row = index.row()
+        try:
+            if self.model.is_revealed(row):
+                self.model.hide(row)
+            else:
+                self.model.reveal(row)
+                self.status_label.setText('')
+        except Exception as e:
+            self.status_label.setText(f'Error decrypting: {str(e)}')
+
+    def copy_password(self):
+        """Copy the password of the selected row to the clipboard"""
+        index = self.table.currentIndex()
+        if not index.isValid():
+            self.status_label.setText('Select a password first.')
+            return
+        try:
+            QApplication.clipboard().setText(self.model.secret(index.row()))
+            self.status_label.setText('Password copied to clipboard.')
+        except Exception as e:
+            self.status_label.setText(f'Error decrypting: {str(e)}')
+
+    def done(self, result):
+        # Drop every decrypted password as soon as the dialog goes away
+        self.expiry_timer.stop()
+        self.model.cache.clear()
+        super().done(result)
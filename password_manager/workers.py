@@ -0,0 +1,287 @@
+"""
+Background workers for the Password Manager.
+
+Long running jobs run on a QThread and report back through signals so the
+main window stays responsive.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from audit import run_audit
+from csv_import import preview_import
+from parallel import imap_bounded
+
+IMPORT_BATCH_SIZE = 1000
+
+
+class BulkImportWorker(QThread):
+    """Encrypt and store a large list of passwords off the GUI thread.
+
+    Entries are split into batches that are encrypted in a thread pool and
+    written with executemany, inside a single transaction unless atomic is
+    False. Existing website/username pairs are skipped by the database
+    (INSERT OR IGNORE).
+
+    Signals:
+        progress(int, int): Entries processed so far and the total
+        completed(int, int, list): Restored count, skipped count and
+            (website, error) pairs for entries that could not be encrypted
+        failed(str): The import was aborted and rolled back (only the
+            unfinished batch when atomic is False)
+    """
+
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(int, int, list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, vault, user_id, items, encrypt, total=None,
+                 batch_size=IMPORT_BATCH_SIZE, max_workers=None, atomic=True, parent=None):
+        """
+        Args:
+            vault (VaultRepository): Repository to write to
+            user_id (int): Owner of the imported entries
+            items (iterable): Dicts with 'website', 'username' and 'password' keys;
+                may be a lazy stream such as a BackupReader
+            encrypt (callable): Turns a plaintext password into the stored token
+            total (int): Number of items, defaults to len(items)
+            batch_size (int): Entries per executemany call
+            max_workers (int): Encryption threads, defaults to the CPU count
+            atomic (bool): Write everything in one transaction, or commit
+                every batch as it is written
+        """
+        super().__init__(parent)
+        self.vault = vault
+        self.user_id = user_id
+        self.items = items
+        self.total = len(items) if total is None else total
+        self.encrypt = encrypt
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.atomic = atomic
+        self.errors = []
+        self._done = 0
+        self._batch_size = 0
+
+    def run(self):
+        self.errors = []
+        self._done = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                # Batches are yielded in order as soon as each one is encrypted,
+                # so writing overlaps with encrypting the next few batches
+                encrypted = imap_bounded(pool, self._encrypt_batch, self._batches(),
+                                         self.max_workers * 2)
+                inserted = self.vault.import_entries(
+                    self.user_id, self._collect_errors(encrypted), on_batch=self._report,
+                    atomic=self.atomic
+                )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            self.vault.release_connection()
+
+        skipped = self._done - inserted - len(self.errors)
+        self.progress.emit(self._done, max(self.total, self._done))
+        self.completed.emit(inserted, skipped, self.errors)
+
+    def _batches(self):
+        iterator = iter(self.items)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _collect_errors(self, encrypted_batches):
+        for rows, errors, size in encrypted_batches:
+            self.errors.extend(errors)
+            self._batch_size = size
+            yield rows
+
+    def _report(self, _written):
+        # Count failed entries too so progress reaches the total
+        self._done += self._batch_size
+        self.progress.emit(self._done, self.total)
+
+    def _encrypt_batch(self, batch):
+        rows = []
+        errors = []
+        for item in batch:
+            try:
+                rows.append((item['website'], item['username'], self.encrypt(item['password'])))
+            except Exception as e:
+                errors.append((item.get('website', ''), str(e)))
+        return rows, errors, len(batch)
+
+
+
+class RekeyWorker(QThread):
+    """Re-encrypt a user's passwords with their current data key.
+
+    Rows are read in id order a batch at a time, rotated with
+    MultiFernet.rotate() on a thread pool and written back in one
+    transaction per batch together with a checkpoint, so an interrupted
+    job resumes where it stopped.
+
+    Signals:
+        progress(int, int): Rows re-encrypted so far and the total
+        completed(int): Number of re-encrypted rows
+        failed(str): The job stopped; finished batches are kept
+    """
+
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, vault, user_id, cipher, after_id=0, batch_size=IMPORT_BATCH_SIZE,
+                 max_workers=None, parent=None):
+        """
+        Args:
+            vault (VaultRepository): Repository to update
+            user_id (int): Owner of the rows
+            cipher (MultiFernet): Current data key first, then the keys to migrate from
+            after_id (int): Checkpoint of an interrupted run
+        """
+        super().__init__(parent)
+        self.vault = vault
+        self.user_id = user_id
+        self.cipher = cipher
+        self.after_id = after_id
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def run(self):
+        try:
+            total = self.vault.count_entries(self.user_id, self.after_id)
+            done = 0
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                rotated = imap_bounded(pool, self._rotate_batch, self._pages(),
+                                       self.max_workers * 2)
+                for rows, last_id in rotated:
+                    self.vault.rekey_batch(self.user_id, rows, last_id)
+                    done += len(rows)
+                    self.progress.emit(done, total)
+            self.vault.finish_rekey(self.user_id)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            self.vault.release_connection()
+        self.completed.emit(done)
+
+    def _pages(self):
+        after_id = self.after_id
+        while True:
+            page = self.vault.page_secrets_by_id(self.user_id, after_id, self.batch_size)
+            if not page:
+                return
+            after_id = page[-1][0]
+            yield page
+
+    def _rotate_batch(self, page):
+        rows = [(self.cipher.rotate(token.encode('utf-8')).decode('utf-8'), entry_id)
+                for entry_id, token in page]
+        return rows, page[-1][0]
+
+
+class AuditWorker(QThread):
+    """Run a password health audit off the GUI thread.
+
+    Signals:
+        progress(int, int): Entries audited so far and the total
+        completed(int, object): Vault revision the audit started at and the report
+        failed(str): The audit could not be completed
+    """
+
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(int, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, vault, user_id, decrypt, parent=None):
+        """
+        Args:
+            vault (VaultRepository): Repository to audit
+            user_id (int): Owner of the entries
+            decrypt (callable): Turns a stored token into the plaintext password
+        """
+        super().__init__(parent)
+        self.vault = vault
+        self.user_id = user_id
+        self.decrypt = decrypt
+
+    def run(self):
+        try:
+            revision = self.vault.get_revision(self.user_id)
+            total = self.vault.count_entries(self.user_id)
+            report = run_audit(self.vault.iter_audit_rows(self.user_id), self.decrypt,
+                               progress=lambda done: self.progress.emit(done, total))
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            self.vault.release_connection()
+        self.completed.emit(revision, report)
+
+class ImportPreviewWorker(QThread):
+    """Dry-run a CSV import off the GUI thread.
+
+    Signals:
+        completed(object): Counts from csv_import.preview_import
+        failed(str): The file could not be read
+    """
+
+    completed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, vault, user_id, reader, parent=None):
+        """
+        Args:
+            vault (VaultRepository): Repository to check for existing entries
+            user_id (int): Owner of the entries
+            reader (CsvImportReader): Export to preview
+        """
+        super().__init__(parent)
+        self.vault = vault
+        self.user_id = user_id
+        self.reader = reader
+
+    def run(self):
+        try:
+            preview = preview_import(self.vault, self.user_id, self.reader)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            self.vault.release_connection()
+        self.completed.emit(preview)
+
+
+class TaskWorker(QThread):
+    """Run one blocking call (e.g. a key derivation) off the GUI thread.
+
+    Signals:
+        succeeded(object): Return value of the call
+        failed(str): The call raised an exception
+    """
+
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.succeeded.emit(result)
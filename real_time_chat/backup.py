@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Hot backup and restore tooling for Real-Time Chat Application
+
+Usage:
+    python backup.py create [--data-file chat_data.json] [--dir backups] [--keep 10]
+    python backup.py list [--dir backups]
+    python backup.py restore BACKUP_FILE [--data-file chat_data.json]
+
+Restore rewrites the data file and is meant to be run while the server is stopped.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import logging
+from datetime import datetime
+from typing import Dict, List, Any
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = 'chat_backup_'
+BACKUP_SUFFIX = '.json.gz'
+
+def create_backup(db, backup_dir: str = Config.BACKUP_FOLDER,
+                  keep: int = Config.BACKUP_KEEP) -> str:
+    """Export a compressed snapshot of a running ChatDatabase and rotate old backups"""
+    os.makedirs(backup_dir, exist_ok=True)
+    name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{BACKUP_SUFFIX}"
+    path = os.path.join(backup_dir, name)
+    tmp_path = f"{path}.part"
+    
+    try:
+        db.export_snapshot(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    rotate_backups(backup_dir, keep)
+    return path
+
+def list_backups(backup_dir: str = Config.BACKUP_FOLDER) -> List[str]:
+    """Get backup files, newest first"""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir)
+             if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+def rotate_backups(backup_dir: str = Config.BACKUP_FOLDER,
+                   keep: int = Config.BACKUP_KEEP) -> int:
+    """Delete all but the newest keep backups, returns the number removed"""
+    removed = 0
+    for path in list_backups(backup_dir)[keep:]:
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError as e:
+            logger.error(f"Error removing old backup {path}: {e}")
+    return removed
+
+def read_backup(path: str) -> Dict[str, Any]:
+    """Load the data stored in a backup file"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def restore_backup(path: str, data_file: str = Config.DATA_FILE) -> Dict[str, Any]:
+    """Replace data_file with the contents of a backup
+
+    The data file is swapped atomically, so an interrupted restore leaves
+    the current data untouched.
+    """
+    data = read_backup(path)
+    data.pop('snapshot_time', None)
+    
+    tmp_file = f"{data_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, data_file)
+    
+    logger.info(f"Restored {data_file} from {path}")
+    return data
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Chat data backup tool')
+    parser.add_argument('command', choices=['create', 'list', 'restore'])
+    parser.add_argument('backup_file', nargs='?', help='backup to restore')
+    parser.add_argument('--data-file', default=Config.DATA_FILE)
+    parser.add_argument('--dir', default=Config.BACKUP_FOLDER)
+    parser.add_argument('--keep', type=int, default=Config.BACKUP_KEEP)
+    args = parser.parse_args(argv)
+    
+    if args.command == 'create':
+        from database import ChatDatabase
+        path = create_backup(ChatDatabase(args.data_file), args.dir, args.keep)
+        print(f"✅ Backup written to {path}")
+    elif args.command == 'list':
+        for path in list_backups(args.dir):
+            size_kb = os.path.getsize(path) / 1024
+            print(f"{os.path.basename(path)}  {size_kb:.1f} KB")
+    else:
+        if not args.backup_file:
+            parser.error('restore needs a backup file')
+        data = restore_backup(args.backup_file, args.data_file)
+        print(f"✅ Restored {len(data.get('users', {}))} users and "
+              f"{len(data.get('message_history', []))} messages into {args.data_file}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,6 +26,8 @@ class Config:
     
     # Database settings
     DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_data.json')
+    BACKUP_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backups')
+    BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 10))  # number of backups to retain
     
     # Rate limiting settings
     RATE_LIMIT_STORAGE_URL = 'memory://'
@@ -3,101 +3,213 @@
 Database module for Real-Time Chat Application
 Provides abstraction layer for data storage and retrieval
 """
+import gzip
 import json
 import os
 import time
 import logging
 from datetime import datetime
 from threading import Lock
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+from collections import defaultdict, deque
+
+from stats_service import UserStatsService
 
 logger = logging.getLogger(__name__)
 
+MAX_MESSAGE_HISTORY = 1000
+
+class _KeyedLocks:
+    """Lazily created lock per key (user, room, ...)"""
+    
+    def __init__(self):
+        self._guard = Lock()
+        self._locks = {}
+    
+    def __call__(self, key: str) -> Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            with self._guard:
+                lock = self._locks.setdefault(key, Lock())
+        return lock
+
 class ChatDatabase:
-    """Database abstraction layer for chat application"""
+    """Database abstraction layer for chat application
+    
+    Thread safety follows two rules:
+    
+    * Records (users, rooms, preferences, files, messages) are copy-on-write.
+      Updates build a new dict and swap it in, so a record handed to a
+      reader is never mutated afterwards and reads need no lock.
+    * Writers serialize per key (one lock per user and per room) or per
+      append-only collection, so unrelated writes never contend.
+    
+    ``save_data`` copies every collection under its own lock and coalesces
+    concurrent saves, so callers never wait for another thread's file write.
+    The file is replaced atomically, so a crash mid-write keeps the previous
+    version. A ``data_file`` of ``':memory:'`` disables persistence.
+    
+    Online users, login sessions and rate-limit windows are process-local:
+    they live here so every handler thread goes through the same locks, but
+    they are never written to the data file.
+    """
     
     def __init__(self, data_file: str = 'chat_data.json'):
         self.data_file = data_file
-        self.data_lock = Lock()
+        self.data_lock = Lock()                 # guards collection structure
+        self._history_lock = Lock()
+        self._private_lock = Lock()
+        self._reactions_lock = Lock()
+        self._user_lock = _KeyedLocks()
+        self._room_lock = _KeyedLocks()
+        self._save_state_lock = Lock()
+        self._saving = False
+        self._save_pending = False
+        self.last_backup = None
+        self.stats = UserStatsService()
         self._data = {
             'users': {},
             'message_history': [],
             'private_messages': {},
             'rooms': {},
             'user_preferences': {},
-            'user_stats': defaultdict(lambda: {
-                'message_count': 0,
-                'login_count': 0,
-                'days_active': 0,
-                'last_activity': None
-            }),
             'file_shares': {},
             'message_reactions': defaultdict(list),
-            'banned_users': [],
+            'banned_users': set(),
             'notifications': defaultdict(list)
         }
+        self._presence_lock = Lock()
+        self._rate_lock = Lock()
+        self._active_users = {}                 # username -> connection info
+        self._sessions = {}                     # username -> login session id
+        self._rate_events = defaultdict(deque)  # rate-limit key -> request times
         self.load_data()
     
+    @property
+    def persistent(self) -> bool:
+        """Whether changes are written to disk"""
+        return self.data_file != ':memory:'
+    
     def load_data(self) -> bool:
         """Load data from JSON file"""
         try:
-            if os.path.exists(self.data_file):
+            if self.persistent and os.path.exists(self.data_file):
                 with open(self.data_file, 'r', encoding='utf-8') as f:
                     loaded_data = json.load(f)
-                    
+                
                 # Update data with loaded values
                 for key, value in loaded_data.items():
-                    if key in self._data:
-                        if key in ['user_stats', 'message_reactions', 'notifications']:
-                            # Handle defaultdict types
-                            if key == 'user_stats':
-                                self._data[key] = defaultdict(
-                                    lambda: {'message_count': 0, 'login_count': 0, 'days_active': 0, 'last_activity': None},
-                                    value
-                                )
-                            else:
-                                self._data[key] = defaultdict(list, value)
-                        else:
-                            self._data[key] = value
+                    if key == 'user_stats':
+                        self.stats.load(value)
+                    elif key in ['message_reactions', 'notifications']:
+                        self._data[key] = defaultdict(list, value)
+                    elif key == 'banned_users':
+                        self._data[key] = set(value)
+                    elif key in self._data:
+                        self._data[key] = value
                 
-                # Initialize default rooms if not present
-                if not self._data['rooms']:
-                    self._initialize_default_rooms()
+                for username in self._data['users']:
+                    self.stats.ensure_user(username)
                 
                 logger.info(f"Data loaded successfully from {self.data_file}")
-                return True
+            
+            # Initialize default rooms if not present
+            if not self._data['rooms']:
+                self._initialize_default_rooms()
+            return True
         except Exception as e:
             logger.error(f"Error loading data from {self.data_file}: {e}")
             self._initialize_default_rooms()
             return False
     
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a point-in-time copy of all data, ready for JSON serialization"""
+        with self.data_lock:
+            snapshot = {
+                'users': dict(self._data['users']),
+                'rooms': dict(self._data['rooms']),
+                'user_preferences': dict(self._data['user_preferences']),
+                'file_shares': dict(self._data['file_shares']),
+                'banned_users': sorted(self._data['banned_users']),
+                'notifications': {k: list(v) for k, v in self._data['notifications'].items()}
+            }
+        with self._history_lock:
+            snapshot['message_history'] = list(self._data['message_history'])
+        with self._private_lock:
+            snapshot['private_messages'] = {
+                k: list(v) for k, v in self._data['private_messages'].items()
+            }
+        with self._reactions_lock:
+            snapshot['message_reactions'] = {
+                k: list(v) for k, v in self._data['message_reactions'].items()
+            }
+        snapshot['user_stats'] = self.stats.to_dict()
+        return snapshot
+    
     def save_data(self) -> bool:
-        """Save data to JSON file with thread safety"""
-        try:
-            with self.data_lock:
-                # Convert defaultdicts to regular dicts for JSON serialization
-                data_to_save = {}
-                for key, value in self._data.items():
-                    if isinstance(value, defaultdict):
-                        data_to_save[key] = dict(value)
-                    else:
-                        data_to_save[key] = value
-                
-                # Create backup before saving
-                if os.path.exists(self.data_file):
-                    backup_file = f"{self.data_file}.backup"
-                    os.replace(self.data_file, backup_file)
-                
-                with open(self.data_file, 'w', encoding='utf-8') as f:
-                    json.dump(data_to_save, f, ensure_ascii=False, indent=2)
-                
-                logger.debug("Data saved successfully")
+        """Save data to JSON file with thread safety
+        
+        If another thread is already saving, the request is folded into
+        that thread's next write and this call returns immediately.
+        """
+        if not self.persistent:
+            return True
+        
+        with self._save_state_lock:
+            self._save_pending = True
+            if self._saving:
                 return True
+            self._saving = True
+        
+        success = True
+        try:
+            while True:
+                with self._save_state_lock:
+                    if not self._save_pending:
+                        self._saving = False
+                        return success
+                    self._save_pending = False
+                success = self._write_file(self.snapshot())
         except Exception as e:
             logger.error(f"Error saving data to {self.data_file}: {e}")
+            with self._save_state_lock:
+                self._saving = False
             return False
     
+    def _write_file(self, data_to_save: Dict[str, Any]) -> bool:
+        tmp_file = f"{self.data_file}.tmp"
+        try:
+            # Write a complete new file, then swap it in atomically
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data_to_save, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.data_file)
+            
+            logger.debug("Data saved successfully")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving data to {self.data_file}: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return False
+    
+    def export_snapshot(self, path: str) -> str:
+        """Write a gzip-compressed point-in-time copy of all data to path
+        
+        Only the in-memory copy made by snapshot() holds locks; encoding and
+        compression run afterwards, so writers keep going during the export.
+        """
+        snapshot = self.snapshot()
+        snapshot['snapshot_time'] = datetime.now().isoformat()
+        
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        
+        self.last_backup = time.time()
+        logger.info(f"Snapshot exported to {path}")
+        return path
+    
     def _initialize_default_rooms(self):
         """Initialize default chat rooms"""
         self._data['rooms'] = {
@@ -126,33 +238,44 @@ class ChatDatabase:
     
     # User management methods
     def get_user(self, username: str) -> Optional[Dict[str, Any]]:
-        """Get user by username"""
+        """Get user by username (the returned dict must not be mutated)"""
         return self._data['users'].get(username)
     
-    def create_user(self, username: str, user_data: Dict[str, Any]) -> bool:
-        """Create a new user"""
+    def user_exists(self, username: str) -> bool:
+        """Check if a user exists"""
+        return username in self._data['users']
+    
+    def count_users(self) -> int:
+        """Get the number of registered users"""
+        return len(self._data['users'])
+    
+    def create_user(self, username: str, user_data: Dict[str, Any],
+                    first_user_admin: bool = False) -> bool:
+        """Create a new user
+        
+        With first_user_admin the very first account becomes an admin.
+        """
         try:
-            if username in self._data['users']:
-                return False
-            
-            self._data['users'][username] = user_data
-            
-            # Initialize user preferences
-            self._data['user_preferences'][username] = {
-                'theme': 'light',
-                'notifications': True,
-                'sound': True,
-                'show_online': True,
-                'allow_private': True
-            }
+            with self._user_lock(username), self.data_lock:
+                if username in self._data['users']:
+                    return False
+                
+                user_data = dict(user_data)
+                if first_user_admin:
+                    user_data['is_admin'] = not self._data['users']
+                self._data['users'][username] = user_data
+                
+                # Initialize user preferences
+                self._data['user_preferences'][username] = {
+                    'theme': 'light',
+                    'notifications': True,
+                    'sound': True,
+                    'show_online': True,
+                    'allow_private': True
+                }
             
             # Initialize user stats
-            self._data['user_stats'][username] = {
-                'message_count': 0,
-                'login_count': 0,
-                'days_active': 0,
-                'last_activity': None
-            }
+            self.stats.ensure_user(username)
             
             return self.save_data()
         except Exception as e:
@@ -162,15 +285,59 @@ class ChatDatabase:
     def update_user(self, username: str, updates: Dict[str, Any]) -> bool:
         """Update user data"""
         try:
-            if username not in self._data['users']:
-                return False
-            
-            self._data['users'][username].update(updates)
+            with self._user_lock(username):
+                user = self._data['users'].get(username)
+                if user is None:
+                    return False
+                self._data['users'][username] = {**user, **updates}
             return self.save_data()
         except Exception as e:
             logger.error(f"Error updating user {username}: {e}")
             return False
     
+    def toggle_admin(self, username: str) -> bool:
+        """Toggle admin status, refusing to demote the last admin"""
+        try:
+            with self._user_lock(username):
+                user = self._data['users'].get(username)
+                if user is None:
+                    return False
+                updated = {**user, 'is_admin': not user.get('is_admin', False)}
+                if not user.get('is_admin'):
+                    self._data['users'][username] = updated
+                else:
+                    # The admin count spans all users; demotions hold data_lock
+                    # until written so two of them cannot both see a second admin
+                    with self.data_lock:
+                        admins = sum(1 for u in self._data['users'].values() if u.get('is_admin'))
+                        if admins == 1:
+                            return False
+                        self._data['users'][username] = updated
+            return self.save_data()
+        except Exception as e:
+            logger.error(f"Error toggling admin for {username}: {e}")
+            return False
+    
+    def add_created_room(self, username: str, room_id: str) -> bool:
+        """Record a room in the creator's created_rooms list"""
+        with self._user_lock(username):
+            user = self._data['users'].get(username)
+            if user is None:
+                return False
+            created_rooms = user.get('created_rooms', []) + [room_id]
+            self._data['users'][username] = {**user, 'created_rooms': created_rooms}
+        return self.save_data()
+    
+    def mark_room_read(self, username: str, room_id: str) -> bool:
+        """Store the time a user last read a room"""
+        with self._user_lock(username):
+            user = self._data['users'].get(username)
+            if user is None:
+                return False
+            last_read = {**user.get('last_read', {}), room_id: datetime.now().isoformat()}
+            self._data['users'][username] = {**user, 'last_read': last_read}
+        return self.save_data()
+    
     def get_all_users(self) -> Dict[str, Dict[str, Any]]:
         """Get all users"""
         return self._data['users'].copy()
@@ -182,10 +349,11 @@ class ChatDatabase:
     def ban_user(self, username: str) -> bool:
         """Ban a user"""
         try:
-            if username not in self._data['banned_users']:
-                self._data['banned_users'].append(username)
-                return self.save_data()
-            return True
+            with self.data_lock:
+                if username in self._data['banned_users']:
+                    return True
+                self._data['banned_users'].add(username)
+            return self.save_data()
         except Exception as e:
             logger.error(f"Error banning user {username}: {e}")
             return False
@@ -193,23 +361,52 @@ class ChatDatabase:
     def unban_user(self, username: str) -> bool:
         """Unban a user"""
         try:
-            if username in self._data['banned_users']:
-                self._data['banned_users'].remove(username)
-                return self.save_data()
-            return True
+            with self.data_lock:
+                if username not in self._data['banned_users']:
+                    return True
+                self._data['banned_users'].discard(username)
+            return self.save_data()
         except Exception as e:
             logger.error(f"Error unbanning user {username}: {e}")
             return False
     
+    # Block list methods
+    def get_blocked_users(self, username: str) -> List[str]:
+        """Get the users blocked by username"""
+        return list(self._data['users'].get(username, {}).get('blocked_users', []))
+    
+    def block_user(self, username: str, target: str) -> bool:
+        """Add target to username's block list"""
+        with self._user_lock(username):
+            user = self._data['users'].get(username)
+            if user is None:
+                return False
+            blocked = set(user.get('blocked_users', []))
+            blocked.add(target)
+            self._data['users'][username] = {**user, 'blocked_users': sorted(blocked)}
+        return self.save_data()
+    
+    def unblock_user(self, username: str, target: str) -> bool:
+        """Remove target from username's block list"""
+        with self._user_lock(username):
+            user = self._data['users'].get(username)
+            if user is None or target not in user.get('blocked_users', []):
+                return False
+            blocked = [u for u in user['blocked_users'] if u != target]
+            self._data['users'][username] = {**user, 'blocked_users': blocked}
+        return self.save_data()
+    
     # Message management methods
     def add_message(self, message_data: Dict[str, Any]) -> bool:
         """Add a message to history"""
         try:
-            self._data['message_history'].append(message_data)
-            
-            # Keep only last 1000 messages
-            if len(self._data['message_history']) > 1000:
-                self._data['message_history'] = self._data['message_history'][-1000:]
+            with self._history_lock:
+                history = self._data['message_history']
+                history.append(message_data)
+                
+                # Keep only last 1000 messages
+                if len(history) > MAX_MESSAGE_HISTORY:
+                    del history[:len(history) - MAX_MESSAGE_HISTORY]
             
             return self.save_data()
         except Exception as e:
@@ -218,14 +415,24 @@ class ChatDatabase:
     
     def get_recent_messages(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent messages"""
-        return self._data['message_history'][-limit:]
+        with self._history_lock:
+            return self._data['message_history'][-limit:]
+    
+    def get_message_history(self) -> List[Dict[str, Any]]:
+        """Get a copy of the whole message history"""
+        with self._history_lock:
+            return list(self._data['message_history'])
+    
+    def count_messages(self) -> int:
+        """Get the number of stored messages"""
+        return len(self._data['message_history'])
     
     def search_messages(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Search messages by content"""
         query_lower = query.lower()
         results = []
         
-        for msg in reversed(self._data['message_history'][-200:]):
+        for msg in reversed(self.get_recent_messages(200)):
             if query_lower in msg.get('message', '').lower():
                 results.append(msg)
                 if len(results) >= limit:
@@ -233,14 +440,43 @@ class ChatDatabase:
         
         return results
     
+    def vote_poll(self, poll_id: str, username: str, option: str) -> Optional[Dict[str, Any]]:
+        """Record a poll vote, returns the updated poll data"""
+        with self._history_lock:
+            history = self._data['message_history']
+            for index in range(len(history) - 1, -1, -1):
+                msg = history[index]
+                if msg.get('type') != 'poll' or msg.get('poll_data', {}).get('id') != poll_id:
+                    continue
+                
+                poll_data = msg['poll_data']
+                # Remove previous vote if exists, then add the new one
+                options = {
+                    opt: [voter for voter in voters if voter != username]
+                    for opt, voters in poll_data['options'].items()
+                }
+                if option in options:
+                    options[option].append(username)
+                
+                poll_data = {**poll_data, 'options': options}
+                history[index] = {**msg, 'poll_data': poll_data}
+                break
+            else:
+                return None
+        
+        self.save_data()
+        return poll_data
+    
+    @staticmethod
+    def _private_key(user1: str, user2: str) -> str:
+        return '|'.join(sorted([user1, user2]))
+    
     def add_private_message(self, sender: str, recipient: str, message_data: Dict[str, Any]) -> bool:
         """Add a private message"""
         try:
-            key = tuple(sorted([sender, recipient]))
-            if key not in self._data['private_messages']:
-                self._data['private_messages'][key] = []
-            
-            self._data['private_messages'][key].append(message_data)
+            key = self._private_key(sender, recipient)
+            with self._private_lock:
+                self._data['private_messages'].setdefault(key, []).append(message_data)
             return self.save_data()
         except Exception as e:
             logger.error(f"Error adding private message: {e}")
@@ -248,8 +484,9 @@ class ChatDatabase:
     
     def get_private_messages(self, user1: str, user2: str) -> List[Dict[str, Any]]:
         """Get private messages between two users"""
-        key = tuple(sorted([user1, user2]))
-        return self._data['private_messages'].get(key, [])
+        key = self._private_key(user1, user2)
+        with self._private_lock:
+            return list(self._data['private_messages'].get(key, []))
     
     # Room management methods
     def get_room(self, room_id: str) -> Optional[Dict[str, Any]]:
@@ -263,20 +500,54 @@ class ChatDatabase:
     def create_room(self, room_id: str, room_data: Dict[str, Any]) -> bool:
         """Create a new room"""
         try:
-            if room_id in self._data['rooms']:
-                return False
-            
-            self._data['rooms'][room_id] = room_data
+            with self.data_lock:
+                if room_id in self._data['rooms']:
+                    return False
+                self._data['rooms'][room_id] = dict(room_data)
             return self.save_data()
         except Exception as e:
             logger.error(f"Error creating room {room_id}: {e}")
             return False
     
+    def add_room_member(self, room_id: str, username: str) -> bool:
+        """Add a user to a room's member list"""
+        try:
+            with self._room_lock(room_id):
+                room = self._data['rooms'].get(room_id)
+                if room is None:
+                    return False
+                
+                members = room.get('members', [])
+                if username in members:
+                    return True
+                
+                self._data['rooms'][room_id] = {**room, 'members': members + [username]}
+            return self.save_data()
+        except Exception as e:
+            logger.error(f"Error adding {username} to room {room_id}: {e}")
+            return False
+    
+    def remove_room_member(self, room_id: str, username: str) -> bool:
+        """Remove a user from a room's member list"""
+        try:
+            with self._room_lock(room_id):
+                room = self._data['rooms'].get(room_id)
+                if room is None or username not in room.get('members', []):
+                    return False
+                
+                members = [member for member in room['members'] if member != username]
+                self._data['rooms'][room_id] = {**room, 'members': members}
+            return self.save_data()
+        except Exception as e:
+            logger.error(f"Error removing {username} from room {room_id}: {e}")
+            return False
+    
     # File sharing methods
     def add_file_share(self, file_id: str, file_data: Dict[str, Any]) -> bool:
         """Add a shared file"""
         try:
-            self._data['file_shares'][file_id] = file_data
+            with self.data_lock:
+                self._data['file_shares'][file_id] = dict(file_data)
             return self.save_data()
         except Exception as e:
             logger.error(f"Error adding file share {file_id}: {e}")
@@ -289,11 +560,14 @@ class ChatDatabase:
     def update_file_downloads(self, file_id: str) -> bool:
         """Increment download count for a file"""
         try:
-            if file_id in self._data['file_shares']:
-                self._data['file_shares'][file_id]['downloads'] = \
-                    self._data['file_shares'][file_id].get('downloads', 0) + 1
-                return self.save_data()
-            return False
+            with self.data_lock:
+                file_data = self._data['file_shares'].get(file_id)
+                if file_data is None:
+                    return False
+                self._data['file_shares'][file_id] = {
+                    **file_data, 'downloads': file_data.get('downloads', 0) + 1
+                }
+            return self.save_data()
         except Exception as e:
             logger.error(f"Error updating file downloads {file_id}: {e}")
             return False
@@ -306,7 +580,8 @@ class ChatDatabase:
     def update_user_preferences(self, username: str, preferences: Dict[str, Any]) -> bool:
         """Update user preferences"""
         try:
-            self._data['user_preferences'][username] = preferences
+            with self._user_lock(username):
+                self._data['user_preferences'][username] = dict(preferences)
             return self.save_data()
         except Exception as e:
             logger.error(f"Error updating preferences for {username}: {e}")
@@ -315,12 +590,12 @@ class ChatDatabase:
     # User statistics methods
     def get_user_stats(self, username: str) -> Dict[str, Any]:
         """Get user statistics"""
-        return dict(self._data['user_stats'][username])
+        return self.stats.get_stats(username)
     
     def update_user_stats(self, username: str, updates: Dict[str, Any]) -> bool:
         """Update user statistics"""
         try:
-            self._data['user_stats'][username].update(updates)
+            self.stats.update(username, updates)
             return self.save_data()
         except Exception as e:
             logger.error(f"Error updating stats for {username}: {e}")
@@ -329,13 +604,21 @@ class ChatDatabase:
     def increment_message_count(self, username: str) -> bool:
         """Increment user message count"""
         try:
-            self._data['user_stats'][username]['message_count'] += 1
-            self._data['user_stats'][username]['last_activity'] = datetime.now().isoformat()
+            self.stats.record_message(username)
             return True  # Don't save immediately for performance
         except Exception as e:
             logger.error(f"Error incrementing message count for {username}: {e}")
             return False
     
+    def record_login(self, username: str) -> bool:
+        """Count a successful login"""
+        try:
+            self.stats.record_login(username)
+            return True
+        except Exception as e:
+            logger.error(f"Error recording login for {username}: {e}")
+            return False
+    
     # Message reactions methods
     def add_message_reaction(self, message_id: str, username: str, reaction: str) -> bool:
         """Add a reaction to a message"""
@@ -345,7 +628,8 @@ class ChatDatabase:
                 'reaction': reaction,
                 'timestamp': datetime.now().isoformat()
             }
-            self._data['message_reactions'][message_id].append(reaction_data)
+            with self._reactions_lock:
+                self._data['message_reactions'][message_id].append(reaction_data)
             return self.save_data()
         except Exception as e:
             logger.error(f"Error adding reaction to message {message_id}: {e}")
@@ -354,19 +638,115 @@ class ChatDatabase:
     def remove_message_reaction(self, message_id: str, username: str, reaction: str) -> bool:
         """Remove a reaction from a message"""
         try:
-            reactions = self._data['message_reactions'][message_id]
-            for r in reactions[:]:  # Create a copy to iterate safely
-                if r['username'] == username and r['reaction'] == reaction:
-                    reactions.remove(r)
-                    return self.save_data()
-            return False
+            with self._reactions_lock:
+                reactions = self._data['message_reactions'].get(message_id, [])
+                for r in reactions:
+                    if r['username'] == username and r['reaction'] == reaction:
+                        reactions.remove(r)
+                        break
+                else:
+                    return False
+            return self.save_data()
         except Exception as e:
             logger.error(f"Error removing reaction from message {message_id}: {e}")
             return False
     
+    def toggle_message_reaction(self, message_id: str, username: str,
+                                reaction: str) -> Tuple[str, int]:
+        """Add or remove a reaction, returns the action taken and the new total"""
+        with self._reactions_lock:
+            reactions = self._data['message_reactions'][message_id]
+            for r in reactions:
+                if r['username'] == username and r['reaction'] == reaction:
+                    reactions.remove(r)
+                    action = 'removed'
+                    break
+            else:
+                reactions.append({
+                    'username': username,
+                    'reaction': reaction,
+                    'timestamp': datetime.now().isoformat()
+                })
+                action = 'added'
+            total = len(reactions)
+        self.save_data()
+        return action, total
+    
     def get_message_reactions(self, message_id: str) -> List[Dict[str, Any]]:
         """Get reactions for a message"""
-        return self._data['message_reactions'][message_id].copy()
+        with self._reactions_lock:
+            return list(self._data['message_reactions'].get(message_id, []))
+    
+    # Presence, session and rate-limit methods (process-local, not persisted)
+    def set_online(self, username: str, info: Dict[str, Any]) -> None:
+        """Mark a user online with their connection info"""
+        with self._presence_lock:
+            self._active_users[username] = dict(info)
+    
+    def set_offline(self, username: str) -> bool:
+        """Mark a user offline, returns True if they were online"""
+        with self._presence_lock:
+            return self._active_users.pop(username, None) is not None
+    
+    def is_online(self, username: str) -> bool:
+        """Check if a user is online"""
+        return username in self._active_users
+    
+    def get_online_user(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get an online user's connection info (the dict must not be mutated)"""
+        return self._active_users.get(username)
+    
+    def get_online_users(self) -> Dict[str, Dict[str, Any]]:
+        """Get a copy of all online users"""
+        with self._presence_lock:
+            return dict(self._active_users)
+    
+    def online_usernames(self) -> List[str]:
+        """Get the usernames of online users"""
+        with self._presence_lock:
+            return list(self._active_users)
+    
+    def set_user_room(self, username: str, room_id: str) -> bool:
+        """Record the room an online user is currently in"""
+        with self._presence_lock:
+            info = self._active_users.get(username)
+            if info is None:
+                return False
+            self._active_users[username] = {**info, 'room': room_id}
+            return True
+    
+    def set_session(self, username: str, session_id: str) -> None:
+        """Remember the login session of a user"""
+        with self._presence_lock:
+            self._sessions[username] = session_id
+    
+    def cleanup_sessions(self, max_age: float = 24 * 60 * 60) -> int:
+        """Drop sessions that are too old or belong to offline users"""
+        now = datetime.now()
+        with self._presence_lock:
+            expired = []
+            for username, session_data in self._sessions.items():
+                if isinstance(session_data, dict) and 'last_activity' in session_data:
+                    last_activity = datetime.fromisoformat(session_data['last_activity'])
+                    if (now - last_activity).total_seconds() > max_age:
+                        expired.append(username)
+                elif username not in self._active_users:
+                    expired.append(username)
+            for username in expired:
+                del self._sessions[username]
+        return len(expired)
+    
+    def check_rate_limit(self, key: str, limit: int, window: float) -> bool:
+        """Count a request for key, returns False if limit was already reached in window"""
+        now = time.time()
+        with self._rate_lock:
+            events = self._rate_events[key]
+            while events and events[0] < now - window:
+                events.popleft()
+            if len(events) >= limit:
+                return False
+            events.append(now)
+            return True
     
     # Utility methods
     def get_database_stats(self) -> Dict[str, Any]:
@@ -378,7 +758,7 @@ class ChatDatabase:
             'total_files': len(self._data['file_shares']),
             'banned_users': len(self._data['banned_users']),
             'private_message_threads': len(self._data['private_messages']),
-            'last_backup': os.path.getmtime(f"{self.data_file}.backup") if os.path.exists(f"{self.data_file}.backup") else None
+            'last_backup': self.last_backup
         }
     
     def cleanup_old_data(self, days: int = 30) -> int:
@@ -388,21 +768,23 @@ class ChatDatabase:
         
         try:
             # Clean old messages
-            original_count = len(self._data['message_history'])
-            self._data['message_history'] = [
-                msg for msg in self._data['message_history']
-                if datetime.fromisoformat(msg.get('timestamp', '1970-01-01')).timestamp() > cutoff_time
-            ]
-            cleaned_count += original_count - len(self._data['message_history'])
+            with self._history_lock:
+                original_count = len(self._data['message_history'])
+                self._data['message_history'] = [
+                    msg for msg in self._data['message_history']
+                    if datetime.fromisoformat(msg.get('timestamp', '1970-01-01')).timestamp() > cutoff_time
+                ]
+                cleaned_count += original_count - len(self._data['message_history'])
+                message_ids = {msg['id'] for msg in self._data['message_history']}
             
             # Clean orphaned reactions
-            message_ids = {msg['id'] for msg in self._data['message_history']}
-            orphaned_reactions = [
-                msg_id for msg_id in self._data['message_reactions']
-                if msg_id not in message_ids
-            ]
-            for msg_id in orphaned_reactions:
-                del self._data['message_reactions'][msg_id]
+            with self._reactions_lock:
+                orphaned_reactions = [
+                    msg_id for msg_id in self._data['message_reactions']
+                    if msg_id not in message_ids
+                ]
+                for msg_id in orphaned_reactions:
+                    del self._data['message_reactions'][msg_id]
             cleaned_count += len(orphaned_reactions)
             
             if cleaned_count > 0:
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Message fan-out filtering for Real-Time Chat Application
+Keeps per-room exclusion sets so block lists are enforced without per-message scans
+"""
+import logging
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+class FanoutFilter:
+    """Precomputed block-list filter for room broadcasts
+
+    For every (room, sender) pair the filter keeps the set of socket ids in
+    that room whose owner has blocked the sender. The sets are updated
+    incrementally on block/unblock/join/leave, so looking up who to skip
+    when a message is emitted is a single dict access.
+    """
+
+    def __init__(self, blocked: Optional[Dict[str, Iterable[str]]] = None):
+        self._lock = Lock()
+        self._blocks = defaultdict(set)        # blocker -> users they blocked
+        self._sid_user = {}                    # sid -> username
+        self._sid_rooms = defaultdict(set)     # sid -> rooms the sid is in
+        self._user_sids = defaultdict(set)     # username -> connected sids
+        self._excluded = defaultdict(set)      # (room, sender) -> sids to skip
+
+        for blocker, targets in (blocked or {}).items():
+            self._blocks[blocker].update(targets)
+
+    # Block list maintenance
+    def block(self, blocker: str, target: str) -> None:
+        """Record that blocker no longer wants to receive target's messages"""
+        with self._lock:
+            if target in self._blocks[blocker]:
+                return
+            self._blocks[blocker].add(target)
+            for sid in self._user_sids.get(blocker, ()):
+                for room in self._sid_rooms.get(sid, ()):
+                    self._excluded[(room, target)].add(sid)
+
+    def unblock(self, blocker: str, target: str) -> None:
+        """Remove a block previously added with block()"""
+        with self._lock:
+            if target not in self._blocks.get(blocker, ()):
+                return
+            self._blocks[blocker].discard(target)
+            for sid in self._user_sids.get(blocker, ()):
+                for room in self._sid_rooms.get(sid, ()):
+                    self._discard_excluded(room, target, sid)
+
+    def is_blocked(self, blocker: str, target: str) -> bool:
+        """Check if blocker has blocked target"""
+        return target in self._blocks.get(blocker, ())
+
+    def get_blocked(self, blocker: str) -> Set[str]:
+        """Get the users blocked by blocker"""
+        with self._lock:
+            return set(self._blocks.get(blocker, ()))
+
+    # Room membership maintenance
+    def join(self, sid: str, username: str, room: str) -> None:
+        """Register a socket as a member of a room"""
+        with self._lock:
+            if room in self._sid_rooms.get(sid, ()):
+                return
+            self._sid_user[sid] = username
+            self._sid_rooms[sid].add(room)
+            self._user_sids[username].add(sid)
+            for target in self._blocks.get(username, ()):
+                self._excluded[(room, target)].add(sid)
+
+    def leave(self, sid: str, room: str) -> None:
+        """Remove a socket from a room"""
+        with self._lock:
+            self._leave(sid, room)
+
+    def disconnect(self, sid: str) -> None:
+        """Remove a socket from every room it joined"""
+        with self._lock:
+            for room in list(self._sid_rooms.get(sid, ())):
+                self._leave(sid, room)
+            self._sid_rooms.pop(sid, None)
+            username = self._sid_user.pop(sid, None)
+            if username is not None:
+                self._user_sids[username].discard(sid)
+                if not self._user_sids[username]:
+                    del self._user_sids[username]
+
+    # Fan-out lookup
+    def excluded_sids(self, room: str, sender: str) -> Optional[List[str]]:
+        """Get the sids in room that must not receive sender's messages
+
+        Returns None when nobody has to be skipped so the result can be
+        passed straight to ``emit(..., skip_sid=...)``.
+        """
+        # Copied under the lock: block/join may mutate the set concurrently
+        with self._lock:
+            sids = self._excluded.get((room, sender))
+            return list(sids) if sids else None
+
+    def _leave(self, sid: str, room: str) -> None:
+        rooms = self._sid_rooms.get(sid)
+        if not rooms or room not in rooms:
+            return
+        rooms.discard(room)
+        username = self._sid_user.get(sid)
+        for target in self._blocks.get(username, ()):
+            self._discard_excluded(room, target, sid)
+
+    def _discard_excluded(self, room: str, target: str, sid: str) -> None:
+        key: Tuple[str, str] = (room, target)
+        sids = self._excluded.get(key)
+        if sids is None:
+            return
+        sids.discard(sid)
+        if not sids:
+            del self._excluded[key]
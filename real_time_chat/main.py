@@ -3,7 +3,6 @@ from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
-import json
 import os
 import uuid
 import hashlib
@@ -12,11 +11,13 @@ import secrets
 import base64
 from functools import wraps
 import logging
-from collections import defaultdict, deque
 import re
-from threading import Lock
 import bleach
 from urllib.parse import urlparse
+from fanout import FanoutFilter
+from room_index import RoomIndex
+from database import ChatDatabase
+from backup import create_backup, list_backups
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -33,73 +34,13 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
-# Data storage with thread safety
-data_lock = Lock()
-users = {}
-active_users = {}  # Currently online users
-message_history = []  # Store message history
-private_messages = {}  # Store private messages
-rooms = {
-    'general': {'name': 'عمومی', 'description': 'اتاق چت عمومی', 'created_by': 'system', 'created_at': datetime.now().isoformat()},
-    'tech': {'name': 'فناوری', 'description': 'بحث درباره فناوری', 'created_by': 'system', 'created_at': datetime.now().isoformat()},
-    'random': {'name': 'تصادفی', 'description': 'گفتگو آزاد', 'created_by': 'system', 'created_at': datetime.now().isoformat()}
-}
-user_preferences = {}  # Store user preferences
-banned_users = set()  # Store banned users
-user_sessions = {}  # Track user sessions
-rate_limiter = defaultdict(lambda: deque())  # Rate limiting
-file_shares = {}  # Store shared files
-user_stats = defaultdict(lambda: {'message_count': 0, 'login_count': 0, 'days_active': 0, 'last_activity': None})
-message_reactions = defaultdict(list)  # Store message reactions
-blocked_users = defaultdict(set)  # Users blocked by other users
-notifications = defaultdict(list)  # Store user notifications
-session_tokens = {}  # Store session tokens for better security
-
 # File to persist data
 DATA_FILE = 'chat_data.json'
 
-def load_data():
-    global users, message_history, private_messages, rooms, user_preferences, user_stats, file_shares, message_reactions
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                users = data.get('users', {})
-                message_history = data.get('message_history', [])
-                private_messages = data.get('private_messages', {})
-                rooms = data.get('rooms', {
-                    'general': {'name': 'عمومی', 'description': 'اتاق چت عمومی', 'created_by': 'system', 'created_at': datetime.now().isoformat()}
-                })
-                user_preferences = data.get('user_preferences', {})
-                user_stats.update(data.get('user_stats', {}))
-                file_shares = data.get('file_shares', {})
-                message_reactions.update(data.get('message_reactions', {}))
-                
-                # Initialize missing user stats
-                for username in users:
-                    if username not in user_stats:
-                        user_stats[username] = {'message_count': 0, 'login_count': 0, 'days_active': 0, 'last_activity': None}
-                        
-        except Exception as e:
-            logger.error(f"Error loading data: {e}")
-            print(f"Error loading data: {e}")
-
-def save_data():
-    try:
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump({
-                'users': users,
-                'message_history': message_history,
-                'private_messages': private_messages,
-                'rooms': rooms,
-                'user_preferences': user_preferences,
-                'user_stats': dict(user_stats),
-                'file_shares': file_shares,
-                'message_reactions': dict(message_reactions)
-            }, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving data: {e}")
-        print(f"Error saving data: {e}")
+# All shared state, including online users, sessions and rate limits, lives
+# in the repository so handler threads synchronize through its locks
+db = ChatDatabase(DATA_FILE)
+session_tokens = {}  # Store session tokens for better security
 
 # Security and utility functions
 def require_login(f):
@@ -116,7 +57,7 @@ def require_admin(f):
         if 'username' not in session:
             return redirect(url_for('login'))
         username = session['username']
-        if not users.get(username, {}).get('is_admin', False):
+        if not (db.get_user(username) or {}).get('is_admin', False):
             flash('دسترسی غیر مجاز!', 'error')
             return redirect(url_for('index'))
         return f(*args, **kwargs)
@@ -124,20 +65,7 @@ def require_admin(f):
 
 def check_rate_limit(username, action='message', limit=10, window=60):
     """Rate limiting to prevent spam"""
-    now = time.time()
-    key = f"{username}_{action}"
-    
-    # Clean old entries
-    while rate_limiter[key] and rate_limiter[key][0] < now - window:
-        rate_limiter[key].popleft()
-    
-    # Check limit
-    if len(rate_limiter[key]) >= limit:
-        return False
-    
-    # Add current request
-    rate_limiter[key].append(now)
-    return True
+    return db.check_rate_limit(f"{username}_{action}", limit, window)
 
 def encrypt_message(message, key=None):
     """Simple message encryption for sensitive data"""
@@ -238,25 +166,29 @@ def log_security_event(event_type, username, details):
 
 def cleanup_old_sessions():
     """Clean up old inactive sessions"""
-    current_time = datetime.now()
-    expired_sessions = []
-    
-    for username, session_data in user_sessions.items():
-        if isinstance(session_data, dict) and 'last_activity' in session_data:
-            last_activity = datetime.fromisoformat(session_data['last_activity'])
-            if current_time - last_activity > timedelta(hours=24):
-                expired_sessions.append(username)
-        elif username not in active_users:
-            expired_sessions.append(username)
-    
-    for username in expired_sessions:
-        if username in user_sessions:
-            del user_sessions[username]
-    
-    return len(expired_sessions)
+    return db.cleanup_sessions(timedelta(hours=24).total_seconds())
 
-# Load data on startup
-load_data()
+# Per-room block-list filter used when fanning out room messages
+fanout = FanoutFilter({username: db.get_blocked_users(username)
+                       for username in db.get_all_users()})
+
+# Room membership index and cached room statistics for /api/rooms
+room_index = RoomIndex()
+for room_id, room_data in db.get_all_rooms().items():
+    room_index.set_room(room_id, room_data)
+room_index.seed_message_counts(db.get_message_history())
+
+def add_room_member(room_id, username):
+    """Add a user to a room's persisted member list"""
+    if db.get_room(room_id) and room_index.add_member(room_id, username):
+        return db.add_room_member(room_id, username)
+    return False
+
+def remove_room_member(room_id, username):
+    """Remove a user from a room's persisted member list"""
+    if db.get_room(room_id) and room_index.remove_member(room_id, username):
+        return db.remove_room_member(room_id, username)
+    return False
 
 
 @app.route('/')
@@ -284,7 +216,7 @@ def register():
             error = 'نام کاربری فقط می‌تواند شامل حروف و اعداد باشد.'
         elif len(password) < 6:
             error = 'رمز عبور باید حداقل 6 کاراکتر باشد.'
-        elif username in users:
+        elif db.user_exists(username):
             error = 'یوزر نیم از قبل وجود دارد.'
         elif not password == confirm_password:
             error = 'پسورد دوم مطابق با پسورد اول نیست'
@@ -292,35 +224,22 @@ def register():
             error = 'ایمیل معتبر وارد کنید.'
         
         if not error:
-            users[username] = {
+            created = db.create_user(username, {
                 'username': username,
                 'password': generate_password_hash(password),
                 'email': email,
                 'join_date': datetime.now().isoformat(),
                 'last_seen': datetime.now().isoformat(),
-                'is_admin': len(users) == 0,  # First user is admin
                 'avatar': '',
                 'status': 'آنلاین',
                 'bio': '',
                 'created_rooms': [],
                 'blocked_users': []
-            }
-            user_preferences[username] = {
-                'theme': 'light',
-                'notifications': True,
-                'sound': True,
-                'show_online': True,
-                'allow_private': True
-            }
-            user_stats[username] = {
-                'message_count': 0,
-                'login_count': 0,
-                'days_active': 0,
-                'last_activity': None
-            }
-            save_data()
-            flash('ثبت نام با موفقیت انجام شد!', 'success')
-            return redirect(url_for('login'))
+            }, first_user_admin=True)  # First user is admin
+            if created:
+                flash('ثبت نام با موفقیت انجام شد!', 'success')
+                return redirect(url_for('login'))
+            error = 'یوزر نیم از قبل وجود دارد.'
         return render_template('register.html', error=error)
     return render_template('register.html')
 
@@ -332,7 +251,7 @@ def login():
         password = request.form['password']
         
         # Check if user is banned
-        if username in banned_users:
+        if db.is_user_banned(username):
             error = 'حساب کاربری شما مسدود شده است!'
             return render_template('login.html', error=error)
         
@@ -341,17 +260,15 @@ def login():
             error = 'تعداد تلاش‌های ورود زیاد است. لطفاً بعداً تلاش کنید.'
             return render_template('login.html', error=error)
         
-        if username in users and check_password_hash(users[username]['password'], password):
+        user = db.get_user(username)
+        if user and check_password_hash(user['password'], password):
             session['username'] = username
             session['session_id'] = str(uuid.uuid4())
-            user_sessions[username] = session['session_id']
+            db.set_session(username, session['session_id'])
             
             # Update login stats
-            user_stats[username]['login_count'] += 1
-            user_stats[username]['last_activity'] = datetime.now().isoformat()
-            users[username]['last_seen'] = datetime.now().isoformat()
-            
-            save_data()
+            db.record_login(username)
+            db.update_user(username, {'last_seen': datetime.now().isoformat()})
             logger.info(f"User {username} logged in successfully")
             flash('با موفقیت وارد شدید!', 'success')
             return redirect(url_for('index'))
@@ -365,8 +282,8 @@ def login():
 @app.route('/logout')
 def logout():
     username = session.get('username')
-    if username and username in active_users:
-        del active_users[username]
+    if username and db.set_offline(username):
+        room_index.set_offline(username)
         socketio.emit('user_left', {'username': username}, broadcast=True)
     session.pop('username', None)
     return redirect(url_for('index'))
@@ -375,9 +292,9 @@ def logout():
 @require_login
 def profile():
     username = session['username']
-    user_data = users.get(username, {})
-    preferences = user_preferences.get(username, {})
-    stats = user_stats.get(username, {})
+    user_data = dict(db.get_user(username) or {})
+    preferences = db.get_user_preferences(username)
+    stats = db.get_user_stats(username)
     
     # Add stats to user data
     user_data.update(stats)
@@ -410,20 +327,20 @@ def update_profile():
         flash('بیوگرافی نمی‌تواند بیش از 500 کاراکتر باشد.', 'error')
         return redirect(url_for('profile'))
     
-    if username in users:
-        users[username]['email'] = email
-        users[username]['status'] = status
-        users[username]['bio'] = bio
-        
-    user_preferences[username] = {
+    db.update_user(username, {
+        'email': email,
+        'status': status,
+        'bio': bio
+    })
+    
+    db.update_user_preferences(username, {
         'theme': theme,
         'notifications': notifications,
         'sound': sound,
         'show_online': show_online,
         'allow_private': allow_private
-    }
+    })
     
-    save_data()
     flash('پروفایل با موفقیت بروزرسانی شد!', 'success')
     return redirect(url_for('profile'))
 
@@ -431,11 +348,13 @@ def update_profile():
 @require_admin
 def admin_panel():
     return render_template('admin.html', 
-                         users=users, 
-                         active_users=active_users,
-                         message_count=len(message_history),
-                         rooms=rooms,
-                         user_stats=dict(user_stats))
+                         users=db.get_all_users(), 
+                         active_users=db.get_online_users(),
+                         message_count=db.count_messages(),
+                         rooms=db.get_all_rooms(),
+                         user_stats=db.stats.all_stats(),
+                         dashboard=db.stats.dashboard(),
+                         leaderboard=db.stats.leaderboard())
 
 @app.route('/api/users')
 def api_users():
@@ -443,8 +362,8 @@ def api_users():
         return jsonify({'error': 'Unauthorized'}), 401
     
     return jsonify({
-        'active_users': list(active_users.keys()),
-        'total_users': len(users)
+        'active_users': db.online_usernames(),
+        'total_users': db.count_users()
     })
 
 @app.route('/api/rooms')
@@ -452,7 +371,7 @@ def api_rooms():
     if 'username' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    return jsonify(rooms)
+    return jsonify(room_index.snapshot())
 
 @app.route('/api/history')
 def api_history():
@@ -460,7 +379,7 @@ def api_history():
         return jsonify({'error': 'Unauthorized'}), 401
     
     # Return last 50 messages
-    return jsonify(message_history[-50:])
+    return jsonify(db.get_recent_messages(50))
 
 # New API endpoints
 @app.route('/api/ban_user', methods=['POST'])
@@ -469,14 +388,13 @@ def ban_user_api():
     data = request.get_json()
     username_to_ban = data.get('username')
     
-    if username_to_ban and username_to_ban in users:
-        banned_users.add(username_to_ban)
+    if username_to_ban and db.user_exists(username_to_ban):
+        db.ban_user(username_to_ban)
         # Disconnect banned user if online
-        if username_to_ban in active_users:
-            del active_users[username_to_ban]
+        if db.set_offline(username_to_ban):
+            room_index.set_offline(username_to_ban)
             socketio.emit('user_banned', {'username': username_to_ban}, broadcast=True)
         
-        save_data()
         logger.info(f"User {username_to_ban} banned by {session['username']}")
         return jsonify({'success': True})
     
@@ -488,9 +406,8 @@ def unban_user_api():
     data = request.get_json()
     username_to_unban = data.get('username')
     
-    if username_to_unban and username_to_unban in banned_users:
-        banned_users.remove(username_to_unban)
-        save_data()
+    if username_to_unban and db.is_user_banned(username_to_unban):
+        db.unban_user(username_to_unban)
         logger.info(f"User {username_to_unban} unbanned by {session['username']}")
         return jsonify({'success': True})
     
@@ -502,13 +419,11 @@ def toggle_admin_api():
     data = request.get_json()
     username_to_toggle = data.get('username')
     
-    if username_to_toggle and username_to_toggle in users:
-        # Don't allow removing admin from the first user
-        if users[username_to_toggle].get('is_admin') and len([u for u in users.values() if u.get('is_admin')]) == 1:
+    if username_to_toggle and db.user_exists(username_to_toggle):
+        # Don't allow removing admin from the last admin
+        if not db.toggle_admin(username_to_toggle):
             return jsonify({'success': False, 'error': 'Cannot remove last admin'})
         
-        users[username_to_toggle]['is_admin'] = not users[username_to_toggle].get('is_admin', False)
-        save_data()
         logger.info(f"Admin status toggled for {username_to_toggle} by {session['username']}")
         return jsonify({'success': True})
     
@@ -529,11 +444,8 @@ def create_room_api():
     
     room_id = room_name.lower().replace(' ', '_')
     
-    if room_id in rooms:
-        return jsonify({'success': False, 'error': 'Room already exists'})
-    
     username = session['username']
-    rooms[room_id] = {
+    room_data = {
         'name': room_name,
         'description': room_description,
         'created_by': username,
@@ -541,18 +453,19 @@ def create_room_api():
         'members': [username]
     }
     
+    if not db.create_room(room_id, room_data):
+        return jsonify({'success': False, 'error': 'Room already exists'})
+    room_index.set_room(room_id, room_data)
+    
     # Add to user's created rooms
-    if 'created_rooms' not in users[username]:
-        users[username]['created_rooms'] = []
-    users[username]['created_rooms'].append(room_id)
+    db.add_created_room(username, room_id)
     
-    save_data()
     logger.info(f"Room {room_name} created by {username}")
     
     # Notify all users about new room
     socketio.emit('new_room', {
         'room_id': room_id,
-        'room_data': rooms[room_id]
+        'room_data': room_data
     }, broadcast=True)
     
     return jsonify({'success': True, 'room_id': room_id})
@@ -584,23 +497,23 @@ def upload_file_api():
             
             # Store file info
             file_id = str(uuid.uuid4())
-            file_shares[file_id] = {
+            file_size = os.path.getsize(file_path)
+            db.add_file_share(file_id, {
                 'filename': filename,
                 'original_name': file.filename,
                 'uploaded_by': username,
                 'upload_time': datetime.now().isoformat(),
-                'file_size': os.path.getsize(file_path),
+                'file_size': file_size,
                 'downloads': 0
-            }
+            })
             
-            save_data()
             logger.info(f"File {filename} uploaded by {username}")
             
             return jsonify({
                 'success': True,
                 'file_id': file_id,
                 'filename': file.filename,
-                'file_size': file_shares[file_id]['file_size']
+                'file_size': file_size
             })
             
         except Exception as e:
@@ -612,18 +525,17 @@ def upload_file_api():
 @app.route('/api/download_file/<file_id>')
 @require_login
 def download_file_api(file_id):
-    if file_id not in file_shares:
+    file_info = db.get_file_share(file_id)
+    if file_info is None:
         return jsonify({'error': 'File not found'}), 404
     
-    file_info = file_shares[file_id]
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], file_info['filename'])
     
     if not os.path.exists(file_path):
         return jsonify({'error': 'File not found on disk'}), 404
     
     # Update download count
-    file_shares[file_id]['downloads'] += 1
-    save_data()
+    db.update_file_downloads(file_id)
     
     return send_from_directory(app.config['UPLOAD_FOLDER'], file_info['filename'],
                                as_attachment=True, download_name=file_info['original_name'])
@@ -635,13 +547,10 @@ def search_messages_api():
     if not query or len(query) < 2:
         return jsonify({'results': []})
     
-    # Search in message history
-    results = []
-    for msg in message_history[-200:]:  # Search last 200 messages
-        if query in msg.get('message', '').lower():
-            results.append(msg)
+    # Search the last 200 messages, newest 20 matches in chronological order
+    results = db.search_messages(query, limit=20)
     
-    return jsonify({'results': results[-20:]})
+    return jsonify({'results': list(reversed(results))})
 
 @app.route('/api/react_to_message', methods=['POST'])
 @require_login
@@ -654,31 +563,8 @@ def react_to_message_api():
     if not message_id or not reaction:
         return jsonify({'success': False, 'error': 'Missing data'})
     
-    # Add or remove reaction
-    if message_id not in message_reactions:
-        message_reactions[message_id] = []
-    
-    # Check if user already reacted with this emoji
-    existing_reaction = None
-    for r in message_reactions[message_id]:
-        if r['username'] == username and r['reaction'] == reaction:
-            existing_reaction = r
-            break
-    
-    if existing_reaction:
-        # Remove reaction
-        message_reactions[message_id].remove(existing_reaction)
-        action = 'removed'
-    else:
-        # Add reaction
-        message_reactions[message_id].append({
-            'username': username,
-            'reaction': reaction,
-            'timestamp': datetime.now().isoformat()
-        })
-        action = 'added'
-    
-    save_data()
+    # Add or remove reaction depending on whether the user already reacted
+    action, total_reactions = db.toggle_message_reaction(message_id, username, reaction)
     
     # Notify all users about the reaction
     socketio.emit('message_reaction', {
@@ -686,7 +572,7 @@ def react_to_message_api():
         'username': username,
         'reaction': reaction,
         'action': action,
-        'total_reactions': len(message_reactions[message_id])
+        'total_reactions': total_reactions
     }, broadcast=True)
     
     return jsonify({'success': True, 'action': action})
@@ -701,11 +587,11 @@ def block_user_api():
     if not user_to_block or user_to_block == username:
         return jsonify({'success': False, 'error': 'Invalid user'})
     
-    if user_to_block not in users:
+    if not db.user_exists(user_to_block):
         return jsonify({'success': False, 'error': 'User not found'})
     
-    blocked_users[username].add(user_to_block)
-    save_data()
+    db.block_user(username, user_to_block)
+    fanout.block(username, user_to_block)
     
     return jsonify({'success': True})
 
@@ -716,9 +602,8 @@ def unblock_user_api():
     user_to_unblock = data.get('username')
     username = session['username']
     
-    if user_to_unblock in blocked_users[username]:
-        blocked_users[username].remove(user_to_unblock)
-        save_data()
+    if db.unblock_user(username, user_to_unblock):
+        fanout.unblock(username, user_to_unblock)
         return jsonify({'success': True})
     
     return jsonify({'success': False, 'error': 'User not blocked'})
@@ -726,59 +611,95 @@ def unblock_user_api():
 @app.route('/api/user_stats/<username>')
 @require_login
 def get_user_stats_api(username):
-    if username not in users:
+    user = db.get_user(username)
+    if user is None:
         return jsonify({'error': 'User not found'}), 404
     
-    stats = user_stats.get(username, {})
+    stats = db.get_user_stats(username)
     user_info = {
         'username': username,
-        'join_date': users[username].get('join_date'),
-        'last_seen': users[username].get('last_seen'),
-        'is_admin': users[username].get('is_admin', False),
-        'message_count': stats.get('message_count', 0),
-        'login_count': stats.get('login_count', 0),
-        'days_active': stats.get('days_active', 0)
+        'join_date': user.get('join_date'),
+        'last_seen': user.get('last_seen'),
+        'is_admin': user.get('is_admin', False),
+        'message_count': stats['message_count'],
+        'login_count': stats['login_count'],
+        'days_active': stats['days_active'],
+        'hourly_activity': stats['hourly_activity'],
+        'daily_activity': stats['daily_activity']
     }
     
     return jsonify(user_info)
 
+@app.route('/api/leaderboard')
+@require_login
+def leaderboard_api():
+    key = request.args.get('by', 'message_count')
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    
+    try:
+        return jsonify({'leaderboard': db.stats.leaderboard(limit=limit, key=key)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/admin/stats')
+@require_admin
+def admin_stats_api():
+    return jsonify(db.stats.dashboard(days=request.args.get('days', 7, type=int)))
+
+@app.route('/api/admin/backup', methods=['GET', 'POST'])
+@require_admin
+def admin_backup_api():
+    if request.method == 'POST':
+        # Snapshot export runs in the background so chat traffic is not held up
+        socketio.start_background_task(create_backup, db)
+        logger.info(f"Backup started by {session['username']}")
+        return jsonify({'success': True, 'status': 'started'})
+    
+    return jsonify({
+        'backups': [os.path.basename(path) for path in list_backups()],
+        'last_backup': db.last_backup
+    })
+
 
 # Enhanced Socket.IO Events
 @socketio.on('connect')
 def on_connect():
     if 'username' in session:
         username = session['username']
-        active_users[username] = {
+        db.set_online(username, {
             'username': username,
             'join_time': datetime.now().isoformat(),
             'room': 'general'
-        }
+        })
         join_room('general')
+        fanout.join(request.sid, username, 'general')
+        room_index.set_online(username)
         
         # Update user last seen
-        if username in users:
-            users[username]['last_seen'] = datetime.now().isoformat()
+        db.update_user(username, {'last_seen': datetime.now().isoformat()})
+        add_room_member('general', username)
         
         emit('user_joined', {
             'username': username,
-            'active_users': list(active_users.keys())
+            'active_users': db.online_usernames()
         }, broadcast=True)
         
         # Send recent messages to new user
-        for msg in message_history[-20:]:
+        for msg in db.get_recent_messages(20):
             emit('message', msg)
 
 @socketio.on('disconnect')
 def on_disconnect():
     if 'username' in session:
         username = session['username']
-        if username in active_users:
-            del active_users[username]
+        db.set_offline(username)
+        room_index.set_offline(username)
         leave_room('general')
+        fanout.disconnect(request.sid)
         
         emit('user_left', {
             'username': username,
-            'active_users': list(active_users.keys())
+            'active_users': db.online_usernames()
         }, broadcast=True)
 
 @socketio.on('message')
@@ -795,7 +716,7 @@ def handle_message(data):
         return
     
     # Check for banned users
-    if username in banned_users:
+    if db.is_user_banned(username):
         emit('error', {'message': 'شما ممنوع الارسال هستید!'})
         return
     
@@ -815,20 +736,14 @@ def handle_message(data):
         'file_id': data.get('file_id') if message_type == 'file' else None
     }
     
-    # Store message
-    message_history.append(message_data)
+    # Store message (the repository keeps only the last 1000)
+    db.add_message(message_data)
+    room_index.record_message(room)
     
     # Update user stats
-    user_stats[username]['message_count'] += 1
-    user_stats[username]['last_activity'] = datetime.now().isoformat()
-    
-    # Keep only last 1000 messages
-    if len(message_history) > 1000:
-        message_history.pop(0)
+    db.increment_message_count(username)
     
-    save_data()
-    
-    emit('message', message_data, room=room)
+    emit('message', message_data, room=room, skip_sid=fanout.excluded_sids(room, username))
 
 @socketio.on('private_message')
 def handle_private_message(data):
@@ -839,7 +754,7 @@ def handle_private_message(data):
     recipient = data.get('recipient')
     message = data.get('message', '').strip()
     
-    if not message or not recipient or recipient not in users:
+    if not message or not recipient or not db.user_exists(recipient):
         return
     
     message_data = {
@@ -852,18 +767,13 @@ def handle_private_message(data):
     }
     
     # Store private message
-    key = tuple(sorted([sender, recipient]))
-    if key not in private_messages:
-        private_messages[key] = []
-    
-    private_messages[key].append(message_data)
-    save_data()
+    db.add_private_message(sender, recipient, message_data)
     
     # Send to both users if they're online
-    if recipient in active_users:
+    if db.is_online(recipient):
         emit('private_message', message_data, room=request.sid)
         # Send to recipient's session
-        for sid, user_data in active_users.items():
+        for sid, user_data in db.get_online_users().items():
             if user_data.get('username') == recipient:
                 emit('private_message', message_data, room=sid)
 
@@ -875,10 +785,11 @@ def handle_join_room(data):
     username = session['username']
     room = data.get('room', 'general')
     
-    if room in rooms:
+    if db.get_room(room):
         join_room(room)
-        if username in active_users:
-            active_users[username]['room'] = room
+        fanout.join(request.sid, username, room)
+        db.set_user_room(username, room)
+        add_room_member(room, username)
         
         emit('room_joined', {
             'username': username,
@@ -894,6 +805,8 @@ def handle_leave_room(data):
     room = data.get('room', 'general')
     
     leave_room(room)
+    fanout.leave(request.sid, room)
+    remove_room_member(room, username)
     
     emit('room_left', {
         'username': username,
@@ -917,7 +830,7 @@ def handle_typing(data):
 @socketio.on('get_online_users')
 def handle_get_online_users():
     emit('online_users', {
-        'users': list(active_users.keys())
+        'users': db.online_usernames()
     })
 
 # New Socket.IO events for enhanced features
@@ -930,8 +843,8 @@ def handle_file_share(data):
     file_id = data.get('file_id')
     room = data.get('room', 'general')
     
-    if file_id and file_id in file_shares:
-        file_info = file_shares[file_id]
+    file_info = db.get_file_share(file_id) if file_id else None
+    if file_info:
         
         message_data = {
             'id': str(uuid.uuid4()),
@@ -945,10 +858,10 @@ def handle_file_share(data):
             'file_size': file_info['file_size']
         }
         
-        message_history.append(message_data)
-        save_data()
+        db.add_message(message_data)
+        room_index.record_message(room)
         
-        emit('message', message_data, room=room)
+        emit('message', message_data, room=room, skip_sid=fanout.excluded_sids(room, username))
 
 @socketio.on('voice_call_request')
 def handle_voice_call_request(data):
@@ -958,11 +871,11 @@ def handle_voice_call_request(data):
     username = session['username']
     target_user = data.get('target_user')
     
-    if target_user and target_user in active_users:
+    if target_user and db.is_online(target_user):
         emit('voice_call_request', {
             'caller': username,
             'call_id': str(uuid.uuid4())
-        }, room=active_users[target_user].get('session_id'))
+        }, room=(db.get_online_user(target_user) or {}).get('session_id'))
 
 @socketio.on('voice_call_response')
 def handle_voice_call_response(data):
@@ -974,12 +887,12 @@ def handle_voice_call_response(data):
     accepted = data.get('accepted', False)
     call_id = data.get('call_id')
     
-    if caller and caller in active_users:
+    if caller and db.is_online(caller):
         emit('voice_call_response', {
             'responder': username,
             'accepted': accepted,
             'call_id': call_id
-        }, room=active_users[caller].get('session_id'))
+        }, room=(db.get_online_user(caller) or {}).get('session_id'))
 
 @socketio.on('video_call_request')
 def handle_video_call_request(data):
@@ -989,11 +902,11 @@ def handle_video_call_request(data):
     username = session['username']
     target_user = data.get('target_user')
     
-    if target_user and target_user in active_users:
+    if target_user and db.is_online(target_user):
         emit('video_call_request', {
             'caller': username,
             'call_id': str(uuid.uuid4())
-        }, room=active_users[target_user].get('session_id'))
+        }, room=(db.get_online_user(target_user) or {}).get('session_id'))
 
 @socketio.on('screen_share_start')
 def handle_screen_share_start(data):
@@ -1029,10 +942,7 @@ def handle_user_status_change(data):
     username = session['username']
     status = data.get('status', 'آنلاین')
     
-    if username in users:
-        users[username]['status'] = status
-        save_data()
-        
+    if db.update_user(username, {'status': status}):
         emit('user_status_updated', {
             'username': username,
             'status': status
@@ -1073,10 +983,10 @@ def handle_create_poll(data):
         'poll_data': poll_data
     }
     
-    message_history.append(message_data)
-    save_data()
+    db.add_message(message_data)
+    room_index.record_message(room)
     
-    emit('message', message_data, room=room)
+    emit('message', message_data, room=room, skip_sid=fanout.excluded_sids(room, username))
 
 @socketio.on('vote_poll')
 def handle_vote_poll(data):
@@ -1088,26 +998,12 @@ def handle_vote_poll(data):
     option = data.get('option')
     
     # Find poll in message history and update votes
-    for msg in reversed(message_history):
-        if msg.get('type') == 'poll' and msg.get('poll_data', {}).get('id') == poll_id:
-            poll_data = msg['poll_data']
-            
-            # Remove previous vote if exists
-            for opt, voters in poll_data['options'].items():
-                if username in voters:
-                    voters.remove(username)
-            
-            # Add new vote
-            if option in poll_data['options']:
-                poll_data['options'][option].append(username)
-                
-            save_data()
-            
-            emit('poll_updated', {
-                'poll_id': poll_id,
-                'options': poll_data['options']
-            }, room=poll_data['room'])
-            break
+    poll_data = db.vote_poll(poll_id, username, option)
+    if poll_data:
+        emit('poll_updated', {
+            'poll_id': poll_id,
+            'options': poll_data['options']
+        }, room=poll_data['room'])
 
 @socketio.on('request_user_info')
 def handle_request_user_info(data):
@@ -1116,9 +1012,9 @@ def handle_request_user_info(data):
     
     requested_user = data.get('username')
     
-    if requested_user and requested_user in users:
-        user_data = users[requested_user]
-        stats = user_stats.get(requested_user, {})
+    user_data = db.get_user(requested_user) if requested_user else None
+    if user_data:
+        stats = db.get_user_stats(requested_user)
         
         # Don't send sensitive information
         safe_user_data = {
@@ -1128,7 +1024,7 @@ def handle_request_user_info(data):
             'bio': user_data.get('bio', ''),
             'is_admin': user_data.get('is_admin', False),
             'message_count': stats.get('message_count', 0),
-            'is_online': requested_user in active_users
+            'is_online': db.is_online(requested_user)
         }
         
         emit('user_info_response', safe_user_data)
@@ -1143,11 +1039,7 @@ def handle_mark_messages_read(data):
     
     # Update user's last read timestamp for the room
     # This could be expanded to track read receipts
-    if username in users:
-        if 'last_read' not in users[username]:
-            users[username]['last_read'] = {}
-        users[username]['last_read'][room] = datetime.now().isoformat()
-        save_data()
+    db.mark_room_read(username, room)
 
 
 # Error handlers
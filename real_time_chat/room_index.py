@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Room membership index for Real-Time Chat Application
+Tracks room members, online counts and message rates behind a cached snapshot
+"""
+import time
+import logging
+from threading import Lock
+from typing import Dict, Any, Iterable, Optional, Set
+from collections import defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+class RoomIndex:
+    """Two-way room membership index with per-room statistics
+
+    ``room -> set(users)`` and ``user -> set(rooms)`` are kept in sync so
+    that online counts can be adjusted per affected room when a user
+    connects or disconnects. ``snapshot()`` serves the room list from a
+    cached dict in which only rooms touched since the last call are rebuilt.
+    """
+
+    def __init__(self, rate_window: int = 60):
+        self.rate_window = rate_window
+        self._lock = Lock()
+        self._meta = {}                            # room -> static metadata
+        self._members = defaultdict(set)           # room -> usernames
+        self._user_rooms = defaultdict(set)        # username -> rooms
+        self._online = set()                       # usernames currently online
+        self._online_count = defaultdict(int)      # room -> online members
+        self._message_count = defaultdict(int)     # room -> total messages
+        self._recent = defaultdict(deque)          # room -> recent message times
+        self._snapshot = {}
+        self._dirty = set()
+
+    # Room metadata
+    def set_room(self, room_id: str, room_data: Dict[str, Any]) -> None:
+        """Add or update a room and seed its members from room_data"""
+        with self._lock:
+            self._meta[room_id] = {
+                key: value for key, value in room_data.items() if key != 'members'
+            }
+            for username in room_data.get('members', []):
+                self._add_member(room_id, username)
+            self._dirty.add(room_id)
+
+    def remove_room(self, room_id: str) -> None:
+        """Drop a room and all of its counters"""
+        with self._lock:
+            self._meta.pop(room_id, None)
+            for username in self._members.pop(room_id, set()):
+                self._user_rooms[username].discard(room_id)
+            for counter in (self._online_count, self._message_count, self._recent):
+                counter.pop(room_id, None)
+            self._snapshot = {k: v for k, v in self._snapshot.items() if k != room_id}
+            self._dirty.discard(room_id)
+
+    # Membership
+    def add_member(self, room_id: str, username: str) -> bool:
+        """Add a user to a room, returns True if they were not a member yet"""
+        with self._lock:
+            return self._add_member(room_id, username)
+
+    def remove_member(self, room_id: str, username: str) -> bool:
+        """Remove a user from a room, returns True if they were a member"""
+        with self._lock:
+            if username not in self._members.get(room_id, ()):
+                return False
+            self._members[room_id].discard(username)
+            self._user_rooms[username].discard(room_id)
+            if username in self._online:
+                self._online_count[room_id] -= 1
+            self._dirty.add(room_id)
+            return True
+
+    def get_members(self, room_id: str) -> Set[str]:
+        """Get the members of a room"""
+        return set(self._members.get(room_id, ()))
+
+    def get_user_rooms(self, username: str) -> Set[str]:
+        """Get the rooms a user is a member of"""
+        return set(self._user_rooms.get(username, ()))
+
+    # Presence
+    def set_online(self, username: str) -> None:
+        """Mark a user online and bump the online count of their rooms"""
+        with self._lock:
+            if username in self._online:
+                return
+            self._online.add(username)
+            for room_id in self._user_rooms.get(username, ()):
+                self._online_count[room_id] += 1
+                self._dirty.add(room_id)
+
+    def set_offline(self, username: str) -> None:
+        """Mark a user offline and decrement the online count of their rooms"""
+        with self._lock:
+            if username not in self._online:
+                return
+            self._online.discard(username)
+            for room_id in self._user_rooms.get(username, ()):
+                self._online_count[room_id] -= 1
+                self._dirty.add(room_id)
+
+    # Message counters
+    def record_message(self, room_id: str, timestamp: Optional[float] = None) -> None:
+        """Count a message posted to a room (unknown rooms are ignored)"""
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            # room ids come from clients; counters for rooms without
+            # metadata would never be pruned by snapshot()
+            if room_id not in self._meta:
+                return
+            self._message_count[room_id] += 1
+            self._recent[room_id].append(now)
+            self._dirty.add(room_id)
+
+    def seed_message_counts(self, messages: Iterable[Dict[str, Any]]) -> None:
+        """Initialize total message counts from stored history"""
+        with self._lock:
+            for msg in messages:
+                room_id = msg.get('room', 'general')
+                if room_id not in self._meta:
+                    continue
+                self._message_count[room_id] += 1
+                self._dirty.add(room_id)
+
+    # Snapshot
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get the room list with live statistics
+
+        Only rooms changed since the previous call, or with messages still
+        inside the rate window, are rebuilt. The returned dict is never
+        mutated afterwards, so callers may serialize it without locking.
+        """
+        with self._lock:
+            now = time.time()
+            stale = set(self._dirty)
+            for room_id, recent in self._recent.items():
+                if recent:
+                    stale.add(room_id)
+            if not stale:
+                return self._snapshot
+
+            snapshot = dict(self._snapshot)
+            for room_id in stale:
+                if room_id not in self._meta:
+                    continue
+                snapshot[room_id] = self._build_entry(room_id, now)
+            self._snapshot = snapshot
+            self._dirty.clear()
+            return snapshot
+
+    def _add_member(self, room_id: str, username: str) -> bool:
+        if username in self._members[room_id]:
+            return False
+        self._members[room_id].add(username)
+        self._user_rooms[username].add(room_id)
+        if username in self._online:
+            self._online_count[room_id] += 1
+        self._dirty.add(room_id)
+        return True
+
+    def _build_entry(self, room_id: str, now: float) -> Dict[str, Any]:
+        recent = self._recent[room_id]
+        while recent and recent[0] < now - self.rate_window:
+            recent.popleft()
+
+        entry = dict(self._meta[room_id])
+        entry.update({
+            'member_count': len(self._members.get(room_id, ())),
+            'online_count': self._online_count.get(room_id, 0),
+            'message_count': self._message_count.get(room_id, 0),
+            'messages_per_minute': round(len(recent) * 60 / self.rate_window, 2)
+        })
+        return entry
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+"""
+User statistics aggregation for Real-Time Chat Application
+Maintains per-user and global activity counters incrementally
+"""
+import heapq
+import logging
+from array import array
+from datetime import date, datetime
+from threading import Lock
+from typing import Dict, Any, List, Optional
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+MAX_DASHBOARD_DAYS = 365
+
+class _UserCounters:
+    """Compact per-user counters"""
+    __slots__ = ('message_count', 'login_count', 'days_active', 'last_activity',
+                 'last_day', 'hourly', 'daily')
+
+    def __init__(self):
+        self.message_count = 0
+        self.login_count = 0
+        self.days_active = 0
+        self.last_activity = None      # datetime of the latest message or login
+        self.last_day = 0              # date ordinal of the latest active day
+        self.hourly = array('L', [0] * 24)
+        self.daily = {}                # date ordinal -> messages that day
+
+class UserStatsService:
+    """Incremental user statistics with daily rollups
+
+    Every message and login updates a fixed-size set of counters for the
+    user and for the whole server, so profile pages, leaderboards and the
+    admin dashboard never have to walk the message history.
+    """
+
+    def __init__(self, retention_days: int = 30):
+        self.retention_days = retention_days
+        self._lock = Lock()
+        self._users = defaultdict(_UserCounters)
+        self._hourly = array('L', [0] * 24)
+        self._daily_messages = defaultdict(int)     # date ordinal -> messages
+        self._daily_active = defaultdict(int)       # date ordinal -> active users
+        self._version = 0
+        self._leaderboards = {}
+
+    # Persistence
+    def load(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Load counters saved by to_dict(), legacy user_stats dicts included"""
+        with self._lock:
+            for username, stats in data.items():
+                counters = self._users[username]
+                counters.message_count = stats.get('message_count', 0)
+                counters.login_count = stats.get('login_count', 0)
+                counters.days_active = stats.get('days_active', 0)
+                if stats.get('last_activity'):
+                    counters.last_activity = datetime.fromisoformat(stats['last_activity'])
+                    counters.last_day = counters.last_activity.toordinal()
+                    if not counters.days_active:
+                        counters.days_active = 1
+                hourly = stats.get('hourly_activity')
+                if hourly and len(hourly) == 24:
+                    counters.hourly = array('L', hourly)
+                    for hour, count in enumerate(hourly):
+                        self._hourly[hour] += count
+                for day, count in stats.get('daily_activity', {}).items():
+                    ordinal = date.fromisoformat(day).toordinal()
+                    counters.daily[ordinal] = count
+                    self._daily_messages[ordinal] += count
+                if counters.last_day:
+                    self._daily_active[counters.last_day] += 1
+            self._version += 1
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Serialize all counters for JSON storage"""
+        with self._lock:
+            return {username: self._export(counters, full=True)
+                    for username, counters in self._users.items()}
+
+    # Updates
+    def ensure_user(self, username: str) -> None:
+        """Create empty counters for a new user"""
+        with self._lock:
+            self._users[username]
+            self._version += 1
+
+    def record_message(self, username: str, when: Optional[datetime] = None) -> None:
+        """Count a message sent by username"""
+        when = when or datetime.now()
+        with self._lock:
+            counters = self._touch(username, when)
+            day = when.toordinal()
+            counters.message_count += 1
+            counters.hourly[when.hour] += 1
+            counters.daily[day] = counters.daily.get(day, 0) + 1
+            self._hourly[when.hour] += 1
+            self._daily_messages[day] += 1
+            self._version += 1
+
+    def record_login(self, username: str, when: Optional[datetime] = None) -> None:
+        """Count a successful login by username"""
+        when = when or datetime.now()
+        with self._lock:
+            counters = self._touch(username, when)
+            counters.login_count += 1
+            self._version += 1
+
+    def update(self, username: str, updates: Dict[str, Any]) -> None:
+        """Overwrite individual counters of a user"""
+        with self._lock:
+            counters = self._users[username]
+            for key in ('message_count', 'login_count', 'days_active'):
+                if key in updates:
+                    setattr(counters, key, updates[key])
+            if updates.get('last_activity'):
+                counters.last_activity = datetime.fromisoformat(updates['last_activity'])
+            self._version += 1
+
+    # Queries
+    def get_stats(self, username: str) -> Dict[str, Any]:
+        """Get the statistics of a single user"""
+        with self._lock:
+            counters = self._users.get(username)
+            if counters is None:
+                return self._export(_UserCounters(), full=True)
+            return self._export(counters, full=True)
+
+    def all_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get summary statistics for every user"""
+        with self._lock:
+            return {username: self._export(counters)
+                    for username, counters in self._users.items()}
+
+    def leaderboard(self, limit: int = 10, key: str = 'message_count') -> List[Dict[str, Any]]:
+        """Get the top users ordered by a counter
+
+        Results are cached until the next update.
+        """
+        if key not in ('message_count', 'login_count', 'days_active'):
+            raise ValueError(f"Unknown leaderboard key: {key}")
+
+        with self._lock:
+            cache_key = (key, limit)
+            cached = self._leaderboards.get(cache_key)
+            if cached and cached[0] == self._version:
+                return cached[1]
+
+            top = heapq.nlargest(limit, self._users.items(),
+                                 key=lambda item: getattr(item[1], key))
+            board = [{'username': username, key: getattr(counters, key)}
+                     for username, counters in top]
+            self._leaderboards[cache_key] = (self._version, board)
+            return board
+
+    def dashboard(self, days: int = 7) -> Dict[str, Any]:
+        """Get server-wide activity for the admin panel
+
+        ``days`` comes from the request, so it is clamped to
+        1..MAX_DASHBOARD_DAYS.
+        """
+        days = min(max(days, 1), MAX_DASHBOARD_DAYS)
+        with self._lock:
+            today = date.today().toordinal()
+            recent_days = range(today - days + 1, today + 1)
+            return {
+                'total_messages': sum(c.message_count for c in self._users.values()),
+                'total_logins': sum(c.login_count for c in self._users.values()),
+                'active_today': self._daily_active.get(today, 0),
+                'hourly_activity': list(self._hourly),
+                'daily_messages': {
+                    date.fromordinal(day).isoformat(): self._daily_messages.get(day, 0)
+                    for day in recent_days
+                },
+                'daily_active_users': {
+                    date.fromordinal(day).isoformat(): self._daily_active.get(day, 0)
+                    for day in recent_days
+                }
+            }
+
+    def _touch(self, username: str, when: datetime) -> _UserCounters:
+        counters = self._users[username]
+        day = when.toordinal()
+        if day > counters.last_day:
+            counters.days_active += 1
+            counters.last_day = day
+            self._daily_active[day] += 1
+            self._prune(counters, day)
+        counters.last_activity = when
+        return counters
+
+    def _prune(self, counters: _UserCounters, today: int) -> None:
+        cutoff = today - self.retention_days
+        for day in [d for d in counters.daily if d <= cutoff]:
+            del counters.daily[day]
+        for rollup in (self._daily_messages, self._daily_active):
+            for day in [d for d in rollup if d <= cutoff]:
+                del rollup[day]
+
+    def _export(self, counters: _UserCounters, full: bool = False) -> Dict[str, Any]:
+        stats = {
+            'message_count': counters.message_count,
+            'login_count': counters.login_count,
+            'days_active': counters.days_active,
+            'last_activity': counters.last_activity.isoformat() if counters.last_activity else None
+        }
+        if full:
+            stats['hourly_activity'] = list(counters.hourly)
+            stats['daily_activity'] = {
+                date.fromordinal(day).isoformat(): count
+                for day, count in sorted(counters.daily.items())
+            }
+        return stats
@@ -209,6 +209,82 @@ class ChatApplicationTest(unittest.TestCase):
         # Should have default rooms
         self.assertEqual(stats['total_rooms'], 3)
 
+    def test_room_membership(self):
+        """Test room member list maintenance"""
+        db = ChatDatabase(self.temp_db.name + '.rooms')
+        self.addCleanup(lambda: os.path.exists(db.data_file) and os.unlink(db.data_file))
+        db.create_room('test_room', {'name': 'Test Room', 'members': []})
+        
+        self.assertTrue(db.add_room_member('test_room', 'testuser'))
+        self.assertEqual(db.get_room('test_room')['members'], ['testuser'])
+        
+        self.assertTrue(db.remove_room_member('test_room', 'testuser'))
+        self.assertFalse(db.remove_room_member('test_room', 'testuser'))
+        self.assertFalse(db.add_room_member('missing_room', 'testuser'))
+
+    def test_toggle_admin_keeps_last_admin(self):
+        """Test that the last admin cannot be demoted"""
+        db = ChatDatabase(':memory:')
+        db.create_user('alice', {'username': 'alice'}, first_user_admin=True)
+        db.create_user('bob', {'username': 'bob'}, first_user_admin=True)
+        
+        self.assertTrue(db.get_user('alice')['is_admin'])
+        self.assertFalse(db.toggle_admin('alice'))
+        self.assertTrue(db.toggle_admin('bob'))
+        self.assertTrue(db.toggle_admin('alice'))
+        self.assertFalse(db.get_user('alice')['is_admin'])
+        self.assertFalse(db.toggle_admin('bob'))
+
+    def test_presence_and_rate_limit(self):
+        """Test process-local presence tracking and rate limiting"""
+        db = ChatDatabase(':memory:')
+        db.set_online('alice', {'username': 'alice', 'room': 'general'})
+        self.assertTrue(db.set_user_room('alice', 'tech'))
+        self.assertEqual(db.get_online_user('alice')['room'], 'tech')
+        self.assertEqual(db.online_usernames(), ['alice'])
+        self.assertTrue(db.set_offline('alice'))
+        self.assertFalse(db.set_offline('alice'))
+        
+        self.assertTrue(db.check_rate_limit('alice_message', limit=2, window=60))
+        self.assertTrue(db.check_rate_limit('alice_message', limit=2, window=60))
+        self.assertFalse(db.check_rate_limit('alice_message', limit=2, window=60))
+
+    def test_atomic_save(self):
+        """Test that saving replaces the data file without leftovers"""
+        data_file = self.temp_db.name + '.atomic'
+        self.addCleanup(lambda: os.path.exists(data_file) and os.unlink(data_file))
+        
+        db = ChatDatabase(data_file)
+        db.create_user('testuser', {'username': 'testuser'})
+        self.assertFalse(os.path.exists(data_file + '.tmp'))
+        self.assertFalse(os.path.exists(data_file + '.backup'))
+        
+        reloaded = ChatDatabase(data_file)
+        self.assertIsNotNone(reloaded.get_user('testuser'))
+    
+    def test_backup_and_restore(self):
+        """Test compressed backup, rotation and restore"""
+        from backup import create_backup, list_backups, restore_backup
+        
+        backup_dir = tempfile.mkdtemp()
+        data_file = os.path.join(backup_dir, 'restored.json')
+        db = ChatDatabase(':memory:')
+        db.create_user('testuser', {'username': 'testuser'})
+        db.add_message({'id': 'm1', 'message': 'Hello', 'room': 'general'})
+        
+        paths = [create_backup(db, backup_dir, keep=2) for _ in range(3)]
+        self.assertEqual(list_backups(backup_dir), [paths[2], paths[1]])
+        self.assertIsNotNone(db.get_database_stats()['last_backup'])
+        
+        restore_backup(paths[2], data_file)
+        restored = ChatDatabase(data_file)
+        self.assertIsNotNone(restored.get_user('testuser'))
+        self.assertEqual(restored.get_recent_messages()[0]['message'], 'Hello')
+        
+        for path in os.listdir(backup_dir):
+            os.unlink(os.path.join(backup_dir, path))
+        os.rmdir(backup_dir)
+
 class SecurityTest(unittest.TestCase):
     """Test security features"""
     
@@ -291,5 +367,178 @@ class SecurityTest(unittest.TestCase):
         self.assertFalse(is_valid_email('@example.com'))
         self.assertFalse(is_valid_email('test@'))
 
+class FanoutFilterTest(unittest.TestCase):
+    """Test block-list enforcement on room fan-out"""
+    
+    def test_blocked_sender_is_skipped(self):
+        """Test that blockers in a room are excluded from a sender's messages"""
+        from fanout import FanoutFilter
+        
+        fanout = FanoutFilter({'alice': ['bob']})
+        fanout.join('sid-alice', 'alice', 'general')
+        fanout.join('sid-carol', 'carol', 'general')
+        
+        self.assertEqual(fanout.excluded_sids('general', 'bob'), ['sid-alice'])
+        self.assertIsNone(fanout.excluded_sids('general', 'carol'))
+        self.assertIsNone(fanout.excluded_sids('tech', 'bob'))
+    
+    def test_incremental_updates(self):
+        """Test that block, unblock, join and leave keep exclusions current"""
+        from fanout import FanoutFilter
+        
+        fanout = FanoutFilter()
+        fanout.join('sid-alice', 'alice', 'general')
+        fanout.block('alice', 'bob')
+        self.assertEqual(fanout.excluded_sids('general', 'bob'), ['sid-alice'])
+        
+        fanout.join('sid-alice', 'alice', 'tech')
+        self.assertEqual(fanout.excluded_sids('tech', 'bob'), ['sid-alice'])
+        
+        fanout.leave('sid-alice', 'tech')
+        self.assertIsNone(fanout.excluded_sids('tech', 'bob'))
+        
+        fanout.unblock('alice', 'bob')
+        self.assertIsNone(fanout.excluded_sids('general', 'bob'))
+        
+        fanout.block('alice', 'bob')
+        fanout.disconnect('sid-alice')
+        self.assertIsNone(fanout.excluded_sids('general', 'bob'))
+        self.assertTrue(fanout.is_blocked('alice', 'bob'))
+
+class RoomIndexTest(unittest.TestCase):
+    """Test room membership index and cached statistics"""
+    
+    def test_membership_and_online_counts(self):
+        """Test that member and online counts follow joins and presence"""
+        from room_index import RoomIndex
+        
+        index = RoomIndex()
+        index.set_room('general', {'name': 'General', 'members': ['alice']})
+        index.set_room('tech', {'name': 'Tech'})
+        index.add_member('general', 'bob')
+        index.add_member('tech', 'bob')
+        index.set_online('bob')
+        
+        snapshot = index.snapshot()
+        self.assertEqual(snapshot['general']['member_count'], 2)
+        self.assertEqual(snapshot['general']['online_count'], 1)
+        self.assertEqual(snapshot['tech']['online_count'], 1)
+        self.assertNotIn('members', snapshot['general'])
+        self.assertEqual(index.get_user_rooms('bob'), {'general', 'tech'})
+        
+        index.set_offline('bob')
+        index.remove_member('tech', 'bob')
+        snapshot = index.snapshot()
+        self.assertEqual(snapshot['general']['online_count'], 0)
+        self.assertEqual(snapshot['tech']['member_count'], 0)
+    
+    def test_snapshot_is_cached(self):
+        """Test that an unchanged index returns the same snapshot object"""
+        from room_index import RoomIndex
+        
+        index = RoomIndex()
+        index.set_room('general', {'name': 'General'})
+        first = index.snapshot()
+        self.assertIs(index.snapshot(), first)
+        
+        index.record_message('general')
+        second = index.snapshot()
+        self.assertIsNot(second, first)
+        self.assertEqual(second['general']['message_count'], 1)
+        self.assertEqual(second['general']['messages_per_minute'], 1)
+        self.assertEqual(first['general']['message_count'], 0)
+    
+    def test_message_rate_expires(self):
+        """Test that old messages drop out of the rate window"""
+        import time
+        from room_index import RoomIndex
+        
+        index = RoomIndex(rate_window=60)
+        index.set_room('general', {'name': 'General'})
+        index.record_message('general', timestamp=time.time() - 120)
+        
+        entry = index.snapshot()['general']
+        self.assertEqual(entry['message_count'], 1)
+        self.assertEqual(entry['messages_per_minute'], 0)
+    
+    def test_unknown_room_messages_ignored(self):
+        """Test that messages to rooms without metadata are not tracked"""
+        from room_index import RoomIndex
+        
+        index = RoomIndex()
+        index.set_room('general', {'name': 'General'})
+        first = index.snapshot()
+        index.record_message('no-such-room')
+        
+        self.assertIs(index.snapshot(), first)
+        self.assertNotIn('no-such-room', index._recent)
+
+class UserStatsServiceTest(unittest.TestCase):
+    """Test incremental user statistics"""
+    
+    def test_active_days_and_histogram(self):
+        """Test that active days and hourly activity are counted incrementally"""
+        from datetime import datetime
+        from stats_service import UserStatsService
+        
+        service = UserStatsService()
+        service.record_login('alice', datetime(2024, 1, 1, 9, 0))
+        service.record_message('alice', datetime(2024, 1, 1, 9, 30))
+        service.record_message('alice', datetime(2024, 1, 1, 21, 0))
+        service.record_message('alice', datetime(2024, 1, 2, 9, 15))
+        
+        stats = service.get_stats('alice')
+        self.assertEqual(stats['message_count'], 3)
+        self.assertEqual(stats['login_count'], 1)
+        self.assertEqual(stats['days_active'], 2)
+        self.assertEqual(stats['hourly_activity'][9], 2)
+        self.assertEqual(stats['hourly_activity'][21], 1)
+        self.assertEqual(stats['daily_activity'], {'2024-01-01': 2, '2024-01-02': 1})
+        self.assertEqual(stats['last_activity'], '2024-01-02T09:15:00')
+    
+    def test_leaderboard(self):
+        """Test leaderboard ordering and cache invalidation"""
+        from stats_service import UserStatsService
+        
+        service = UserStatsService()
+        for _ in range(3):
+            service.record_message('alice')
+        service.record_message('bob')
+        
+        board = service.leaderboard(limit=2)
+        self.assertEqual([row['username'] for row in board], ['alice', 'bob'])
+        self.assertIs(service.leaderboard(limit=2), board)
+        
+        for _ in range(5):
+            service.record_message('bob')
+        self.assertEqual(service.leaderboard(limit=1)[0]['username'], 'bob')
+        
+        with self.assertRaises(ValueError):
+            service.leaderboard(key='password')
+    
+    def test_round_trip(self):
+        """Test that saved counters load back, legacy dicts included"""
+        from stats_service import UserStatsService
+        
+        service = UserStatsService()
+        service.record_message('alice')
+        
+        restored = UserStatsService()
+        restored.load(service.to_dict())
+        restored.load({'bob': {'message_count': 4, 'login_count': 2,
+                               'days_active': 0, 'last_activity': None}})
+        self.assertEqual(restored.get_stats('alice'), service.get_stats('alice'))
+        self.assertEqual(restored.get_stats('bob')['message_count'], 4)
+        self.assertEqual(restored.dashboard()['total_messages'], 5)
+        self.assertEqual(restored.dashboard()['active_today'], 1)
+    
+    def test_dashboard_days_clamped(self):
+        """Test that the dashboard range is limited to sane values"""
+        from stats_service import UserStatsService, MAX_DASHBOARD_DAYS
+        
+        service = UserStatsService()
+        self.assertEqual(len(service.dashboard(days=-5)['daily_messages']), 1)
+        self.assertEqual(len(service.dashboard(days=10 ** 9)['daily_messages']), MAX_DASHBOARD_DAYS)
+
 if __name__ == '__main__':
     unittest.main()